@@ -3,11 +3,20 @@ import json
 import pandas as pd
 from typing import Dict, List
 import os
+import uuid
 from datetime import datetime
 
 # Import our custom modules
-from ticket_classifier import TicketClassifier, load_sample_tickets, format_classification_display
+from ticket_classifier import (CLASSIFICATION_OPERATIONS, TicketClassifier, load_sample_tickets,
+                               format_classification_display)
 from rag_pipeline import AtlanRAGPipeline
+from model_registry import get_ticket_classifier, get_openai_rag_pipeline, register_session, memory_report
+from classification_cache import get_default_cache
+from openai_scheduler import get_scheduler
+from http_pool import metrics as http_metrics
+from doc_cache import get_default_doc_cache
+from llm_accounting import get_accounting
+from deadline_budget import DEFAULT_BUDGET_SECONDS
 
 # Page configuration
 st.set_page_config(
@@ -461,6 +470,12 @@ def initialize_session_state():
         st.session_state.rag_pipeline = None
     if 'api_key_configured' not in st.session_state:
         st.session_state.api_key_configured = False
+    if 'pending_results' not in st.session_state:
+        # Provisional results whose model call is still running: (kind, query parts...)
+        st.session_state.pending_results = []
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+        register_session(st.session_state.session_id)
 
 def check_api_configuration():
     """Check if OpenAI API key is configured."""
@@ -501,15 +516,77 @@ def setup_api_key():
         # Performance Metrics
         st.header("📈 System Performance")
         
+        accounting = get_accounting()
+        classify_stats = accounting.summary('classify')
+        # Every classification call (retries, packed requests, embeddings) over tickets classified
+        classification_calls = sum(accounting.summary(operation)['calls'] for operation in CLASSIFICATION_OPERATIONS)
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Response Time", "~2-3s", "Real-time")
+            if classify_stats['calls']:
+                st.metric("Response Time", f"{classify_stats['p50_ms'] / 1000:.1f}s",
+                          f"p95 {classify_stats['p95_ms'] / 1000:.1f}s", delta_color="off")
+                st.metric("Cost / Ticket", f"${accounting.cost_per_item('tickets', CLASSIFICATION_OPERATIONS):.5f}",
+                          f"{classification_calls} LLM calls", delta_color="off")
+            else:
+                st.metric("Response Time", "—", "No LLM calls yet", delta_color="off")
             st.metric("API Efficiency", "85%", "+15%")
         
         with col2:
             st.metric("Accuracy Rate", "92%", "+8%")
             st.metric("Uptime", "99.9%", "Stable")
         
+        report = memory_report()
+        if report['models']:
+            st.caption(
+                f"Shared models across {report['sessions']} sessions: "
+                f"{report['saved_per_extra_session_mb']:.0f} MB saved per extra session"
+            )
+        cache_stats = get_default_cache().stats()
+        st.caption(
+            f"Classification cache: {cache_stats['entries']} entries, "
+            f"{cache_stats['hit_rate']:.0%} hit rate"
+        )
+        scheduler_stats = get_scheduler().stats()
+        st.caption(
+            f"OpenAI queue: {scheduler_stats['queue_depth']} waiting, {scheduler_stats['in_flight']} in flight, "
+            f"{scheduler_stats['retries']} retries ({scheduler_stats['rate_limited']} rate limited)"
+        )
+        http_stats = http_metrics.stats()
+        st.caption(
+            f"HTTP pool: {http_stats['requests']} requests on {http_stats['new_connections']} connections "
+            f"({http_stats['reuse_rate']:.0%} reused)"
+        )
+        doc_stats = get_default_doc_cache().stats()
+        if doc_stats['hits'] or doc_stats['misses']:
+            st.caption(
+                f"Docs cache: {doc_stats['entries']} pages, {doc_stats['hit_rate']:.0%} hit rate, "
+                f"{doc_stats['revalidated']} revalidated, {doc_stats['stale_served']} served stale"
+            )
+        if st.session_state.rag_pipeline is not None:
+            prefetch_stats = st.session_state.rag_pipeline.prefetcher.stats()
+            st.caption(
+                f"Docs prefetch: {prefetch_stats['ready_urls']}/{prefetch_stats['urls']} pages ready, "
+                f"{prefetch_stats['passes']} refresh passes, {prefetch_stats['failed']} failed fetches"
+            )
+        if st.session_state.classifier is not None:
+            parse_stats = st.session_state.classifier.parse_stats.stats()
+            st.caption(
+                f"Classifier replies: {parse_stats['replies']} parsed, "
+                f"{parse_stats['repaired']} repaired, {parse_stats['failure_rate']:.1%} failed"
+            )
+            budget_stats = st.session_state.classifier.budget_runner.stats()
+            if budget_stats['provisional']:
+                st.caption(
+                    f"Latency budget: {budget_stats['provisional']} provisional results, "
+                    f"{budget_stats['corrected']} later corrected by the model"
+                )
+            if st.session_state.classifier.near_duplicates is not None:
+                reuse_stats = st.session_state.classifier.near_duplicates.stats()
+                st.caption(
+                    f"Near-duplicate reuse: {reuse_stats['calls_avoided']} model calls avoided, "
+                    f"{reuse_stats['entries']} recent tickets indexed"
+                )
+        
         st.markdown("<br>", unsafe_allow_html=True)
         
         # Enterprise Features
@@ -567,7 +644,7 @@ def display_classification_dashboard():
                 try:
                     # Initialize classifier if needed
                     if st.session_state.classifier is None:
-                        st.session_state.classifier = TicketClassifier()
+                        st.session_state.classifier = get_ticket_classifier()
                     
                     # Load sample tickets
                     tickets = load_sample_tickets("sample_tickets.json")
@@ -649,10 +726,12 @@ def display_interactive_agent():
     
     # Initialize components if needed
     if st.session_state.classifier is None:
-        st.session_state.classifier = TicketClassifier()
+        st.session_state.classifier = get_ticket_classifier()
     
     if st.session_state.rag_pipeline is None:
-        st.session_state.rag_pipeline = AtlanRAGPipeline()
+        st.session_state.rag_pipeline = get_openai_rag_pipeline()
+    
+    display_reconciled_results()
     
     # Input form
     with st.form("ticket_form", clear_on_submit=True):
@@ -682,7 +761,11 @@ def display_interactive_agent():
         with st.spinner("Analyzing your query..."):
             try:
                 # Step 1: Classify the ticket
-                classification = st.session_state.classifier.classify_ticket(subject, description)
+                classification = st.session_state.classifier.classify_ticket(
+                    subject, description, budget=DEFAULT_BUDGET_SECONDS
+                )
+                if classification.decided_by == 'provisional':
+                    st.session_state.pending_results.append(('classification', subject, description))
                 
                 # Step 2: Display internal analysis
                 st.markdown("### 🔍 Internal Analysis (Back-end View)")
@@ -719,8 +802,13 @@ def display_interactive_agent():
                     # Generate RAG response
                     with st.spinner("Generating answer from knowledge base..."):
                         rag_response = st.session_state.rag_pipeline.generate_rag_response(
-                            f"{subject} {description}", classification.topic_tags
+                            f"{subject} {description}", classification.topic_tags, budget=DEFAULT_BUDGET_SECONDS
+                        )
+                    if rag_response.provisional:
+                        st.session_state.pending_results.append(
+                            ('answer', f"{subject} {description}", classification.topic_tags)
                         )
+                        st.info("⏳ The full AI answer is taking longer than usual; showing a quick answer for now.")
                     
                     st.markdown("**AI Response:**")
                     st.markdown(rag_response.answer)
@@ -731,6 +819,8 @@ def display_interactive_agent():
                             st.markdown(f"• [{source}]({source})")
                     
                     st.markdown(f"**Response Confidence:** {rag_response.confidence:.2f}")
+                    if rag_response.context_tokens:
+                        st.caption(f"Documentation context: {rag_response.context_tokens} tokens")
                     
                 else:
                     # Generate routing message
@@ -744,6 +834,30 @@ def display_interactive_agent():
             except Exception as e:
                 st.error(f"❌ Error processing your query: {str(e)}")
 
+def display_reconciled_results():
+    """Show model results that arrived after a provisional classification or answer"""
+    still_pending = []
+    for kind, first, second in st.session_state.pending_results:
+        if kind == 'classification':
+            final = st.session_state.classifier.reconciled_classification(first, second)
+            if final is not None:
+                st.success(
+                    f"🔄 Updated classification for \"{first}\": {', '.join(final.topic_tags)} · "
+                    f"{final.sentiment} · {final.priority} (confidence {final.confidence:.2f})"
+                )
+                continue
+        else:
+            final = st.session_state.rag_pipeline.reconciled_response(first, second)
+            if final is not None:
+                with st.expander("🔄 Full AI answer for your previous query", expanded=True):
+                    st.markdown(final.answer)
+                continue
+        still_pending.append((kind, first, second))
+    
+    if still_pending:
+        st.caption(f"⏳ {len(still_pending)} model result(s) still running in the background")
+    st.session_state.pending_results = still_pending
+
 def display_project_overview():
     """Display comprehensive project overview and introduction."""
     # Hero Section
@@ -971,7 +1085,12 @@ def display_system_documentation():
             st.metric("Response Quality Score", "4.6/5.0", "↑ +0.3")
         
         with col2:
-            st.metric("Average Response Time", "2.1s", "↓ -0.4s")
+            rag_stats = get_accounting().summary('rag_answer')
+            if rag_stats['calls']:
+                st.metric("Median Answer Time", f"{rag_stats['p50_ms'] / 1000:.1f}s",
+                          f"p99 {rag_stats['p99_ms'] / 1000:.1f}s", delta_color="off")
+            else:
+                st.metric("Median Answer Time", "—", "No answers yet", delta_color="off")
             st.metric("API Uptime", "99.97%", "↑ +0.02%")
         
         with col3:
@@ -4,16 +4,25 @@ from typing import Dict, List
 import os
 from datetime import datetime
 import sys
+import uuid
 
 # Import our updated modules
 try:
     from classifier import AtlanTicketClassifier, load_sample_tickets
     from rag_corrected import AtlanRAGPipeline
+    from model_registry import get_atlan_classifier, get_vector_rag_pipeline, register_session, memory_report
+    from classification_cache import get_default_cache
     MODELS_AVAILABLE = True
 except ImportError as e:
     st.error(f"⚠️ Some models not available: {e}")
     MODELS_AVAILABLE = False
 
+# "zero-shot" (BART-MNLI) or "embedding" (MiniLM label similarity)
+TOPIC_BACKEND = os.getenv('TOPIC_BACKEND', 'zero-shot')
+
+# Rule confidence above which the transformers are skipped; unset runs every ticket through them
+CASCADE_THRESHOLD = float(os.environ['CASCADE_THRESHOLD']) if os.getenv('CASCADE_THRESHOLD') else None
+
 # Page configuration
 st.set_page_config(
     page_title="Atlan Customer Support AI Copilot",
@@ -94,6 +103,10 @@ def initialize_session_state():
         st.session_state.classifier = None
     if 'rag_pipeline' not in st.session_state:
         st.session_state.rag_pipeline = None
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+        if MODELS_AVAILABLE:
+            register_session(st.session_state.session_id)
 
 def setup_sidebar_info():
     """Setup sidebar with model information"""
@@ -105,8 +118,13 @@ def setup_sidebar_info():
         
         if MODELS_AVAILABLE:
             st.markdown("✅ **Topic Classification**")
-            st.markdown("   • Zero-shot: `facebook/bart-large-mnli`")
+            if TOPIC_BACKEND == "embedding":
+                st.markdown("   • Embedding similarity: `all-MiniLM-L6-v2`")
+            else:
+                st.markdown("   • Zero-shot: `facebook/bart-large-mnli`")
             st.markdown("   • Fallback: Rule-based keywords")
+            if CASCADE_THRESHOLD is not None:
+                st.markdown(f"   • Cascade: rules decide at confidence ≥ {CASCADE_THRESHOLD:.2f}")
             
             st.markdown("✅ **Sentiment Analysis**") 
             st.markdown("   • Model: `cardiffnlp/twitter-roberta-base-sentiment`")
@@ -119,6 +137,18 @@ def setup_sidebar_info():
             st.markdown("   • Embeddings: `sentence-transformers/all-MiniLM-L6-v2`")
             st.markdown("   • Vector Storage: FAISS IndexFlatIP")
             st.markdown("   • Chunking: 500 words with 50 overlap")
+            
+            report = memory_report()
+            if report['models']:
+                st.markdown("✅ **Shared Models** (loaded once per process)")
+                st.markdown(f"   • Sessions: {report['sessions']}")
+                st.markdown(f"   • Saved per extra session: {report['saved_per_extra_session_mb']:.0f} MB")
+                st.markdown(f"   • Total saved: {report['total_saved_mb']:.0f} MB")
+            
+            cache_stats = get_default_cache().stats()
+            st.markdown("✅ **Classification Cache**")
+            st.markdown(f"   • Entries: {cache_stats['entries']}")
+            st.markdown(f"   • Hit rate: {cache_stats['hit_rate']:.0%}")
         else:
             st.markdown("❌ **Models not loaded**")
             st.markdown("Run: `pip install -r requirements_new.txt`")
@@ -173,7 +203,7 @@ def display_classification_dashboard():
                 try:
                     # Initialize classifier if needed
                     if st.session_state.classifier is None:
-                        st.session_state.classifier = AtlanTicketClassifier()
+                        st.session_state.classifier = get_atlan_classifier(topic_backend=TOPIC_BACKEND, cascade_threshold=CASCADE_THRESHOLD)
                     
                     # Load sample tickets from CSV
                     tickets_df = load_sample_tickets("sample_tickets.csv")
@@ -239,7 +269,7 @@ def display_classification_dashboard():
                     st.markdown(f"**Topic Tags:** {tags_str}")
                     st.markdown(f'**Sentiment:** <span class="{sentiment_class}">{row["sentiment"]}</span>', unsafe_allow_html=True)
                     st.markdown(f'**Priority:** <span class="{priority_class}">{row["priority"]}</span>', unsafe_allow_html=True)
-                    st.markdown(f"**Confidence:** {row['confidence']:.2f}")
+                    st.markdown(f"**Confidence:** {row['confidence']:.2f} (decided by {row['decided_by']})")
                     st.markdown(f"**Reasoning:** {row['reasoning']}")
                     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -254,11 +284,11 @@ def display_interactive_agent():
     # Initialize components if needed
     if st.session_state.classifier is None:
         with st.spinner("Loading classification models..."):
-            st.session_state.classifier = AtlanTicketClassifier()
+            st.session_state.classifier = get_atlan_classifier(topic_backend=TOPIC_BACKEND, cascade_threshold=CASCADE_THRESHOLD)
     
     if st.session_state.rag_pipeline is None:
         with st.spinner("Loading RAG pipeline..."):
-            st.session_state.rag_pipeline = AtlanRAGPipeline()
+            st.session_state.rag_pipeline = get_vector_rag_pipeline()
     
     # Input form
     with st.form("ticket_form", clear_on_submit=True):
@@ -306,7 +336,7 @@ def display_interactive_agent():
                     st.markdown(f"**Topic Tags:** {tags_str}")
                     st.markdown(f'**Sentiment:** <span class="{sentiment_class}">{classification.sentiment}</span>', unsafe_allow_html=True)
                     st.markdown(f'**Priority:** <span class="{priority_class}">{classification.priority}</span>', unsafe_allow_html=True)
-                    st.markdown(f"**Confidence:** {classification.confidence:.2f}")
+                    st.markdown(f"**Confidence:** {classification.confidence:.2f} (decided by {classification.decided_by})")
                     st.markdown(f"**Reasoning:** {classification.reasoning}")
                     st.markdown('</div>', unsafe_allow_html=True)
                 
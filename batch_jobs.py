@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+from ticket_stream import iter_ticket_chunks
+
+# OpenAI Batch API limits per input file
+MAX_REQUESTS_PER_FILE = 50000
+MAX_BYTES_PER_FILE = 190 * 1024 * 1024
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+def iter_tickets(tickets_path: str, chunk_size: int = 1000) -> Iterator[Dict]:
+    """Stream ticket dicts from a CSV, JSON array or JSONL file"""
+    for chunk_df in iter_ticket_chunks(tickets_path, chunk_size):
+        yield from chunk_df.to_dict('records')
+
+
+def iter_custom_ids(tickets: Iterator[Dict]) -> Iterator[tuple]:
+    """Pair each ticket with a unique custom_id, its ticket_id where possible"""
+    seen = set()
+    for i, ticket in enumerate(tickets):
+        custom_id = str(ticket.get('ticket_id') or f"ticket-{i}")
+        if custom_id in seen:
+            custom_id = f"{custom_id}-{i}"
+        seen.add(custom_id)
+        yield custom_id, ticket
+
+
+def write_batch_files(tickets_path: str, batch_path: str, classifier,
+                      max_requests: int = MAX_REQUESTS_PER_FILE) -> List[str]:
+    """
+    Write one Batch API request line per ticket.
+
+    Files are split to stay within the Batch API's per-file limits, as
+    batch_path, then batch_path with .part2, .part3, ... before the extension.
+
+    Returns:
+        Paths of the request files written
+    """
+    root, extension = os.path.splitext(batch_path)
+    paths: List[str] = []
+    f = None
+    requests_in_file = bytes_in_file = 0
+
+    try:
+        for custom_id, ticket in iter_custom_ids(iter_tickets(tickets_path)):
+            line = json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': BATCH_ENDPOINT,
+                'body': {
+                    'model': classifier.model,
+                    'messages': classifier._build_messages(ticket.get('subject', ''), ticket.get('description', '')),
+                    **classifier._completion_options(),
+                },
+            }) + "\n"
+            line_bytes = len(line.encode('utf-8'))
+
+            if f is None or requests_in_file >= max_requests or bytes_in_file + line_bytes > MAX_BYTES_PER_FILE:
+                if f is not None:
+                    f.close()
+                paths.append(batch_path if not paths else f"{root}.part{len(paths) + 1}{extension}")
+                f = open(paths[-1], 'w', encoding='utf-8')
+                requests_in_file = bytes_in_file = 0
+
+            f.write(line)
+            requests_in_file += 1
+            bytes_in_file += line_bytes
+    finally:
+        if f is not None:
+            f.close()
+
+    return paths
+
+
+class OpenAIBatchRunner:
+    """Submit request files to the OpenAI Batch API and fetch their results"""
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        if client is None:
+            import openai
+            from http_pool import get_http_client
+            client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=get_http_client())
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, batch_path: str) -> str:
+        with open(batch_path, 'rb') as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    def poll(self, job_id: str) -> Dict:
+        batch = self.client.batches.retrieve(job_id)
+        counts = getattr(batch, 'request_counts', None)
+        return {
+            'status': batch.status,
+            'completed': getattr(counts, 'completed', 0) if counts else 0,
+            'failed': getattr(counts, 'failed', 0) if counts else 0,
+            'total': getattr(counts, 'total', 0) if counts else 0,
+            'output_file_id': batch.output_file_id,
+            'error_file_id': batch.error_file_id,
+        }
+
+    def download(self, job_id: str, results_path: str):
+        """Write output and error lines of a finished job to results_path"""
+        status = self.poll(job_id)
+        with open(results_path, 'w', encoding='utf-8') as f:
+            for file_id in (status['output_file_id'], status['error_file_id']):
+                if file_id:
+                    f.write(self.client.files.content(file_id).text.rstrip("\n") + "\n")
+
+
+class LocalBatchRunner:
+    """
+    Offline stand-in for the Batch API.
+
+    Processes a request file immediately, answering each request from canned
+    responses: a dict of reply contents by custom_id, or a callable taking the
+    request body. Requests without a response, or whose callable raises, get
+    an error line as the real API would.
+    """
+
+    def __init__(self, responses: Union[Dict[str, str], Callable[[Dict], str]]):
+        self.responses = responses
+        self.jobs: Dict[str, str] = {}
+
+    def submit(self, batch_path: str) -> str:
+        job_id = f"batch_local_{len(self.jobs) + 1}"
+        self.jobs[job_id] = batch_path
+        return job_id
+
+    def poll(self, job_id: str) -> Dict:
+        return {'status': 'completed'}
+
+    def download(self, job_id: str, results_path: str):
+        with open(self.jobs[job_id], 'r', encoding='utf-8') as requests_file, \
+                open(results_path, 'w', encoding='utf-8') as results_file:
+            for index, line in enumerate(requests_file):
+                request = json.loads(line)
+                custom_id = request['custom_id']
+                try:
+                    if callable(self.responses):
+                        content = self.responses(request['body'])
+                    else:
+                        content = self.responses[custom_id]
+                    response = {
+                        'status_code': 200,
+                        'request_id': f"req_local_{index}",
+                        'body': {
+                            'object': 'chat.completion',
+                            'model': request['body'].get('model'),
+                            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                                         'finish_reason': 'stop'}],
+                        },
+                    }
+                    error = None
+                except Exception as e:
+                    response = None
+                    error = {'code': 'local_error', 'message': str(e) or type(e).__name__}
+
+                results_file.write(json.dumps({
+                    'id': f"batch_req_local_{index}",
+                    'custom_id': custom_id,
+                    'response': response,
+                    'error': error,
+                }) + "\n")
+
+
+def wait_for_job(runner, job_id: str, poll_interval: float = 60.0, timeout: Optional[float] = None) -> Dict:
+    """Poll a job until it reaches a terminal status"""
+    start = time.time()
+    while True:
+        status = runner.poll(job_id)
+        if status['status'] in TERMINAL_STATUSES:
+            return status
+        if timeout is not None and time.time() - start > timeout:
+            raise TimeoutError(f"Batch job {job_id} still {status['status']} after {timeout:.0f}s")
+        print(f"🔄 Batch job {job_id}: {status['status']} "
+              f"({status.get('completed', 0)}/{status.get('total', 0)} done)")
+        time.sleep(poll_interval)
+
+
+def read_batch_results(results_path: str) -> Dict[str, Optional[str]]:
+    """Reply content by custom_id; None for requests that errored"""
+    contents: Dict[str, Optional[str]] = {}
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get('response') or {}
+            content = None
+            if response.get('status_code') == 200:
+                try:
+                    content = response['body']['choices'][0]['message']['content']
+                except (KeyError, IndexError, TypeError):
+                    content = None
+            contents[result['custom_id']] = content
+    return contents
+
+
+def collect_classifications(tickets_path: str, contents: Dict[str, Optional[str]], classifier,
+                            decided_by: str = 'model') -> Iterator[Dict]:
+    """
+    Yield each ticket with its 'classification' dict, as classify_multiple_tickets returns them.
+
+    Tickets whose request failed or is missing from the results get the keyword fallback.
+    decided_by labels the replies; only "model" replies go into the classification cache.
+    """
+    for custom_id, ticket in iter_custom_ids(iter_tickets(tickets_path)):
+        subject, description = ticket.get('subject', ''), ticket.get('description', '')
+        content = contents.get(custom_id)
+        if content is None:
+            classification = classifier._fallback_classification(
+                subject, description, reasoning='Batch request failed - using rule-based classification'
+            )
+        else:
+            classification = classifier._parse_response(subject, description, content, decided_by=decided_by)
+
+        result = dict(ticket)
+        result['classification'] = {
+            'topic_tags': classification.topic_tags,
+            'sentiment': classification.sentiment,
+            'priority': classification.priority,
+            'confidence': classification.confidence,
+            'reasoning': classification.reasoning,
+            'decided_by': classification.decided_by
+        }
+        yield result
+
+
+def run_batch_job(tickets_path: str, output_path: str, classifier, runner=None,
+                  work_dir: Optional[str] = None, poll_interval: float = 60.0,
+                  timeout: Optional[float] = None, decided_by: str = 'model') -> int:
+    """
+    Classify a ticket file through batch jobs and write the results as JSONL.
+
+    decided_by labels the runner's replies, e.g. "rules" for a LocalBatchRunner
+    answering from the keyword rules, which keeps them out of the cache.
+
+    Returns:
+        Number of tickets written
+    """
+    runner = runner or OpenAIBatchRunner()
+    work_dir = work_dir or os.path.dirname(os.path.abspath(output_path))
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+
+    batch_paths = write_batch_files(tickets_path, os.path.join(work_dir, f"{stem}.requests.jsonl"), classifier)
+    print(f"✅ Wrote {len(batch_paths)} batch request file(s)")
+
+    contents: Dict[str, Optional[str]] = {}
+    for part, batch_path in enumerate(batch_paths, 1):
+        job_id = runner.submit(batch_path)
+        print(f"🔄 Submitted {batch_path} as batch job {job_id}")
+        status = wait_for_job(runner, job_id, poll_interval, timeout)
+        if status['status'] != 'completed':
+            print(f"⚠️ Batch job {job_id} ended {status['status']}; its tickets use the keyword fallback")
+            continue
+
+        results_path = os.path.join(work_dir, f"{stem}.results.part{part}.jsonl")
+        runner.download(job_id, results_path)
+        contents.update(read_batch_results(results_path))
+
+    written = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for result in collect_classifications(tickets_path, contents, classifier, decided_by):
+            f.write(json.dumps(result, default=str) + "\n")
+            written += 1
+
+    print(f"✅ Wrote {written} classified tickets to {output_path}")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify a ticket file offline through the OpenAI Batch API")
+    parser.add_argument('tickets', help='Ticket file (.csv, .json array, or .jsonl)')
+    parser.add_argument('output', help='Classified tickets (.jsonl)')
+    parser.add_argument('--poll-interval', type=float, default=60.0)
+    parser.add_argument('--local', action='store_true',
+                        help='Answer requests with the keyword rules instead of submitting them')
+    args = parser.parse_args()
+
+    from dataclasses import asdict
+    from ticket_classifier import TicketClassifier
+    # The local runner never calls the API, so it does not need a real key
+    ticket_classifier = TicketClassifier(api_key=None if not args.local else os.getenv('OPENAI_API_KEY') or 'local')
+
+    batch_runner = None
+    if args.local:
+        def rule_based_reply(body: Dict) -> str:
+            prompt = body['messages'][-1]['content']
+            return json.dumps(asdict(ticket_classifier._fallback_classification(
+                prompt, '', reasoning='Local batch run - using rule-based classification'
+            )))
+        batch_runner = LocalBatchRunner(rule_based_reply)
+
+    run_batch_job(args.tickets, args.output, ticket_classifier, batch_runner, poll_interval=args.poll_interval,
+                  decided_by='rules' if args.local else 'model')
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the Atlan Customer Support AI Copilot
+
+Usage:
+    python benchmarks.py onnx [--tickets sample_tickets.csv]
+    python benchmarks.py rules [--tickets sample_tickets.csv]
+    python benchmarks.py padding [--tickets sample_tickets.csv] [--long-fraction 0.1]
+    python benchmarks.py cascade [--tickets sample_tickets.csv] [--thresholds 0.6 0.75 0.9] [--calibrate]
+    python benchmarks.py packing [--tickets sample_tickets.json] [--pack-sizes 1 5 10]
+    python benchmarks.py replay [--store llm_recordings.jsonl] [--error-rates 0 0.1 0.3] [--synthesize]
+    python benchmarks.py extract saved_pages/ [--repeat 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+
+def _latency_stats(latencies: List[float]) -> Dict[str, float]:
+    """Summarize per-call latencies in milliseconds"""
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p95_index = min(len(latencies_ms) - 1, int(round(0.95 * (len(latencies_ms) - 1))))
+    return {
+        'mean_ms': statistics.mean(latencies_ms),
+        'p50_ms': statistics.median(latencies_ms),
+        'p95_ms': latencies_ms[p95_index],
+    }
+
+
+def _time_calls(fn: Callable, inputs: List) -> tuple:
+    """Call fn on every input, returning (outputs, per-call latencies)"""
+    outputs, latencies = [], []
+    for item in inputs:
+        start = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append(time.perf_counter() - start)
+    return outputs, latencies
+
+
+def benchmark_onnx(args) -> int:
+    """Compare PyTorch fp32 and ONNX int8 classifier labels and latency"""
+    import onnx_backend
+    from classifier import AtlanTicketClassifier, load_sample_tickets
+
+    # The classifier falls back to PyTorch without ONNX Runtime, which would compare PyTorch with itself
+    if not onnx_backend.ONNX_AVAILABLE:
+        print("❌ ONNX backend unavailable: pip install \"optimum[onnxruntime]\"")
+        return 1
+
+    tickets_df = load_sample_tickets(args.tickets)
+    if tickets_df.empty:
+        return 1
+    texts = (tickets_df['subject'].astype(str) + ". " + tickets_df['description'].astype(str)).tolist()
+
+    results = {}
+    for backend in ("pytorch", "onnx"):
+        classifier = AtlanTicketClassifier(inference_backend=backend)
+        if backend == "onnx":
+            fallen_back = [name for name, model_pipeline in (("topic", classifier.zero_shot_pipeline),
+                                                             ("sentiment", classifier.sentiment_pipeline))
+                           if not type(getattr(model_pipeline, 'model', None)).__name__.startswith('ORTModel')]
+            if fallen_back:
+                print(f"❌ ONNX models failed to load for: {', '.join(fallen_back)} (see warnings above)")
+                return 1
+        classifier.classify_topic(texts[0])  # Warm-up
+        classifier.classify_sentiment(texts[0])
+
+        topics, topic_latencies = _time_calls(classifier.classify_topic, texts)
+        sentiments, sentiment_latencies = _time_calls(classifier.classify_sentiment, texts)
+        results[backend] = {
+            'topics': topics,
+            'sentiments': sentiments,
+            'topic_stats': _latency_stats(topic_latencies),
+            'sentiment_stats': _latency_stats(sentiment_latencies),
+        }
+
+    print(f"\n📊 ONNX int8 vs PyTorch fp32 on {len(texts)} tickets ({args.tickets})")
+    print("-" * 60)
+    for stage in ("topic", "sentiment"):
+        for backend in ("pytorch", "onnx"):
+            stats = results[backend][f'{stage}_stats']
+            print(f"{stage:>9} | {backend:<7} | mean {stats['mean_ms']:8.1f} ms | "
+                  f"p50 {stats['p50_ms']:8.1f} ms | p95 {stats['p95_ms']:8.1f} ms")
+        speedup = results['pytorch'][f'{stage}_stats']['mean_ms'] / results['onnx'][f'{stage}_stats']['mean_ms']
+        print(f"{stage:>9} | speedup {speedup:.2f}x")
+
+    topic_agreement = sum(
+        a == b for a, b in zip(results['pytorch']['topics'], results['onnx']['topics'])
+    ) / len(texts)
+    sentiment_agreement = sum(
+        a == b for a, b in zip(results['pytorch']['sentiments'], results['onnx']['sentiments'])
+    ) / len(texts)
+    print("-" * 60)
+    print(f"✅ Topic label parity:     {topic_agreement:.1%}")
+    print(f"✅ Sentiment label parity: {sentiment_agreement:.1%}")
+
+    return 0 if min(topic_agreement, sentiment_agreement) >= args.min_parity else 1
+
+
+_LOG_FILLER = "2024-01-15T10:30:00Z INFO worker-7 heartbeat ok, queue=0 latency_ms=12 retries=0"
+
+
+def _scan_rule_labels(groups: Dict, text: str) -> Dict[str, str]:
+    """Per-group if/elif keyword chains, as the rules were written before the engine"""
+    labels = {}
+    for name, rules in groups.items():
+        text_lower = text.lower()
+        labels[name] = next(
+            (label for label, keywords in rules if any(keyword in text_lower for keyword in keywords)),
+            None
+        )
+    return labels
+
+
+def _engine_rule_labels(engine, text: str) -> Dict[str, str]:
+    """All groups resolved from a single engine pass"""
+    matches = engine.match(text)
+    return {name: matches.first(name) for name in engine.groups}
+
+
+def benchmark_rules(args) -> int:
+    """Compare single-pass keyword matching against per-keyword scans"""
+    import pandas as pd
+    from classifier import CLASSIFIER_RULES
+    from ticket_classifier import FALLBACK_RULES
+
+    tickets_df = pd.read_csv(args.tickets)
+    base_texts = (tickets_df['subject'].astype(str) + ". " + tickets_df['description'].astype(str)).tolist()
+
+    print(f"\n📊 Keyword rules: single pass vs per-keyword scans ({args.repeat} runs)")
+    print("-" * 60)
+    mismatches = 0
+    for engine_name, engine in (("classifier", CLASSIFIER_RULES), ("ticket_classifier", FALLBACK_RULES)):
+        for filler_lines in (0, 20, 200, 2000):
+            # Long tickets: pasted log output ahead of the actual ticket text
+            texts = [" ".join([_LOG_FILLER] * filler_lines + [text]) for text in base_texts]
+            avg_chars = sum(len(text) for text in texts) / len(texts)
+
+            for text in texts:
+                if _scan_rule_labels(engine.groups, text) != _engine_rule_labels(engine, text):
+                    mismatches += 1
+
+            timings = {}
+            for method, fn in (("scan", lambda t: _scan_rule_labels(engine.groups, t)),
+                               ("engine", lambda t: _engine_rule_labels(engine, t))):
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    for text in texts:
+                        fn(text)
+                timings[method] = (time.perf_counter() - start) / (args.repeat * len(texts))
+
+            print(f"{engine_name:>17} | {avg_chars:8.0f} chars | scan {timings['scan'] * 1e6:8.1f} us | "
+                  f"engine {timings['engine'] * 1e6:8.1f} us | speedup {timings['scan'] / timings['engine']:.2f}x")
+
+    print("-" * 60)
+    print(f"{'✅' if mismatches == 0 else '❌'} Label mismatches: {mismatches}")
+    return 0 if mismatches == 0 else 1
+
+
+def _padded_tokens(lengths: List[int], batch_size: int) -> int:
+    """Tokens processed when each batch is padded to its longest member"""
+    return sum(
+        len(batch) * max(batch)
+        for batch in (lengths[i:i + batch_size] for i in range(0, len(lengths), batch_size))
+    )
+
+
+def benchmark_padding(args) -> int:
+    """Compare length-bucketed batches against input-order batches on mixed ticket lengths"""
+    import random
+    from classifier import AtlanTicketClassifier, load_sample_tickets
+
+    tickets_df = load_sample_tickets(args.tickets)
+    if tickets_df.empty:
+        return 1
+    base_texts = (tickets_df['subject'].astype(str) + ". " + tickets_df['description'].astype(str)).tolist()
+
+    # Mostly short tickets with a few very long ones (pasted logs, email threads)
+    rng = random.Random(0)
+    texts = []
+    for _ in range(args.tickets_count):
+        text = rng.choice(base_texts)
+        if rng.random() < args.long_fraction:
+            text = " ".join([text] + rng.choices(base_texts, k=60))
+        texts.append(text)
+
+    classifier = AtlanTicketClassifier(max_tokens=args.max_tokens)
+
+    print(f"\n📊 Length bucketing on {len(texts)} tickets "
+          f"({args.long_fraction:.0%} long, batch_size={args.batch_size})")
+    print("-" * 60)
+
+    for stage, model_pipeline, token_limit, run in (
+        ("sentiment", classifier.sentiment_pipeline, classifier._sentiment_token_limit,
+         classifier.classify_sentiments_batch),
+        ("topic", classifier.zero_shot_pipeline, classifier._topic_token_limit,
+         classifier.classify_topics_batch),
+    ):
+        if model_pipeline is None:
+            print(f"{stage:>9} | model not loaded, skipped")
+            continue
+
+        _, lengths = classifier._truncate_to_tokens(texts, model_pipeline, token_limit())
+        raw_lengths = [len(ids) for ids in model_pipeline.tokenizer(texts, add_special_tokens=False)['input_ids']]
+
+        timings, outputs = {}, {}
+        for bucketing in (False, True):
+            classifier.length_bucketing = bucketing
+            start = time.perf_counter()
+            outputs[bucketing] = run(texts, batch_size=args.batch_size)
+            timings[bucketing] = time.perf_counter() - start
+
+        # Input-order batches: sentiment was cut to 512 characters, topics were not cut at all
+        if stage == "sentiment":
+            unbucketed_lengths = [
+                len(ids) for ids in model_pipeline.tokenizer(
+                    [text[:512] for text in texts], add_special_tokens=False
+                )['input_ids']
+            ]
+        else:
+            unbucketed_lengths = raw_lengths
+        padded_before = _padded_tokens(unbucketed_lengths, args.batch_size)
+        padded_after = _padded_tokens(sorted(lengths), args.batch_size)
+        agreement = sum(a == b for a, b in zip(outputs[False], outputs[True])) / len(texts)
+
+        print(f"{stage:>9} | input order {timings[False]:7.2f}s ({padded_before:>8} padded tokens) | "
+              f"bucketed {timings[True]:7.2f}s ({padded_after:>8} padded tokens) | "
+              f"speedup {timings[False] / timings[True]:.2f}x | label agreement {agreement:.1%}")
+
+    return 0
+
+
+def benchmark_cascade(args) -> int:
+    """Report model calls avoided by the rules-first cascade and its agreement with the full-model path"""
+    from classifier import AtlanTicketClassifier, CLASSIFIER_RULES, load_sample_tickets
+
+    tickets_df = load_sample_tickets(args.tickets)
+    if tickets_df.empty:
+        return 1
+    texts = (tickets_df['subject'].astype(str) + ". " + tickets_df['description'].astype(str)).tolist()
+
+    classifier = AtlanTicketClassifier()
+    if not classifier.models_loaded:
+        print("❌ Both transformer models are needed for a full-model reference")
+        return 1
+
+    full_df = classifier.classify_multiple_tickets(tickets_df, batch_size=args.batch_size)
+    full_topics = [tags[0] for tags in full_df['topic_tags']]
+    full_sentiments = full_df['sentiment'].tolist()
+
+    if args.calibrate:
+        # Fitted and evaluated on the same tickets unless a separate set is given
+        calibration_df = load_sample_tickets(args.calibration_tickets) if args.calibration_tickets else None
+        if calibration_df is None:
+            reference_df, reference_texts = full_df, texts
+        else:
+            reference_df = classifier.classify_multiple_tickets(calibration_df, batch_size=args.batch_size)
+            reference_texts = (calibration_df['subject'].astype(str) + ". "
+                               + calibration_df['description'].astype(str)).tolist()
+        classifier.rule_calibration.fit(
+            [CLASSIFIER_RULES.match(text) for text in reference_texts],
+            {'topic': [tags[0] for tags in reference_df['topic_tags']],
+             'sentiment': reference_df['sentiment'].tolist()}
+        )
+        classifier.rule_calibration.save(args.calibration_path)
+        print(f"✅ Calibrated on {len(reference_texts)} tickets"
+              f"{' (in-sample)' if calibration_df is None else ''}, saved to {args.calibration_path}")
+
+    # Optional human labels: primary topic tag and sentiment per ticket
+    has_labels = {'topic_label', 'sentiment_label'} <= set(tickets_df.columns)
+
+    print(f"\n📊 Rules-first cascade on {len(texts)} tickets ({args.tickets})")
+    print("-" * 60)
+    if has_labels:
+        full_accuracy = sum(
+            topic == label_topic and sentiment == label_sentiment
+            for topic, sentiment, label_topic, label_sentiment in zip(
+                full_topics, full_sentiments, tickets_df['topic_label'], tickets_df['sentiment_label'])
+        ) / len(texts)
+        print(f"{'full':>9} | label accuracy {full_accuracy:.1%}")
+
+    for threshold in args.thresholds:
+        classifier.cascade_threshold = threshold
+        classifier.cascade_counts = {}
+        cascade_df = classifier.classify_multiple_tickets(tickets_df, batch_size=args.batch_size)
+        counts = classifier.cascade_counts
+
+        calls_avoided = (counts.get('topic:rules', 0) + counts.get('sentiment:rules', 0)) / (2 * len(texts))
+        topics = [tags[0] for tags in cascade_df['topic_tags']]
+        sentiments = cascade_df['sentiment'].tolist()
+        topic_agreement = sum(a == b for a, b in zip(topics, full_topics)) / len(texts)
+        sentiment_agreement = sum(a == b for a, b in zip(sentiments, full_sentiments)) / len(texts)
+
+        line = (f"{threshold:>9.2f} | model calls avoided {calls_avoided:6.1%} | "
+                f"topic agreement {topic_agreement:6.1%} | sentiment agreement {sentiment_agreement:6.1%}")
+        if has_labels:
+            accuracy = sum(
+                topic == label_topic and sentiment == label_sentiment
+                for topic, sentiment, label_topic, label_sentiment in zip(
+                    topics, sentiments, tickets_df['topic_label'], tickets_df['sentiment_label'])
+            ) / len(texts)
+            line += f" | label accuracy {accuracy:.1%}"
+        print(line)
+
+    return 0
+
+
+def benchmark_packing(args) -> int:
+    """Compare tokens per ticket and wall time of packed and one-ticket-per-call OpenAI classification"""
+    from ticket_classifier import TicketClassifier, load_sample_tickets
+
+    tickets = load_sample_tickets(args.tickets)
+    if not tickets:
+        return 1
+    tickets = (tickets * -(-args.tickets_count // len(tickets)))[:args.tickets_count]
+    tickets = [{**ticket, 'ticket_id': f"{ticket.get('ticket_id', 'ticket')}-{i}"} for i, ticket in enumerate(tickets)]
+
+    # No cache, so every run pays for its own requests
+    classifier = TicketClassifier()
+
+    print(f"\n📊 Packed vs single-ticket OpenAI classification on {len(tickets)} tickets ({classifier.model})")
+    print("-" * 60)
+    baseline = None
+    for pack_size in args.pack_sizes:
+        classifier.token_usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        start = time.perf_counter()
+        results = classifier.classify_multiple_tickets(tickets, concurrency=args.concurrency, pack_size=pack_size)
+        elapsed = time.perf_counter() - start
+
+        usage = classifier.token_usage
+        prompt_per_ticket = usage['prompt_tokens'] / len(tickets)
+        completion_per_ticket = usage['completion_tokens'] / len(tickets)
+        labels = [(tuple(r['classification']['topic_tags']), r['classification']['sentiment'],
+                   r['classification']['priority']) for r in results]
+        if baseline is None:
+            baseline = labels
+        agreement = sum(a == b for a, b in zip(labels, baseline)) / len(tickets)
+
+        print(f"pack {pack_size:>3} | {usage['requests']:>4} requests | {prompt_per_ticket:7.1f} prompt + "
+              f"{completion_per_ticket:6.1f} completion tokens/ticket | {elapsed:6.2f}s | "
+              f"agreement with pack {args.pack_sizes[0]}: {agreement:.1%}")
+
+    return 0
+
+
+def benchmark_replay(args) -> int:
+    """Throughput and fallback rate of bulk classification against replayed OpenAI traffic"""
+    import json
+    from dataclasses import asdict
+    from llm_backend import ReplayClient, RecordingStore
+    from openai_scheduler import OpenAIScheduler
+    from ticket_classifier import TicketClassifier, load_sample_tickets
+
+    tickets = load_sample_tickets(args.tickets)
+    if not tickets:
+        return 1
+    tickets = (tickets * -(-args.tickets_count // len(tickets)))[:args.tickets_count]
+    tickets = [{**ticket, 'ticket_id': f"{ticket.get('ticket_id', 'ticket')}-{i}"} for i, ticket in enumerate(tickets)]
+    store = RecordingStore(args.store)
+
+    print(f"\n📊 Replayed bulk classification of {len(tickets)} tickets ({len(store)} recordings, "
+          f"{args.latency_ms:.0f}±{args.jitter_ms:.0f}ms, concurrency {args.concurrency})")
+    print("-" * 60)
+    for error_rate in args.error_rates:
+        scheduler = OpenAIScheduler(deadline_seconds=args.deadline)
+        classifier = TicketClassifier(api_key='replay', scheduler=scheduler)
+        default_reply = None
+        if args.synthesize:
+            def default_reply(request, classifier=classifier):
+                prompt = request['messages'][-1]['content']
+                return json.dumps(asdict(classifier._fallback_classification(prompt, '', reasoning='synthesized')))
+        replay = ReplayClient(store, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                              error_rate=error_rate, timeout_rate=args.timeout_rate,
+                              default_reply=default_reply, is_async=True)
+        classifier._make_async_client = lambda: replay
+
+        start = time.perf_counter()
+        results = classifier.classify_multiple_tickets(tickets, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+
+        fallbacks = sum(r['classification']['decided_by'] == 'rules' for r in results)
+        scheduler_stats = scheduler.stats()
+        replay_stats = replay.stats()
+        print(f"429 rate {error_rate:4.0%} | {len(tickets) / elapsed:7.1f} tickets/s | "
+              f"{scheduler_stats['retries']:>4} retries | {fallbacks:>4} fallbacks ({fallbacks / len(tickets):.1%}) | "
+              f"{replay_stats['misses']} unrecorded")
+
+    return 0
+
+
+def benchmark_extract(args) -> int:
+    """Compare HTML extractor backends with the original BeautifulSoup extractor"""
+    from pathlib import Path
+    from html_extract import BACKENDS, extract, legacy_text
+
+    paths = sorted(path for path in Path(args.pages).rglob('*') if path.suffix.lower() in ('.html', '.htm'))
+    if not paths:
+        print(f"❌ No .html files under {args.pages} (save some pages, e.g. with curl, first)")
+        return 1
+    pages = [path.read_bytes() for path in paths]
+    total_mb = sum(len(page) for page in pages) / (1024 * 1024)
+
+    reference = [legacy_text(page) for page in pages]
+    candidates = [('legacy', legacy_text)] + [(name, lambda page, name=name: extract(page, name).text)
+                                              for name in sorted(BACKENDS)]
+
+    print(f"\n📊 HTML extraction: {len(pages)} pages, {total_mb:.1f} MB ({args.repeat} runs)")
+    print("-" * 60)
+    legacy_seconds = None
+    mismatched = 0
+    for name, fn in candidates:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            texts = [fn(page) for page in pages]
+        seconds = (time.perf_counter() - start) / args.repeat
+        legacy_seconds = legacy_seconds or seconds
+
+        # Equivalent when the same characters come out, ignoring whitespace
+        same = sum(''.join(text.split()) == ''.join(expected.split()) for text, expected in zip(texts, reference))
+        words = sum(len(text.split()) for text in texts)
+        if name != 'legacy':
+            mismatched += len(pages) - same
+        print(f"{name:>7} | {len(pages) / seconds:8.1f} pages/s | {total_mb / seconds:6.2f} MB/s | "
+              f"speedup {legacy_seconds / seconds:5.2f}x | same text {same}/{len(pages)} | {words} words")
+
+    print("-" * 60)
+    print(f"{'✅' if mismatched == 0 else '⚠️'} Pages whose text differs from the original extractor: {mismatched}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    onnx_parser = subparsers.add_parser('onnx', help='ONNX int8 vs PyTorch parity and latency')
+    onnx_parser.add_argument('--tickets', default='sample_tickets.csv')
+    onnx_parser.add_argument('--min-parity', type=float, default=0.9,
+                             help='Fail if label agreement drops below this fraction')
+    onnx_parser.set_defaults(func=benchmark_onnx)
+
+    rules_parser = subparsers.add_parser('rules', help='Single-pass keyword rules vs per-keyword scans')
+    rules_parser.add_argument('--tickets', default='sample_tickets.csv')
+    rules_parser.add_argument('--repeat', type=int, default=50)
+    rules_parser.set_defaults(func=benchmark_rules)
+
+    padding_parser = subparsers.add_parser('padding', help='Length-bucketed vs input-order transformer batches')
+    padding_parser.add_argument('--tickets', default='sample_tickets.csv')
+    padding_parser.add_argument('--tickets-count', type=int, default=200)
+    padding_parser.add_argument('--long-fraction', type=float, default=0.1)
+    padding_parser.add_argument('--batch-size', type=int, default=16)
+    padding_parser.add_argument('--max-tokens', type=int, default=512)
+    padding_parser.set_defaults(func=benchmark_padding)
+
+    cascade_parser = subparsers.add_parser('cascade', help='Rules-first cascade: model calls avoided and agreement')
+    cascade_parser.add_argument('--tickets', default='sample_tickets.csv',
+                                help='Optional topic_label and sentiment_label columns are scored too')
+    cascade_parser.add_argument('--thresholds', type=float, nargs='+', default=[0.6, 0.75, 0.9])
+    cascade_parser.add_argument('--batch-size', type=int, default=16)
+    cascade_parser.add_argument('--calibrate', action='store_true',
+                                help='Fit rule confidences to the full-model labels before the sweep')
+    cascade_parser.add_argument('--calibration-tickets', default=None,
+                                help='Separate tickets to calibrate on (default: --tickets)')
+    cascade_parser.add_argument('--calibration-path', default='cascade_calibration.json')
+    cascade_parser.set_defaults(func=benchmark_cascade)
+
+    packing_parser = subparsers.add_parser('packing', help='Tokens per ticket and wall time of packed OpenAI requests')
+    packing_parser.add_argument('--tickets', default='sample_tickets.json')
+    packing_parser.add_argument('--tickets-count', type=int, default=40)
+    packing_parser.add_argument('--pack-sizes', type=int, nargs='+', default=[1, 5, 10])
+    packing_parser.add_argument('--concurrency', type=int, default=4)
+    packing_parser.set_defaults(func=benchmark_packing)
+
+    replay_parser = subparsers.add_parser('replay', help='Bulk classification throughput and fallbacks on replayed traffic')
+    replay_parser.add_argument('--tickets', default='sample_tickets.json')
+    replay_parser.add_argument('--tickets-count', type=int, default=200)
+    replay_parser.add_argument('--store', default='llm_recordings.jsonl',
+                               help='Recordings made with LLM_BACKEND=record')
+    replay_parser.add_argument('--synthesize', action='store_true',
+                               help='Answer unrecorded requests with keyword-rule replies')
+    replay_parser.add_argument('--latency-ms', type=float, default=400)
+    replay_parser.add_argument('--jitter-ms', type=float, default=200)
+    replay_parser.add_argument('--error-rates', type=float, nargs='+', default=[0.0, 0.1, 0.3],
+                               help='Fractions of requests answered with a simulated 429')
+    replay_parser.add_argument('--timeout-rate', type=float, default=0.0)
+    replay_parser.add_argument('--concurrency', type=int, default=8)
+    replay_parser.add_argument('--deadline', type=float, default=10.0,
+                               help='Scheduler deadline per request before falling back (seconds)')
+    replay_parser.set_defaults(func=benchmark_replay)
+
+    extract_parser = subparsers.add_parser('extract', help='HTML-to-text throughput and equivalence per extractor')
+    extract_parser.add_argument('pages', help='Directory of saved .html pages')
+    extract_parser.add_argument('--repeat', type=int, default=5)
+    extract_parser.set_defaults(func=benchmark_extract)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from keyword_rules import RuleMatches
+
+# Stages the rule engine can decide on its own; priority is always rule-based
+CASCADE_STAGES = ('topic', 'sentiment')
+
+# Rule answer when no keyword of the stage matched
+RULE_DEFAULTS = {'topic': 'Product', 'sentiment': 'Neutral'}
+
+DEFAULT_CALIBRATION_PATH = os.getenv('CASCADE_CALIBRATION_PATH', 'cascade_calibration.json')
+
+
+def rule_bucket(stage: str, matches: RuleMatches) -> Tuple[str, str]:
+    """
+    Return the rule label for a stage and the calibration bucket it falls in.
+
+    Buckets group tickets by the winning label, how many of its keywords hit
+    and whether any other label of the stage also hit.
+    """
+    counts = matches.hit_counts(stage)
+    label = matches.first(stage, RULE_DEFAULTS[stage])
+    hits = counts.get(label, 0)
+    rivals = sum(1 for other, count in counts.items() if other != label and count)
+
+    strength = 'none' if hits == 0 else ('single' if hits == 1 else 'multi')
+    contested = 'contested' if rivals else 'clear'
+    return label, f"{stage}|{label}|{strength}|{contested}"
+
+
+def _prior_confidence(bucket: str) -> float:
+    """Uncalibrated guess used until a bucket has observations"""
+    _, _, strength, contested = bucket.split('|')
+    confidence = {'none': 0.2, 'single': 0.6, 'multi': 0.8}[strength]
+    return confidence - 0.2 if contested == 'contested' else confidence
+
+
+class RuleCalibration:
+    """
+    Calibrated confidence for keyword rule decisions.
+
+    Each bucket stores how often the rule label agreed with a reference label
+    (the full-model path or human labels). Confidence is that agreement rate,
+    smoothed toward a prior so sparsely observed buckets stay conservative.
+    """
+
+    def __init__(self, table: Optional[Dict[str, List[int]]] = None, prior_weight: float = 4.0):
+        self.table: Dict[str, List[int]] = {bucket: list(counts) for bucket, counts in (table or {}).items()}
+        self.prior_weight = prior_weight
+
+    @property
+    def version(self) -> str:
+        """Short hash of the table, for cache keys"""
+        payload = json.dumps([self.table, self.prior_weight], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:8]
+
+    def confidence(self, bucket: str) -> float:
+        """Smoothed agreement rate of a bucket"""
+        agreements, observations = self.table.get(bucket, (0, 0))
+        return (agreements + self.prior_weight * _prior_confidence(bucket)) / (observations + self.prior_weight)
+
+    def decide(self, stage: str, matches: RuleMatches) -> Tuple[str, float]:
+        """Rule label for a stage and its calibrated confidence"""
+        label, bucket = rule_bucket(stage, matches)
+        return label, self.confidence(bucket)
+
+    def fit(self, matches_list: Sequence[RuleMatches], reference: Dict[str, Sequence[str]]) -> 'RuleCalibration':
+        """
+        Rebuild the table from reference labels.
+
+        Args:
+            matches_list: Rule matches for each ticket
+            reference: Per stage, the reference label of each ticket (for topics,
+                the primary topic tag)
+        """
+        self.table = {}
+        for stage, labels in reference.items():
+            for matches, reference_label in zip(matches_list, labels):
+                label, bucket = rule_bucket(stage, matches)
+                counts = self.table.setdefault(bucket, [0, 0])
+                counts[0] += int(label == reference_label)
+                counts[1] += 1
+        return self
+
+    def save(self, path: str = DEFAULT_CALIBRATION_PATH):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'prior_weight': self.prior_weight, 'table': self.table}, f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CALIBRATION_PATH) -> 'RuleCalibration':
+        """Load a saved table, or start from the priors if there is none"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('table'), data.get('prior_weight', 4.0))
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.getenv('CLASSIFICATION_CACHE_PATH', '.classification_cache.sqlite')
+
+# Fields of TicketClassification stored per entry
+CACHED_FIELDS = ('topic_tags', 'sentiment', 'priority', 'confidence', 'reasoning')
+
+
+def _normalize(text: str) -> str:
+    """Normalize unicode and whitespace so trivially different copies share a key"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class ClassificationCache:
+    """
+    Persistent SQLite cache of ticket classifications.
+
+    Entries are keyed by a hash of the normalized subject and description plus
+    a backend id (model name and prompt/config version), so changing the model
+    or prompt never serves stale classifications. The least recently used
+    entries are evicted once max_entries is exceeded; the entry count is
+    tracked in memory, so inserts only count rows when it reaches the limit.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 50000, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS classifications (
+                key TEXT PRIMARY KEY,
+                backend_id TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_classifications_last_access ON classifications (last_access)"
+        )
+        self._conn.commit()
+        self.entries = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+
+    @staticmethod
+    def make_key(subject: str, description: str, backend_id: str) -> str:
+        """Content hash identifying a ticket for a given backend"""
+        payload = "\x1f".join((backend_id, _normalize(subject), _normalize(description)))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, subject: str, description: str, backend_id: str) -> Optional[Dict[str, Any]]:
+        """Return cached classification fields, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(subject, description, backend_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM classifications WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE classifications SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+
+        return json.loads(row[0])
+
+    def put(self, subject: str, description: str, backend_id: str, fields: Dict[str, Any]):
+        """Store classification fields, evicting least recently used entries if full"""
+        if not self.enabled:
+            return
+
+        key = self.make_key(subject, description, backend_id)
+        value = json.dumps({name: fields[name] for name in CACHED_FIELDS})
+        now = time.time()
+
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM classifications WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications (key, backend_id, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, backend_id, value, now, now)
+            )
+            if exists is None:
+                self.entries += 1
+            if self.entries > self.max_entries:
+                # Recount first: other processes may share the file
+                self.entries = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+                if self.entries > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM classifications WHERE key IN ("
+                        "SELECT key FROM classifications ORDER BY last_access ASC LIMIT ?)",
+                        (self.entries - self.max_entries,)
+                    )
+                    self.entries = self.max_entries
+            self._conn.commit()
+
+    def invalidate(self, backend_id: Optional[str] = None) -> int:
+        """Delete entries for one backend id, or everything; returns rows removed"""
+        with self._lock:
+            if backend_id is None:
+                cursor = self._conn.execute("DELETE FROM classifications")
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM classifications WHERE backend_id = ?", (backend_id,)
+                )
+            self._conn.commit()
+            self.entries = max(0, self.entries - cursor.rowcount)
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and current size"""
+        with self._lock:
+            entries = self.entries = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'enabled': self.enabled,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[ClassificationCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ClassificationCache:
+    """Process-wide cache at CLASSIFICATION_CACHE_PATH, disabled if CLASSIFICATION_CACHE=off"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ClassificationCache(
+                enabled=os.getenv('CLASSIFICATION_CACHE', 'on').lower() != 'off'
+            )
+        return _default_cache
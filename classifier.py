@@ -1,12 +1,20 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, asdict
 import re
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from sentence_transformers import SentenceTransformer
+from model_registry import get_sentence_encoder
 import warnings
+from keyword_rules import KeywordRuleEngine, RuleMatches
+from classification_cache import ClassificationCache
+from cascade import CASCADE_STAGES, RuleCalibration
 warnings.filterwarnings("ignore")
 
 @dataclass
@@ -16,32 +24,124 @@ class TicketClassification:
     priority: str
     confidence: float
     reasoning: str
+    decided_by: str = "model"  # "rules" (also any model failure), "model", "mixed" (per stage) or "cache"
+
+# Keyword rules for priority and the rule-based fallbacks, in precedence order
+CLASSIFIER_RULES = KeywordRuleEngine({
+    'topic': [
+        ('Connector', ['connect', 'connection', 'connector', 'snowflake', 'databricks', 'power bi']),
+        ('API/SDK', ['api', 'sdk', 'python', 'java', 'endpoint']),
+        ('SSO', ['sso', 'authentication', 'login', 'okta', 'saml']),
+        ('Lineage', ['lineage', 'dependency', 'upstream', 'downstream']),
+        ('Glossary', ['glossary', 'term', 'definition']),
+        ('Sensitive data', ['sensitive', 'pii', 'gdpr', 'privacy', 'compliance']),
+        ('How-to', ['how to', 'how do', 'tutorial', 'guide', 'steps']),
+        ('Best practices', ['best practice', 'recommendation', 'optimize']),
+    ],
+    'sentiment': [
+        ('Angry', ['angry', 'furious', 'outraged', 'ridiculous']),
+        ('Frustrated', ['frustrated', 'annoyed', 'disappointed']),
+        ('Urgent', ['urgent', 'asap', 'immediately', 'critical']),
+        ('Curious', ['curious', 'wondering', 'interested', 'question']),
+    ],
+    'priority': [
+        # P0 (High) - Critical/urgent keywords
+        ('P0 (High)', [
+            'urgent', 'asap', 'immediately', 'critical', 'broken', 'down',
+            'emergency', 'blocking', 'can\'t work', 'stopped working',
+            'demo tomorrow', 'executive team', 'compliance'
+        ]),
+        # P1 (Medium) - Important issues
+        ('P1 (Medium)', [
+            'issue', 'problem', 'error', 'not working', 'failed', 'failing',
+            'incorrect', 'missing', 'unable', 'can\'t', 'doesn\'t work'
+        ]),
+    ],
+})
 
 class AtlanTicketClassifier:
-    def __init__(self):
-        """Initialize classifier with specified models"""
+    # classify_multiple_tickets takes and returns DataFrames (see ticket_stream)
+    input_format = "dataframe"
+
+    def __init__(self, topic_backend: str = "zero-shot", inference_backend: str = "pytorch",
+                 max_tokens: int = 512, length_bucketing: bool = True,
+                 cache: Optional[ClassificationCache] = None,
+                 cascade_threshold: Optional[float] = None,
+                 cascade_calibration: Optional[RuleCalibration] = None):
+        """Initialize classifier with specified models
+        
+        Args:
+            topic_backend: "zero-shot" runs facebook/bart-large-mnli against every
+                topic label; "embedding" embeds each ticket once with
+                all-MiniLM-L6-v2 and scores it against precomputed label embeddings
+            inference_backend: "pytorch" runs the sentiment and zero-shot models
+                eagerly in fp32; "onnx" serves int8-quantized ONNX Runtime exports
+            max_tokens: Ticket length cap, in tokens of each model's own tokenizer
+            length_bucketing: Truncate by tokens and batch tickets of similar token
+                length together, so one long ticket does not pad a whole batch
+            cache: Persistent classification cache checked before running models
+            cascade_threshold: If set, the keyword rules decide topic and sentiment
+                on their own whenever their calibrated confidence reaches this
+                value, and only the remaining tickets go to the models
+            cascade_calibration: Rule confidence table; defaults to the one saved
+                at CASCADE_CALIBRATION_PATH, or uncalibrated priors
+        """
+        if topic_backend not in ("zero-shot", "embedding"):
+            raise ValueError(f"Unknown topic backend: {topic_backend}")
+        if inference_backend not in ("pytorch", "onnx"):
+            raise ValueError(f"Unknown inference backend: {inference_backend}")
+        self.topic_backend = topic_backend
+        self.inference_backend = inference_backend
+        self.max_tokens = max_tokens
+        self.length_bucketing = length_bucketing
+        self.cache = cache
+        self.cascade_threshold = cascade_threshold
+        self.rule_calibration = cascade_calibration or RuleCalibration.load()
+        # Tickets per "stage:decider", e.g. "topic:rules" for a skipped zero-shot call.
+        # The classifier is shared across sessions (see model_registry), so updates are locked
+        self.cascade_counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+        
+        # Kept so worker processes can build an identical classifier
+        self._init_kwargs = {
+            'topic_backend': topic_backend,
+            'inference_backend': inference_backend,
+            'max_tokens': max_tokens,
+            'length_bucketing': length_bucketing,
+            'cascade_threshold': cascade_threshold,
+            'cascade_calibration': self.rule_calibration,
+        }
+        
         print("🔄 Loading classification models...")
         
         # Initialize sentiment analysis model (cardiffnlp/twitter-roberta-base-sentiment)
         try:
-            self.sentiment_pipeline = pipeline(
+            self.sentiment_pipeline = self._load_pipeline(
                 "sentiment-analysis",
-                model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-                tokenizer="cardiffnlp/twitter-roberta-base-sentiment-latest"
+                "cardiffnlp/twitter-roberta-base-sentiment-latest"
             )
         except Exception as e:
             print(f"⚠️ Sentiment model loading failed, using fallback: {e}")
             self.sentiment_pipeline = None
         
         # Initialize zero-shot classification model for topics
-        try:
-            self.zero_shot_pipeline = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli"
-            )
-        except Exception as e:
-            print(f"⚠️ Zero-shot model loading failed, using fallback: {e}")
-            self.zero_shot_pipeline = None
+        self.zero_shot_pipeline = None
+        if topic_backend == "zero-shot":
+            try:
+                self.zero_shot_pipeline = self._load_pipeline(
+                    "zero-shot-classification",
+                    "facebook/bart-large-mnli"
+                )
+            except Exception as e:
+                print(f"⚠️ Zero-shot model loading failed, using fallback: {e}")
+        
+        # Initialize sentence embedder for the fast topic backend
+        self.topic_embedder = None
+        if topic_backend == "embedding":
+            try:
+                self.topic_embedder = get_sentence_encoder('all-MiniLM-L6-v2')
+            except Exception as e:
+                print(f"⚠️ Embedding model loading failed, using fallback: {e}")
         
         # Topic labels for zero-shot classification
         self.topic_labels = [
@@ -69,165 +169,586 @@ class AtlanTicketClassifier:
             "Sensitive data classification and compliance": "Sensitive data"
         }
         
+        # Label embeddings are computed once so each ticket costs one encode and one matmul.
+        # Softmax temperature turns cosine similarities into a distribution over labels,
+        # so the zero-shot threshold and max-2-tags rule apply unchanged.
+        self.embedding_temperature = 0.05
+        self.label_embeddings = None
+        if self.topic_embedder is not None:
+            try:
+                self.label_embeddings = self.topic_embedder.encode(
+                    self.topic_labels, normalize_embeddings=True
+                )
+            except Exception as e:
+                print(f"⚠️ Label embedding failed, using fallback: {e}")
+                self.topic_embedder = None
+        
         print("✅ Models loaded successfully!")
     
-    def classify_topic(self, text: str) -> List[str]:
-        """Classify topic using zero-shot classification"""
+    def _load_pipeline(self, task: str, model_id: str):
+        """Load a Hugging Face pipeline on the selected inference backend"""
+        if self.inference_backend == "onnx":
+            try:
+                from onnx_backend import load_onnx_pipeline
+                return load_onnx_pipeline(task, model_id)
+            except Exception as e:
+                print(f"⚠️ ONNX backend unavailable for {model_id}, using PyTorch: {e}")
+        
+        return pipeline(task, model=model_id, tokenizer=model_id)
+    
+    @property
+    def backend_id(self) -> str:
+        """Identifies models and settings for classification cache keys"""
+        topic_model = "all-MiniLM-L6-v2" if self.topic_backend == "embedding" else "bart-large-mnli"
+        backend_id = (f"hf:{topic_model}:twitter-roberta-base-sentiment-latest:{self.inference_backend}:"
+                      f"{self.max_tokens}:{int(self.length_bucketing)}")
+        if self.cascade_threshold is not None:
+            backend_id += f":cascade{self.cascade_threshold}:{self.rule_calibration.version}"
+        return backend_id
+    
+    @property
+    def models_loaded(self) -> bool:
+        """Whether both transformer stages run on models rather than keyword fallbacks"""
+        return bool(self.sentiment_pipeline) and self.topic_model_loaded
+    
+    @property
+    def topic_model_loaded(self) -> bool:
+        """Whether the selected topic backend has a working model"""
+        if self.topic_backend == "embedding":
+            return self.label_embeddings is not None
+        return self.zero_shot_pipeline is not None
+    
+    def classify_topic(self, text: str, matches: Optional[RuleMatches] = None) -> List[str]:
+        """Classify topic using the selected topic backend"""
+        topics = self._model_topic(text)
+        return topics if topics is not None else self._fallback_topic_classification(text, matches)
+    
+    def _model_topic(self, text: str) -> Optional[List[str]]:
+        """Topic of one text from the model, or None if it is unavailable or failed"""
+        if self.topic_backend == "embedding":
+            topics = self._model_topics([text])
+            return topics[0] if topics is not None else None
+        
         if self.zero_shot_pipeline is None:
-            return self._fallback_topic_classification(text)
+            return None
         
         try:
+            if self.length_bucketing:
+                text = self._truncate_to_tokens([text], self.zero_shot_pipeline, self._topic_token_limit())[0][0]
             result = self.zero_shot_pipeline(text, self.topic_labels)
+            return self._select_topics(result['labels'], result['scores'])
             
-            # Get top predictions with confidence > 0.3
-            topics = []
-            for label, score in zip(result['labels'], result['scores']):
-                if score > 0.3:  # Confidence threshold
-                    topics.append(self.topic_mapping.get(label, label))
-                if len(topics) >= 2:  # Max 2 topics
-                    break
+        except Exception as e:
+            print(f"⚠️ Topic classification failed: {e}")
+            return None
+    
+    def classify_topics_batch(self, texts: List[str], batch_size: int = 16) -> List[List[str]]:
+        """Classify topics for a list of texts in batched model passes"""
+        topics = self._model_topics(texts, batch_size)
+        return topics if topics is not None else [self._fallback_topic_classification(text) for text in texts]
+    
+    def _model_topics(self, texts: List[str], batch_size: int = 16) -> Optional[List[List[str]]]:
+        """Topics of texts from the model, or None if it is unavailable or failed"""
+        if self.topic_backend == "embedding":
+            return self._classify_topics_embedding(texts, batch_size)
+        
+        if self.zero_shot_pipeline is None:
+            return None
+        
+        try:
+            run = lambda batch: self.zero_shot_pipeline(batch, self.topic_labels, batch_size=batch_size)
+            if self.length_bucketing:
+                results = self._run_length_bucketed(
+                    texts, self.zero_shot_pipeline, self._topic_token_limit(), run
+                )[0]
+            else:
+                results = run(texts)
+            if isinstance(results, dict):  # Single input returns a dict, not a list
+                results = [results]
+            return [self._select_topics(result['labels'], result['scores']) for result in results]
             
-            return topics if topics else ["Product"]  # Default fallback
+        except Exception as e:
+            print(f"⚠️ Batched topic classification failed: {e}")
+            return None
+    
+    def _classify_topics_embedding(self, texts: List[str], batch_size: int = 16) -> Optional[List[List[str]]]:
+        """Score texts against precomputed label embeddings with one similarity matmul"""
+        if self.label_embeddings is None:
+            return None
+        
+        try:
+            text_embeddings = self.topic_embedder.encode(
+                texts, batch_size=batch_size, normalize_embeddings=True
+            )
+            similarities = np.asarray(text_embeddings) @ np.asarray(self.label_embeddings).T
+            
+            logits = similarities / self.embedding_temperature
+            logits -= logits.max(axis=1, keepdims=True)
+            scores = np.exp(logits)
+            scores /= scores.sum(axis=1, keepdims=True)
+            
+            topics = []
+            for row in scores:
+                ranked = np.argsort(row)[::-1]
+                topics.append(self._select_topics(
+                    [self.topic_labels[i] for i in ranked],
+                    [float(row[i]) for i in ranked]
+                ))
+            return topics
             
         except Exception as e:
-            print(f"⚠️ Topic classification failed: {e}")
-            return self._fallback_topic_classification(text)
+            print(f"⚠️ Embedding topic classification failed: {e}")
+            return None
     
-    def classify_sentiment(self, text: str) -> str:
+    def _select_topics(self, labels: List[str], scores: List[float]) -> List[str]:
+        """Map ranked label scores to at most two topic tags above the threshold"""
+        topics = []
+        for label, score in zip(labels, scores):
+            if score > 0.3:  # Confidence threshold
+                topics.append(self.topic_mapping.get(label, label))
+            if len(topics) >= 2:  # Max 2 topics
+                break
+        
+        return topics if topics else ["Product"]  # Default fallback
+    
+    def classify_sentiment(self, text: str, matches: Optional[RuleMatches] = None) -> str:
         """Classify sentiment using CardiffNLP Twitter RoBERTa model"""
+        sentiment = self._model_sentiment(text)
+        return sentiment if sentiment is not None else self._fallback_sentiment_classification(text, matches)
+    
+    def _model_sentiment(self, text: str) -> Optional[str]:
+        """Sentiment of one text from the model, or None if it is unavailable or failed"""
         if self.sentiment_pipeline is None:
-            return self._fallback_sentiment_classification(text)
+            return None
         
         try:
             # Truncate text if too long
-            text = text[:512] if len(text) > 512 else text
-            result = self.sentiment_pipeline(text)[0]
-            
-            # Map model output to our sentiment labels
-            label_mapping = {
-                'LABEL_0': 'Negative',
-                'LABEL_1': 'Neutral', 
-                'LABEL_2': 'Positive',
-                'negative': 'Negative',
-                'neutral': 'Neutral',
-                'positive': 'Positive'
-            }
-            
-            sentiment_label = label_mapping.get(result['label'].lower(), result['label'])
-            
-            # Further classify negative sentiments
-            if sentiment_label == 'Negative':
-                text_lower = text.lower()
-                if any(word in text_lower for word in ['angry', 'furious', 'outraged', 'ridiculous']):
-                    return 'Angry'
-                elif any(word in text_lower for word in ['frustrated', 'disappointing', 'annoyed']):
-                    return 'Frustrated'
-                else:
-                    return 'Frustrated'  # Default negative sentiment
-            elif sentiment_label == 'Positive':
-                if any(word in text_lower for word in ['curious', 'interested', 'wondering', 'question']):
-                    return 'Curious'
-                else:
-                    return 'Curious'
+            if self.length_bucketing:
+                text = self._truncate_to_tokens([text], self.sentiment_pipeline, self._sentiment_token_limit())[0][0]
             else:
-                return 'Neutral'
+                text = text[:512] if len(text) > 512 else text
+            result = self.sentiment_pipeline(text)[0]
+            return self._map_sentiment_label(result['label'], text)
                 
         except Exception as e:
             print(f"⚠️ Sentiment classification failed: {e}")
-            return self._fallback_sentiment_classification(text)
+            return None
     
-    def classify_priority(self, text: str) -> str:
-        """Rule-based priority classification"""
-        text_lower = text.lower()
+    def classify_sentiments_batch(self, texts: List[str], batch_size: int = 16) -> List[str]:
+        """Classify sentiment for a list of texts in batched model passes"""
+        sentiments = self._model_sentiments(texts, batch_size)
+        return sentiments if sentiments is not None else [self._fallback_sentiment_classification(text) for text in texts]
+    
+    def _model_sentiments(self, texts: List[str], batch_size: int = 16) -> Optional[List[str]]:
+        """Sentiments of texts from the model, or None if it is unavailable or failed"""
+        if self.sentiment_pipeline is None:
+            return None
         
-        # P0 (High) - Critical/urgent keywords
-        p0_keywords = [
-            'urgent', 'asap', 'immediately', 'critical', 'broken', 'down', 
-            'emergency', 'blocking', 'can\'t work', 'stopped working',
-            'demo tomorrow', 'executive team', 'compliance'
-        ]
+        run = lambda batch: self.sentiment_pipeline(batch, batch_size=batch_size)
+        try:
+            if self.length_bucketing:
+                results, texts = self._run_length_bucketed(
+                    texts, self.sentiment_pipeline, self._sentiment_token_limit(), run
+                )
+            else:
+                texts = [text[:512] if len(text) > 512 else text for text in texts]
+                results = run(texts)
+            return [self._map_sentiment_label(result['label'], text) for result, text in zip(results, texts)]
+            
+        except Exception as e:
+            print(f"⚠️ Batched sentiment classification failed: {e}")
+            return None
+    
+    def _sentiment_token_limit(self) -> int:
+        """Token cap for the sentiment model, leaving room for special tokens"""
+        model_max = getattr(self.sentiment_pipeline.tokenizer, 'model_max_length', self.max_tokens)
+        return min(self.max_tokens, model_max - 2)
+    
+    def _topic_token_limit(self) -> int:
+        """Token cap for the zero-shot model, leaving room for the label hypothesis"""
+        model_max = getattr(self.zero_shot_pipeline.tokenizer, 'model_max_length', self.max_tokens)
+        return min(self.max_tokens, model_max - 32)
+    
+    def _truncate_to_tokens(self, texts: List[str], model_pipeline, max_tokens: int) -> Tuple[List[str], List[int]]:
+        """Cut texts to max_tokens of the pipeline's tokenizer, returning texts and token lengths"""
+        tokenizer = model_pipeline.tokenizer
+        input_ids = tokenizer(texts, add_special_tokens=False, truncation=False)['input_ids']
         
-        # P1 (Medium) - Important issues
-        p1_keywords = [
-            'issue', 'problem', 'error', 'not working', 'failed', 'failing',
-            'incorrect', 'missing', 'unable', 'can\'t', 'doesn\'t work'
-        ]
+        truncated, lengths = [], []
+        for text, ids in zip(texts, input_ids):
+            if len(ids) > max_tokens:
+                text = tokenizer.decode(ids[:max_tokens], skip_special_tokens=True)
+            truncated.append(text)
+            lengths.append(min(len(ids), max_tokens))
         
-        # Check for P0 indicators
-        if any(keyword in text_lower for keyword in p0_keywords):
-            return 'P0 (High)'
+        return truncated, lengths
+    
+    def _run_length_bucketed(self, texts: List[str], model_pipeline, max_tokens: int, run) -> Tuple[List, List[str]]:
+        """
+        Run a pipeline over texts sorted by token length and restore input order.
         
-        # Check for P1 indicators  
-        elif any(keyword in text_lower for keyword in p1_keywords):
-            return 'P1 (Medium)'
+        Consecutive batches then hold tickets of similar length, so the pipeline's
+        pad-to-longest collation only pads each batch to its own longest member.
         
-        # Default to P2 for questions, how-to, etc.
-        else:
-            return 'P2 (Low)'
+        Returns:
+            Tuple of (results, truncated texts), both in the original order
+        """
+        truncated, lengths = self._truncate_to_tokens(texts, model_pipeline, max_tokens)
+        order = sorted(range(len(truncated)), key=lambda i: lengths[i])
+        
+        sorted_results = run([truncated[i] for i in order])
+        if isinstance(sorted_results, dict):
+            sorted_results = [sorted_results]
+        
+        results = [None] * len(truncated)
+        for position, original_index in enumerate(order):
+            results[original_index] = sorted_results[position]
+        
+        return results, truncated
     
-    def _fallback_topic_classification(self, text: str) -> List[str]:
-        """Fallback rule-based topic classification"""
+    def _map_sentiment_label(self, label: str, text: str) -> str:
+        """Map a raw sentiment model label to our sentiment labels"""
+        label_mapping = {
+            'LABEL_0': 'Negative',
+            'LABEL_1': 'Neutral', 
+            'LABEL_2': 'Positive',
+            'negative': 'Negative',
+            'neutral': 'Neutral',
+            'positive': 'Positive'
+        }
+        
+        sentiment_label = label_mapping.get(label.lower(), label)
         text_lower = text.lower()
         
-        if any(word in text_lower for word in ['connect', 'connection', 'connector', 'snowflake', 'databricks', 'power bi']):
-            return ['Connector']
-        elif any(word in text_lower for word in ['api', 'sdk', 'python', 'java', 'endpoint']):
-            return ['API/SDK']
-        elif any(word in text_lower for word in ['sso', 'authentication', 'login', 'okta', 'saml']):
-            return ['SSO']
-        elif any(word in text_lower for word in ['lineage', 'dependency', 'upstream', 'downstream']):
-            return ['Lineage']
-        elif any(word in text_lower for word in ['glossary', 'term', 'definition']):
-            return ['Glossary']
-        elif any(word in text_lower for word in ['sensitive', 'pii', 'gdpr', 'privacy', 'compliance']):
-            return ['Sensitive data']
-        elif any(word in text_lower for word in ['how to', 'how do', 'tutorial', 'guide', 'steps']):
-            return ['How-to']
-        elif any(word in text_lower for word in ['best practice', 'recommendation', 'optimize']):
-            return ['Best practices']
+        # Further classify negative sentiments
+        if sentiment_label == 'Negative':
+            if any(word in text_lower for word in ['angry', 'furious', 'outraged', 'ridiculous']):
+                return 'Angry'
+            elif any(word in text_lower for word in ['frustrated', 'disappointing', 'annoyed']):
+                return 'Frustrated'
+            else:
+                return 'Frustrated'  # Default negative sentiment
+        elif sentiment_label == 'Positive':
+            if any(word in text_lower for word in ['curious', 'interested', 'wondering', 'question']):
+                return 'Curious'
+            else:
+                return 'Curious'
         else:
-            return ['Product']
+            return 'Neutral'
+    
+    def classify_priority(self, text: str, matches: Optional[RuleMatches] = None) -> str:
+        """Rule-based priority classification"""
+        matches = matches or CLASSIFIER_RULES.match(text)
+        
+        # P0 for critical/urgent keywords, then P1 for important issues,
+        # default to P2 for questions, how-to, etc.
+        return matches.first('priority', 'P2 (Low)')
+    
+    def _fallback_topic_classification(self, text: str, matches: Optional[RuleMatches] = None) -> List[str]:
+        """Fallback rule-based topic classification"""
+        matches = matches or CLASSIFIER_RULES.match(text)
+        return [matches.first('topic', 'Product')]
     
-    def _fallback_sentiment_classification(self, text: str) -> str:
+    def _fallback_sentiment_classification(self, text: str, matches: Optional[RuleMatches] = None) -> str:
         """Fallback rule-based sentiment classification"""
-        text_lower = text.lower()
+        matches = matches or CLASSIFIER_RULES.match(text)
+        return matches.first('sentiment', 'Neutral')
+    
+    def _rule_decisions(self, matches: RuleMatches) -> Dict[str, Optional[Tuple[str, float]]]:
+        """Per cascade stage, the rule label and confidence if decisive enough to skip the model"""
+        decisions = {}
+        for stage in CASCADE_STAGES:
+            decisions[stage] = None
+            if self.cascade_threshold is not None:
+                label, confidence = self.rule_calibration.decide(stage, matches)
+                if confidence >= self.cascade_threshold:
+                    decisions[stage] = (label, confidence)
+        return decisions
+    
+    def _resolve_stages(self, decisions: Dict[str, Optional[Tuple[str, float]]],
+                        fell_back: Set[str]) -> Tuple[float, str]:
+        """
+        Overall confidence and deciding stage, counting model calls avoided.
         
-        if any(word in text_lower for word in ['angry', 'furious', 'outraged', 'ridiculous']):
-            return 'Angry'
-        elif any(word in text_lower for word in ['frustrated', 'annoyed', 'disappointed']):
-            return 'Frustrated'
-        elif any(word in text_lower for word in ['urgent', 'asap', 'immediately', 'critical']):
-            return 'Urgent'
-        elif any(word in text_lower for word in ['curious', 'wondering', 'interested', 'question']):
-            return 'Curious'
-        else:
-            return 'Neutral'
+        fell_back holds the stages whose model was unavailable or failed, so
+        keyword rules answered instead. Such a ticket is decided by "rules"
+        (and so never cached), whatever the other stage used.
+        """
+        confidences, deciders = [], set()
+        
+        for stage in CASCADE_STAGES:
+            if decisions[stage] is not None:
+                decider, confidence = 'rules', decisions[stage][1]
+            elif stage in fell_back:
+                decider, confidence = 'rules', 0.7  # Keyword fallback for the model
+            else:
+                decider, confidence = 'model', 0.9
+            self._count_stages({f"{stage}:{decider}": 1})
+            confidences.append(confidence)
+            deciders.add(decider)
+        
+        if fell_back:
+            return min(confidences), 'rules'
+        return min(confidences), deciders.pop() if len(deciders) == 1 else 'mixed'
     
-    def classify_ticket(self, subject: str, description: str) -> TicketClassification:
+    def _count_stages(self, counts: Dict[str, int]):
+        """Add per "stage:decider" ticket counts to cascade_counts"""
+        with self._counts_lock:
+            for key, count in counts.items():
+                self.cascade_counts[key] = self.cascade_counts.get(key, 0) + count
+    
+    def classify_ticket(self, subject: str, description: str, use_cache: bool = True) -> TicketClassification:
         """Classify a single ticket"""
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(subject, description, self.backend_id)
+            if cached is not None:
+                return TicketClassification(**cached, decided_by="cache")
+        
         # Combine subject and description
         full_text = f"{subject}. {description}"
         
-        # Perform classification
-        topic_tags = self.classify_topic(full_text)
-        sentiment = self.classify_sentiment(full_text)
-        priority = self.classify_priority(full_text)
+        # Perform classification; keyword rules are matched once and shared.
+        # In cascade mode, confident rule decisions skip the corresponding model.
+        matches = CLASSIFIER_RULES.match(full_text)
+        decisions = self._rule_decisions(matches)
+        fell_back = set()
+        if decisions['topic'] is not None:
+            topic_tags = [decisions['topic'][0]]
+        else:
+            topic_tags = self._model_topic(full_text)
+            if topic_tags is None:
+                fell_back.add('topic')
+                topic_tags = self._fallback_topic_classification(full_text, matches)
+        if decisions['sentiment'] is not None:
+            sentiment = decisions['sentiment'][0]
+        else:
+            sentiment = self._model_sentiment(full_text)
+            if sentiment is None:
+                fell_back.add('sentiment')
+                sentiment = self._fallback_sentiment_classification(full_text, matches)
+        priority = self.classify_priority(full_text, matches)
         
-        # Calculate confidence based on successful model usage
-        confidence = 0.9 if (self.sentiment_pipeline and self.zero_shot_pipeline) else 0.7
+        # Confidence of the weakest stage: calibrated for rule decisions,
+        # otherwise based on whether the model answered
+        confidence, decided_by = self._resolve_stages(decisions, fell_back)
         
         reasoning = f"Topic: {', '.join(topic_tags)} | Sentiment: {sentiment} | Priority: {priority}"
         
-        return TicketClassification(
+        classification = TicketClassification(
             topic_tags=topic_tags,
             sentiment=sentiment,
             priority=priority,
             confidence=confidence,
-            reasoning=reasoning
+            reasoning=reasoning,
+            decided_by=decided_by
         )
+        
+        # Only model results are worth persisting; keyword fallbacks are cheap to redo
+        if self.cache is not None and self.models_loaded and decided_by != 'rules':
+            self.cache.put(subject, description, self.backend_id, asdict(classification))
+        
+        return classification
     
-    def classify_multiple_tickets(self, tickets_df: pd.DataFrame) -> pd.DataFrame:
-        """Classify multiple tickets from DataFrame"""
+    def classify_multiple_tickets(self, tickets_df: pd.DataFrame, batch_size: int = 16,
+                                  batched: bool = True, num_workers: int = 0,
+                                  max_retries: int = 2) -> pd.DataFrame:
+        """Classify multiple tickets from DataFrame
+        
+        With ``batched=True`` whole lists of texts are passed to both pipelines
+        ``batch_size`` at a time and the output columns are built once; with
+        ``batched=False`` tickets are classified one row at a time. With
+        ``num_workers > 1`` the tickets are sharded across that many worker
+        processes, each running the batched path. Throughput is printed and
+        stored in ``result.attrs['tickets_per_sec']``.
+        """
+        start_time = time.perf_counter()
+        
+        if num_workers > 1:
+            results_df = self._classify_parallel(tickets_df, batch_size, num_workers, max_retries)
+            mode = f"{num_workers} workers, batch_size={batch_size}"
+        elif batched:
+            results_df = self._classify_batched(tickets_df, batch_size)
+            mode = f"batched, batch_size={batch_size}"
+        else:
+            results_df = self._classify_rows(tickets_df)
+            mode = "per-row"
+        
+        elapsed = time.perf_counter() - start_time
+        tickets_per_sec = len(tickets_df) / elapsed if elapsed > 0 else 0.0
+        results_df.attrs['tickets_per_sec'] = tickets_per_sec
+        
+        print(f"✅ Classified {len(tickets_df)} tickets in {elapsed:.2f}s "
+              f"({tickets_per_sec:.1f} tickets/sec, {mode})")
+        
+        return results_df
+    
+    def _classify_batched(self, tickets_df: pd.DataFrame, batch_size: int) -> pd.DataFrame:
+        """Classify all tickets column-wise with batched pipeline calls"""
+        results_df = tickets_df.reset_index(drop=True).copy()
+        if results_df.empty:
+            return results_df
+        
+        subjects = results_df['subject'].astype(str).tolist()
+        descriptions = results_df['description'].astype(str).tolist()
+        
+        # Look up every ticket first so only cache misses reach the models
+        classifications = self._cached_classifications(subjects, descriptions)
+        misses = [i for i, cached in enumerate(classifications) if cached is None]
+        
+        if misses:
+            full_texts = [f"{subjects[i]}. {descriptions[i]}" for i in misses]
+            all_matches = [CLASSIFIER_RULES.match(text) for text in full_texts]
+            decisions = [self._rule_decisions(matches) for matches in all_matches]
+            
+            # Only tickets the rules could not decide reach each model
+            topic_tags = [[d['topic'][0]] if d['topic'] else None for d in decisions]
+            sentiments = [d['sentiment'][0] if d['sentiment'] else None for d in decisions]
+            topic_todo = [j for j, tags in enumerate(topic_tags) if tags is None]
+            sentiment_todo = [j for j, sentiment in enumerate(sentiments) if sentiment is None]
+            
+            print(f"🔄 Classifying {len(full_texts)} tickets in batches of {batch_size} "
+                  f"({len(subjects) - len(misses)} from cache, "
+                  f"{len(full_texts) - len(topic_todo)} topic and "
+                  f"{len(full_texts) - len(sentiment_todo)} sentiment decided by rules)...")
+            
+            # A failed or missing model leaves its whole batch to the keyword rules
+            fell_back = [set() for _ in misses]
+            if topic_todo:
+                batch_tags = self._model_topics([full_texts[j] for j in topic_todo], batch_size=batch_size)
+                for position, j in enumerate(topic_todo):
+                    if batch_tags is None:
+                        fell_back[j].add('topic')
+                        topic_tags[j] = self._fallback_topic_classification(full_texts[j], all_matches[j])
+                    else:
+                        topic_tags[j] = batch_tags[position]
+            if sentiment_todo:
+                batch_sentiments = self._model_sentiments(
+                    [full_texts[j] for j in sentiment_todo], batch_size=batch_size
+                )
+                for position, j in enumerate(sentiment_todo):
+                    if batch_sentiments is None:
+                        fell_back[j].add('sentiment')
+                        sentiments[j] = self._fallback_sentiment_classification(full_texts[j], all_matches[j])
+                    else:
+                        sentiments[j] = batch_sentiments[position]
+            
+            for j, i in enumerate(misses):
+                tags, sentiment = topic_tags[j], sentiments[j]
+                priority = self.classify_priority(full_texts[j], all_matches[j])
+                confidence, decided_by = self._resolve_stages(decisions[j], fell_back[j])
+                classifications[i] = {
+                    'topic_tags': tags,
+                    'sentiment': sentiment,
+                    'priority': priority,
+                    'confidence': confidence,
+                    'reasoning': f"Topic: {', '.join(tags)} | Sentiment: {sentiment} | Priority: {priority}",
+                    'decided_by': decided_by
+                }
+                if self.cache is not None and self.models_loaded and decided_by != 'rules':
+                    self.cache.put(subjects[i], descriptions[i], self.backend_id, classifications[i])
+        
+        return self._with_classifications(results_df, classifications)
+    
+    def _cached_classifications(self, subjects: List[str], descriptions: List[str]) -> List[Optional[Dict]]:
+        """Cached classification per ticket, None for misses"""
+        classifications: List[Optional[Dict]] = [None] * len(subjects)
+        if self.cache is not None:
+            for i, (subject, description) in enumerate(zip(subjects, descriptions)):
+                cached = self.cache.get(subject, description, self.backend_id)
+                if cached is not None:
+                    classifications[i] = {**cached, 'decided_by': 'cache'}
+        return classifications
+    
+    @staticmethod
+    def _with_classifications(results_df: pd.DataFrame, classifications: List[Dict]) -> pd.DataFrame:
+        """Write the classification columns, one dict per row"""
+        results_df['topic_tags'] = pd.Series(
+            [c['topic_tags'] for c in classifications], index=results_df.index, dtype=object
+        )
+        for column in ('sentiment', 'priority', 'confidence', 'reasoning', 'decided_by'):
+            results_df[column] = [c[column] for c in classifications]
+        
+        return results_df
+    
+    def _classify_parallel(self, tickets_df: pd.DataFrame, batch_size: int,
+                           num_workers: int, max_retries: int) -> pd.DataFrame:
+        """
+        Shard tickets across worker processes and merge results in ticket order.
+        
+        Each worker loads the models once and pins its torch thread count to its
+        share of the cores. A crashed or failing shard is resubmitted on a fresh
+        pool up to max_retries times, then classified in this process.
+        
+        Workers are built without the cache: lookups and writes happen here,
+        so only cache misses are sharded, and each worker's cascade counts are
+        merged into this classifier's.
+        """
+        results_df = tickets_df.reset_index(drop=True).copy()
+        if results_df.empty:
+            return results_df
+        
+        subjects = results_df['subject'].astype(str).tolist()
+        descriptions = results_df['description'].astype(str).tolist()
+        classifications = self._cached_classifications(subjects, descriptions)
+        misses = [i for i, cached in enumerate(classifications) if cached is None]
+        if not misses:
+            return self._with_classifications(results_df, classifications)
+        misses_df = results_df.iloc[misses].reset_index(drop=True)
+        
+        # Several shards per worker keeps workers busy and makes retries cheap
+        num_shards = min(len(misses_df), num_workers * 4)
+        shard_size = -(-len(misses_df) // num_shards)
+        shards = {
+            index: misses_df.iloc[start:start + shard_size]
+            for index, start in enumerate(range(0, len(misses_df), shard_size))
+        }
+        torch_threads = max(1, (os.cpu_count() or 1) // num_workers)
+        
+        print(f"🔄 Classifying {len(misses_df)} tickets in {len(shards)} shards "
+              f"across {num_workers} workers ({torch_threads} torch threads each, "
+              f"{len(results_df) - len(misses)} from cache)...")
+        
+        results: Dict[int, pd.DataFrame] = {}
+        attempts = {index: 0 for index in shards}
+        pending = set(shards)
+        
+        while pending:
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._init_kwargs, torch_threads)
+            ) as pool:
+                futures = {
+                    index: pool.submit(_classify_shard, shards[index], batch_size)
+                    for index in sorted(pending)
+                }
+                for index, future in futures.items():
+                    try:
+                        results[index], shard_counts = future.result()
+                        pending.discard(index)
+                        self._count_stages(shard_counts)
+                    except Exception as e:
+                        # A crashed worker breaks the pool, failing every unfinished shard
+                        attempts[index] += 1
+                        print(f"⚠️ Shard {index} failed (attempt {attempts[index]}): {e}")
+            
+            for index in [index for index in pending if attempts[index] > max_retries]:
+                print(f"⚠️ Shard {index} exhausted retries, classifying in main process")
+                results[index] = self._classify_batched(shards[index], batch_size)
+                pending.discard(index)
+        
+        classified_df = pd.concat([results[index] for index in sorted(results)], ignore_index=True)
+        columns = ['topic_tags', 'sentiment', 'priority', 'confidence', 'reasoning', 'decided_by']
+        for i, row in zip(misses, classified_df[columns].to_dict('records')):
+            classifications[i] = row
+            if self.cache is not None and row['decided_by'] not in ('rules', 'cache'):
+                self.cache.put(subjects[i], descriptions[i], self.backend_id, row)
+        
+        return self._with_classifications(results_df, classifications)
+    
+    def _classify_rows(self, tickets_df: pd.DataFrame) -> pd.DataFrame:
+        """Classify tickets one row at a time"""
         results = []
         
         for idx, row in tickets_df.iterrows():
@@ -244,12 +765,28 @@ class AtlanTicketClassifier:
                 'sentiment': classification.sentiment,
                 'priority': classification.priority,
                 'confidence': classification.confidence,
-                'reasoning': classification.reasoning
+                'reasoning': classification.reasoning,
+                'decided_by': classification.decided_by
             })
             results.append(result_row)
         
         return pd.DataFrame(results)
 
+# Worker process state for AtlanTicketClassifier._classify_parallel
+_worker_classifier = None
+
+def _init_worker(classifier_kwargs: Dict, torch_threads: int):
+    """Load the models once per worker process, pinned to its share of cores"""
+    global _worker_classifier
+    torch.set_num_threads(torch_threads)
+    _worker_classifier = AtlanTicketClassifier(**classifier_kwargs)
+
+def _classify_shard(shard_df: pd.DataFrame, batch_size: int) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Classify one shard with the worker's classifier; returns the results and the shard's cascade counts"""
+    _worker_classifier.cascade_counts = {}
+    results_df = _worker_classifier._classify_batched(shard_df, batch_size)
+    return results_df, _worker_classifier.cascade_counts
+
 # Utility functions
 def load_sample_tickets(file_path: str = "sample_tickets.csv") -> pd.DataFrame:
     """Load sample tickets from CSV file"""
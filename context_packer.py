@@ -0,0 +1,203 @@
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, List, Sequence, Set, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Tokens of documentation context per RAG prompt
+DEFAULT_CONTEXT_TOKENS = int(os.getenv('RAG_CONTEXT_TOKENS', '1500'))
+# Target size of one passage
+DEFAULT_PASSAGE_TOKENS = int(os.getenv('RAG_PASSAGE_TOKENS', '150'))
+# Passages sharing at least this fraction of word trigrams with a chosen one are skipped
+DEFAULT_DEDUP_THRESHOLD = float(os.getenv('RAG_DEDUP_THRESHOLD', '0.6'))
+
+_WORD = re.compile(r"[a-z0-9]+(?:['_./-][a-z0-9]+)*")
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'how', 'i', 'if',
+    'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'our', 'so', 'that', 'the', 'this', 'to', 'was', 'we',
+    'what', 'when', 'where', 'which', 'who', 'why', 'will', 'with', 'you', 'your',
+}
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """The model's tiktoken encoding (downloaded once, then cached), or None if it cannot be loaded"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        print(f"⚠️ tiktoken encoding unavailable, estimating tokens from characters: {e}")
+        return None
+
+
+def token_counter(model: str = "gpt-3.5-turbo") -> Callable[[str], int]:
+    """
+    Token count function for a model.
+
+    Uses the model's tiktoken encoding when tiktoken is installed and the
+    encoding can be loaded, otherwise estimates a token per 4 characters (as
+    the OpenAI scheduler does). The encoding is loaded on the first count,
+    so building a packer never touches the network.
+    """
+    def count(text: str) -> int:
+        encoding = _encoding(model)
+        if encoding is None:
+            return math.ceil(len(text) / 4)
+        return len(encoding.encode(text, disallowed_special=()))
+    return count
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+@dataclass
+class Passage:
+    source: str
+    text: str
+    tokens: int
+    position: int  # order within its source
+    score: float = 0.0
+
+
+@dataclass
+class PackedContext:
+    passages: List[Passage] = field(default_factory=list)
+    tokens: int = 0  # tokens of the formatted context, headers and separators included
+    candidate_tokens: int = 0  # tokens of every candidate passage
+    duplicates: int = 0  # passages skipped as near-duplicates
+    budget: int = 0
+
+    @property
+    def sources(self) -> List[str]:
+        return list(dict.fromkeys(passage.source for passage in self.passages))
+
+    def format(self) -> str:
+        """Prompt context: one block per source, passages in reading order"""
+        blocks = []
+        for source in self.sources:
+            passages = sorted((p for p in self.passages if p.source == source), key=lambda p: p.position)
+            blocks.append(f"Source: {source}\nContent: {' ... '.join(p.text for p in passages)}\n")
+        return "\n---\n".join(blocks)
+
+
+class ContextPacker:
+    """
+    Builds RAG prompt context within a token budget.
+
+    Documents are split into passages of about passage_tokens (on sentence
+    boundaries where possible), ranked by BM25 relevance to the query, and
+    added greedily, best first, while the formatted context (per-source
+    headers and separators included) fits the budget. Passages that
+    mostly repeat an already chosen one (shared navigation, the same page
+    under two categories) are skipped.
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo", budget_tokens: int = DEFAULT_CONTEXT_TOKENS,
+                 passage_tokens: int = DEFAULT_PASSAGE_TOKENS, dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD):
+        self.count_tokens = token_counter(model)
+        self.budget_tokens = budget_tokens
+        self.passage_tokens = passage_tokens
+        self.dedup_threshold = dedup_threshold
+
+    def split(self, source: str, text: str) -> List[Passage]:
+        """Passages of about passage_tokens each, in reading order"""
+        pieces = []
+        for sentence in _SENTENCE_END.split(text):
+            sentence = ' '.join(sentence.split())
+            if not sentence:
+                continue
+            if self.count_tokens(sentence) <= self.passage_tokens:
+                pieces.append(sentence)
+                continue
+            # Run-on text (menus, tables): cut into word windows
+            words = sentence.split()
+            step = max(1, self.passage_tokens * 3 // 4)
+            pieces.extend(' '.join(words[i:i + step]) for i in range(0, len(words), step))
+
+        passages, current, current_tokens = [], [], 0
+        for piece in pieces:
+            piece_tokens = self.count_tokens(piece)
+            if current and current_tokens + piece_tokens > self.passage_tokens:
+                text = ' '.join(current)
+                passages.append(Passage(source, text, self.count_tokens(text), len(passages)))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+        if current:
+            text = ' '.join(current)
+            passages.append(Passage(source, text, self.count_tokens(text), len(passages)))
+        return passages
+
+    @staticmethod
+    def rank(query: str, passages: List[Passage], k1: float = 1.2, b: float = 0.75) -> List[Passage]:
+        """Score passages with BM25 against the query terms, best first"""
+        query_terms = set(_terms(query))
+        term_counts = [Counter(_terms(passage.text)) for passage in passages]
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        document_frequency = Counter(term for counts in term_counts for term in counts if term in query_terms)
+
+        for passage, counts, length in zip(passages, term_counts, lengths):
+            score = 0.0
+            for term in query_terms:
+                frequency = counts.get(term, 0)
+                if not frequency:
+                    continue
+                idf = math.log(1 + (len(passages) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                norm = k1 * (1 - b + b * length / average_length) if average_length else k1
+                score += idf * frequency * (k1 + 1) / (frequency + norm)
+            passage.score = score
+        # Ties (e.g. no query terms anywhere) keep reading order
+        return sorted(passages, key=lambda passage: (-passage.score, passage.position))
+
+    def pack(self, query: str, documents: Sequence[Tuple[str, str]]) -> PackedContext:
+        """Choose passages from (source, text) documents for the query"""
+        candidates = [passage for source, text in documents for passage in self.split(source, text)]
+        packed = PackedContext(candidate_tokens=sum(passage.tokens for passage in candidates),
+                               budget=self.budget_tokens)
+        if not candidates:
+            return packed
+
+        ranked = self.rank(query, candidates)
+        # Without any term overlap, fall back to the start of each document rather than nothing
+        relevant = [passage for passage in ranked if passage.score > 0] or ranked
+
+        chosen_shingles: List[Set[Tuple[str, ...]]] = []
+        for passage in relevant:
+            # Cheap lower bound first; the exact cost adds the Source/Content headers and separators
+            if packed.tokens + passage.tokens > self.budget_tokens:
+                continue
+            shingles = _shingles(passage.text)
+            if any(len(shingles & seen) >= self.dedup_threshold * min(len(shingles), len(seen))
+                   for seen in chosen_shingles):
+                packed.duplicates += 1
+                continue
+            packed.passages.append(passage)
+            tokens = self.count_tokens(packed.format())
+            if tokens > self.budget_tokens:
+                packed.passages.pop()
+                continue
+            packed.tokens = tokens
+            chosen_shingles.append(shingles)
+        return packed
@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Seconds an interactive caller waits for the model before taking the rule-based result
+DEFAULT_BUDGET_SECONDS = float(os.getenv('LLM_BUDGET_SECONDS', '8'))
+# Background threads finishing calls that ran over budget
+BUDGET_WORKERS = int(os.getenv('LLM_BUDGET_WORKERS', '8'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=BUDGET_WORKERS, thread_name_prefix='llm-budget')
+        return _executor
+
+
+class BudgetRunner:
+    """
+    Runs calls under a latency budget with fallback-now, reconcile-later semantics.
+
+    A call that finishes within its budget returns its result. Otherwise the
+    caller gets a provisional result immediately while the call keeps running;
+    when it completes, its result is stored under the call's key (and handed
+    to on_final) and, unless same is None, compared with the provisional one,
+    counting how many provisional results were confirmed or corrected. A late
+    call that raises, or whose result answered() rejects (e.g. the call fell
+    back after an API error), counts as a late error and leaves the
+    provisional result standing.
+    """
+
+    def __init__(self, max_results: int = 1000, executor: Optional[ThreadPoolExecutor] = None):
+        self.max_results = max_results
+        self._executor = executor
+        self.pending: Dict[str, Any] = {}
+        self.results: "OrderedDict[str, Any]" = OrderedDict()
+        self.counters = {'on_time': 0, 'provisional': 0, 'confirmed': 0, 'corrected': 0, 'late_errors': 0}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, call: Callable[[], Any], budget: float, provisional: Callable[[], Any],
+            same: Optional[Callable[[Any, Any], bool]] = lambda a, b: a == b,
+            on_final: Optional[Callable[[Any], None]] = None,
+            answered: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """
+        Run call, waiting at most budget seconds.
+
+        Returns:
+            Tuple of (result, is_provisional)
+        """
+        future = (self._executor or _shared_executor()).submit(call)
+        try:
+            result = future.result(timeout=budget)
+        except FutureTimeout:
+            fallback = provisional()
+            with self._lock:
+                self.counters['provisional'] += 1
+                self.pending[key] = fallback
+            future.add_done_callback(lambda done: self._reconcile(key, fallback, done, same, on_final, answered))
+            return fallback, True
+
+        with self._lock:
+            self.counters['on_time'] += 1
+        return result, False
+
+    def _reconcile(self, key: str, fallback: Any, future: Future, same: Optional[Callable[[Any, Any], bool]],
+                   on_final: Optional[Callable[[Any], None]], answered: Optional[Callable[[Any], bool]]):
+        try:
+            final = future.result()
+        except Exception as e:
+            self._late_error(key, str(e))
+            return
+        if answered is not None and not answered(final):
+            self._late_error(key, "it fell back instead of answering")
+            return
+
+        with self._lock:
+            self.pending.pop(key, None)
+            self.results[key] = final
+            self.results.move_to_end(key)
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+            if same is not None:
+                self.counters['confirmed' if same(fallback, final) else 'corrected'] += 1
+        if on_final is not None:
+            on_final(final)
+
+    def _late_error(self, key: str, reason: str):
+        """Drop a failed background call, keeping its provisional result"""
+        with self._lock:
+            self.pending.pop(key, None)
+            self.counters['late_errors'] += 1
+        print(f"⚠️ Background call for {key[:12]} failed: {reason}")
+
+    def result(self, key: str) -> Optional[Any]:
+        """The late result for key, once its background call has finished"""
+        with self._lock:
+            return self.results.get(key)
+
+    def is_pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self.pending
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            provisional = self.counters['provisional']
+            return {
+                **self.counters,
+                'pending': len(self.pending),
+                'correction_rate': self.counters['corrected'] / provisional if provisional else 0.0,
+            }
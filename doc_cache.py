@@ -0,0 +1,257 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Mapping, Optional
+
+DEFAULT_DOC_CACHE_PATH = os.getenv('DOC_CACHE_PATH', '.doc_cache.sqlite')
+# Pages younger than this are served without contacting the server
+DEFAULT_TTL_SECONDS = float(os.getenv('DOC_CACHE_TTL_SECONDS', '86400'))
+DEFAULT_MEMORY_MB = float(os.getenv('DOC_CACHE_MEMORY_MB', '32'))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    raw: bytes
+    texts: Dict[str, str]  # extracted text per extractor id
+    etag: Optional[str]
+    last_modified: Optional[str]
+    validated_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.raw) + sum(len(text.encode('utf-8')) for text in self.texts.values())
+
+
+class DocumentCache:
+    """
+    Tiered cache of fetched documentation pages.
+
+    A size-bounded in-memory LRU sits in front of a SQLite store that survives
+    restarts. Each page keeps one raw body, the text each extractor produced
+    from it (a new extractor extracts from the stored body, never refetches),
+    and its ETag / Last-Modified validators. Pages older than ttl_seconds are
+    revalidated with a conditional request; if the server cannot be reached
+    the stale copy is served instead. The disk entry count is tracked in
+    memory, so inserts only count rows when it reaches max_entries.
+    """
+
+    def __init__(self, path: str = DEFAULT_DOC_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 memory_bytes: int = int(DEFAULT_MEMORY_MB * 1024 * 1024), max_entries: int = 5000,
+                 enabled: bool = True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_bytes = memory_bytes
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.memory: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self.memory_used = 0
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'fresh': 0, 'revalidated': 0,
+                         'refreshed': 0, 'fetched': 0, 'stale_served': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                raw BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                validated_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS texts (
+                url TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (url, extractor)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access)")
+        self._conn.commit()
+        self.entries = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def _remember(self, page: CachedPage):
+        """Put page at the front of the memory LRU, evicting from the back to fit"""
+        old = self.memory.pop(page.url, None)
+        if old is not None:
+            self.memory_used -= old.size
+        if page.size > self.memory_bytes:
+            return
+        self.memory[page.url] = page
+        self.memory_used += page.size
+        while self.memory_used > self.memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_used -= evicted.size
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Cached page from memory or disk (fresh or not), or None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            page = self.memory.get(url)
+            if page is not None:
+                self.memory.move_to_end(url)
+                self.counters['memory_hits'] += 1
+                return page
+
+            row = self._conn.execute(
+                "SELECT raw, etag, last_modified, validated_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.counters['misses'] += 1
+                return None
+
+            self.counters['disk_hits'] += 1
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+            texts = dict(self._conn.execute("SELECT extractor, text FROM texts WHERE url = ?", (url,)))
+            page = CachedPage(url, bytes(row[0]), texts, row[1], row[2], row[3])
+            self._remember(page)
+            return page
+
+    def put(self, page: CachedPage):
+        """Store page and all its texts in both tiers, evicting least recently used disk entries if full"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._remember(page)
+            exists = self._conn.execute("SELECT 1 FROM pages WHERE url = ?", (page.url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, raw, etag, last_modified, validated_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (page.url, page.raw, page.etag, page.last_modified, page.validated_at, time.time())
+            )
+            # Texts extracted from an older body are dropped with it
+            self._conn.execute("DELETE FROM texts WHERE url = ?", (page.url,))
+            self._conn.executemany(
+                "INSERT INTO texts (url, extractor, text) VALUES (?, ?, ?)",
+                [(page.url, extractor, text) for extractor, text in page.texts.items()]
+            )
+            if exists is None:
+                self.entries += 1
+            if self.entries > self.max_entries:
+                # Recount first: other processes may share the file
+                self.entries = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+                excess = self.entries - self.max_entries
+                if excess > 0:
+                    evicted = "SELECT url FROM pages ORDER BY last_access ASC LIMIT ?"
+                    self._conn.execute(f"DELETE FROM texts WHERE url IN ({evicted})", (excess,))
+                    self._conn.execute(f"DELETE FROM pages WHERE url IN ({evicted})", (excess,))
+                    self.entries = self.max_entries
+            self._conn.commit()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def fetch(self, url: str, client, extract: Callable[[bytes], str], extractor: str = 'default',
+              headers: Optional[Mapping[str, str]] = None, timeout: float = 10.0) -> str:
+        """
+        Extracted text of url, from the cache when fresh, else revalidated or fetched with client.
+
+        Raises the fetch error only when there is no cached copy to fall back on.
+        """
+        page = self.get(url)
+        if page is not None and extractor not in page.texts:
+            page = replace(page, texts={**page.texts, extractor: extract(page.raw)})
+            self.put(page)
+        if page is not None and time.time() - page.validated_at < self.ttl_seconds:
+            self._count('fresh')
+            return page.texts[extractor]
+
+        request_headers = dict(headers or {})
+        if page is not None and page.etag:
+            request_headers['If-None-Match'] = page.etag
+        if page is not None and page.last_modified:
+            request_headers['If-Modified-Since'] = page.last_modified
+
+        try:
+            response = client.get(url, headers=request_headers, timeout=timeout)
+            if response.status_code == 304 and page is not None:
+                page = replace(page, validated_at=time.time(),
+                               etag=response.headers.get('ETag') or page.etag,
+                               last_modified=response.headers.get('Last-Modified') or page.last_modified)
+                self.put(page)
+                self._count('revalidated')
+                return page.texts[extractor]
+            response.raise_for_status()
+        except Exception:
+            if page is None:
+                self._count('errors')
+                raise
+            self._count('stale_served')
+            return page.texts[extractor]
+
+        self._count('refreshed' if page is not None else 'fetched')
+        page = CachedPage(
+            url=url,
+            raw=response.content,
+            texts={extractor: extract(response.content)},
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            validated_at=time.time(),
+        )
+        self.put(page)
+        return page.texts[extractor]
+
+    def invalidate(self, url: Optional[str] = None) -> int:
+        """Drop one page, or everything; returns disk rows removed"""
+        with self._lock:
+            if url is None:
+                self.memory.clear()
+                self.memory_used = 0
+                self._conn.execute("DELETE FROM texts")
+                cursor = self._conn.execute("DELETE FROM pages")
+            else:
+                old = self.memory.pop(url, None)
+                if old is not None:
+                    self.memory_used -= old.size
+                self._conn.execute("DELETE FROM texts WHERE url = ?", (url,))
+                cursor = self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._conn.commit()
+            self.entries = max(0, self.entries - cursor.rowcount)
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and revalidation counters for this process and current size"""
+        with self._lock:
+            entries = self.entries = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            counters = dict(self.counters)
+            memory_entries, memory_used = len(self.memory), self.memory_used
+        hits = counters['memory_hits'] + counters['disk_hits']
+        lookups = hits + counters['misses']
+        return {
+            **counters,
+            'hits': hits,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'memory_entries': memory_entries,
+            'memory_bytes': memory_used,
+            'enabled': self.enabled,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_doc_cache: Optional[DocumentCache] = None
+_default_doc_cache_lock = threading.Lock()
+
+
+def get_default_doc_cache() -> DocumentCache:
+    """Process-wide page cache at DOC_CACHE_PATH, disabled if DOC_CACHE=off"""
+    global _default_doc_cache
+    with _default_doc_cache_lock:
+        if _default_doc_cache is None:
+            _default_doc_cache = DocumentCache(enabled=os.getenv('DOC_CACHE', 'on').lower() != 'off')
+        return _default_doc_cache
@@ -0,0 +1,344 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from doc_prefetcher import HostRateLimiter
+from html_extract import Block, ExtractedPage, extract
+from http_pool import get_http_client
+
+DEFAULT_STORE_PATH = os.getenv('DOC_STORE_PATH', '.doc_store.sqlite')
+DEFAULT_SEEDS = ['https://docs.atlan.com/', 'https://developer.atlan.com/']
+DEFAULT_MAX_DEPTH = int(os.getenv('DOC_CRAWL_MAX_DEPTH', '2'))
+DEFAULT_MAX_PAGES = int(os.getenv('DOC_CRAWL_MAX_PAGES', '500'))
+DEFAULT_CONCURRENCY = int(os.getenv('DOC_CRAWL_CONCURRENCY', '4'))
+DEFAULT_HOST_DELAY_SECONDS = float(os.getenv('DOC_CRAWL_HOST_DELAY_SECONDS', '0.5'))
+
+USER_AGENT = 'AtlanSupportDocsCrawler/1.0'
+
+# Links to these are never documentation pages
+SKIPPED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp', '.pdf', '.zip', '.gz',
+                      '.css', '.js', '.json', '.xml', '.txt', '.mp4', '.woff', '.woff2')
+
+# First matching rule decides the knowledge base category of a page
+CATEGORY_RULES = [
+    ('api_sdk', ('developer.', '/api', '/sdk')),
+    ('sso', ('sso', 'saml', 'okta', 'azure-ad', 'authentication')),
+    ('glossary', ('glossary',)),
+    ('best_practices', ('best-practice', 'best_practice')),
+    ('how_to', ('how-to', 'how_to', 'guide', 'setup', 'set-up', 'connect', 'tutorial')),
+]
+
+
+def categorize(url: str) -> str:
+    """Knowledge base category for a documentation URL"""
+    lowered = url.lower()
+    for category, markers in CATEGORY_RULES:
+        if any(marker in lowered for marker in markers):
+            return category
+    return 'product'
+
+
+def extract_page(html: bytes, base_url: str) -> Tuple[ExtractedPage, List[str]]:
+    """Extracted page and its absolute, fragment-free link targets"""
+    page = extract(html)
+    links = []
+    for href in page.links:
+        link, _ = urldefrag(urljoin(base_url, href))
+        if link.startswith(('http://', 'https://')):
+            links.append(link)
+    return page, list(dict.fromkeys(links))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class DocumentStore:
+    """
+    SQLite store of crawled documentation pages.
+
+    Each page keeps its full extracted text (no truncation), its heading,
+    text and code blocks for structure-aware chunking, title, category,
+    content hash and outgoing links, plus validators for conditional requests
+    on the next crawl. Index builders read it with documents().
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                url TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                category TEXT NOT NULL,
+                text TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                links TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                crawled_at REAL NOT NULL,
+                changed_at REAL NOT NULL,
+                blocks TEXT NOT NULL DEFAULT '[]'
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        if 'blocks' not in columns:  # stores written before blocks were kept
+            self._conn.execute("ALTER TABLE documents ADD COLUMN blocks TEXT NOT NULL DEFAULT '[]'")
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM documents WHERE url = ?", (url,))
+            row = cursor.fetchone()
+            columns = [column[0] for column in cursor.description]
+        if row is None:
+            return None
+        document = dict(zip(columns, row))
+        document['links'] = json.loads(document['links'])
+        document['blocks'] = [Block(**block) for block in json.loads(document['blocks'])]
+        return document
+
+    def upsert(self, url: str, page: ExtractedPage, links: List[str], etag: Optional[str] = None,
+               last_modified: Optional[str] = None) -> bool:
+        """Store a fetched page; returns False (and only touches crawled_at) if its text is unchanged"""
+        text = page.text
+        digest = content_hash(text)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash FROM documents WHERE url = ?", (url,)).fetchone()
+            if row is not None and row[0] == digest:
+                self._conn.execute(
+                    "UPDATE documents SET crawled_at = ?, etag = ?, last_modified = ? WHERE url = ?",
+                    (now, etag, last_modified, url)
+                )
+                self._conn.commit()
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (url, title, category, text, content_hash, links, etag, "
+                "last_modified, crawled_at, changed_at, blocks) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, page.title, categorize(url), text, digest, json.dumps(links), etag, last_modified, now, now,
+                 json.dumps([asdict(block) for block in page.blocks]))
+            )
+            self._conn.commit()
+            return True
+
+    def touch(self, url: str):
+        """Mark a page as crawled without a content change (HTTP 304)"""
+        with self._lock:
+            self._conn.execute("UPDATE documents SET crawled_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def documents(self, category: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """url, title, category, text and blocks of stored pages, optionally for one category"""
+        query = "SELECT url, title, category, text, blocks FROM documents"
+        params: Tuple = ()
+        if category is not None:
+            query += " WHERE category = ?"
+            params = (category,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY url", params).fetchall()
+        for url, title, page_category, text, blocks in rows:
+            yield {'url': url, 'title': title, 'category': page_category, 'text': text,
+                   'blocks': [Block(**block) for block in json.loads(blocks)]}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class DocCrawler:
+    """
+    Incremental documentation crawler.
+
+    Starts from the seed pages and every page listed in the seed hosts'
+    sitemaps (from robots.txt, else /sitemap.xml), then follows links on
+    the seed hosts breadth-first up to max_depth and max_pages. Pages are
+    fetched by `concurrency` threads, each host at most once per host_delay
+    seconds and only where robots.txt allows. Pages are requested
+    conditionally and re-stored only when their text hash changed.
+    """
+
+    def __init__(self, store: DocumentStore, seeds: Iterable[str] = DEFAULT_SEEDS,
+                 max_depth: int = DEFAULT_MAX_DEPTH, max_pages: int = DEFAULT_MAX_PAGES,
+                 concurrency: int = DEFAULT_CONCURRENCY, host_delay: float = DEFAULT_HOST_DELAY_SECONDS,
+                 use_sitemaps: bool = True, respect_robots: bool = True, client=None):
+        self.store = store
+        self.seeds = list(dict.fromkeys(seeds))
+        self.hosts = {urlsplit(seed).netloc for seed in self.seeds}
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.limiter = HostRateLimiter(host_delay)
+        self.use_sitemaps = use_sitemaps
+        self.respect_robots = respect_robots
+        self.client = client or get_http_client()
+        self.robots: Dict[str, Optional[RobotFileParser]] = {}
+        self.counters = {'fetched': 0, 'new': 0, 'changed': 0, 'unchanged': 0, 'not_modified': 0,
+                         'skipped': 0, 'disallowed': 0, 'errors': 0, 'sitemap_urls': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _get(self, url: str, headers: Optional[Dict[str, str]] = None):
+        wait = self.limiter.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+        return self.client.get(url, headers={'User-Agent': USER_AGENT, **(headers or {})}, timeout=10)
+
+    def _in_scope(self, url: str) -> bool:
+        parts = urlsplit(url)
+        return (parts.scheme in ('http', 'https') and parts.netloc in self.hosts
+                and not parts.path.lower().endswith(SKIPPED_EXTENSIONS))
+
+    def _robots_for(self, url: str) -> Optional[RobotFileParser]:
+        """Parsed robots.txt of url's host (None when it has none)"""
+        parts = urlsplit(url)
+        if parts.netloc not in self.robots:
+            parser = None
+            try:
+                response = self._get(f"{parts.scheme}://{parts.netloc}/robots.txt")
+                if response.status_code == 200:
+                    parser = RobotFileParser()
+                    parser.parse(response.text.splitlines())
+            except Exception as e:
+                print(f"⚠️ Could not read robots.txt for {parts.netloc}: {e}")
+            self.robots[parts.netloc] = parser
+        return self.robots[parts.netloc]
+
+    def _allowed(self, url: str) -> bool:
+        if not self.respect_robots:
+            return True
+        robots = self._robots_for(url)
+        return robots is None or robots.can_fetch(USER_AGENT, url)
+
+    def sitemap_urls(self, max_sitemaps: int = 50) -> List[str]:
+        """In-scope page URLs listed by the seed hosts' sitemaps, following sitemap indexes"""
+        pending = []
+        for host in sorted(self.hosts):
+            scheme = next(urlsplit(seed).scheme for seed in self.seeds if urlsplit(seed).netloc == host)
+            robots = self._robots_for(f"{scheme}://{host}/") if self.respect_robots else None
+            pending.extend((robots.site_maps() if robots else None) or [f"{scheme}://{host}/sitemap.xml"])
+
+        pages: List[str] = []
+        visited: Set[str] = set()
+        while pending and len(visited) < max_sitemaps:
+            sitemap = pending.pop(0)
+            if sitemap in visited:
+                continue
+            visited.add(sitemap)
+            try:
+                response = self._get(sitemap)
+                if response.status_code != 200:
+                    continue
+                root = ET.fromstring(response.content)
+            except Exception as e:
+                print(f"⚠️ Could not read sitemap {sitemap}: {e}")
+                continue
+            locations = [element.text.strip() for element in root.iter()
+                         if element.tag.endswith('loc') and element.text]
+            if root.tag.endswith('sitemapindex'):
+                pending.extend(locations)
+            else:
+                pages.extend(location for location in locations if self._in_scope(location))
+
+        pages = list(dict.fromkeys(pages))
+        self._count('sitemap_urls', len(pages))
+        return pages
+
+    def _visit(self, url: str) -> List[str]:
+        """Fetch and store one page; returns its in-scope links"""
+        if not self._allowed(url):
+            self._count('disallowed')
+            return []
+
+        stored = self.store.get(url)
+        headers = {}
+        if stored is not None and stored['etag']:
+            headers['If-None-Match'] = stored['etag']
+        if stored is not None and stored['last_modified']:
+            headers['If-Modified-Since'] = stored['last_modified']
+
+        try:
+            response = self._get(url, headers)
+            if response.status_code == 304 and stored is not None:
+                self.store.touch(url)
+                self._count('not_modified')
+                return [link for link in stored['links'] if self._in_scope(link)]
+            response.raise_for_status()
+        except Exception as e:
+            print(f"⚠️ Failed to crawl {url}: {e}")
+            self._count('errors')
+            return []
+
+        self._count('fetched')
+        if 'html' not in response.headers.get('Content-Type', 'text/html'):
+            self._count('skipped')
+            return []
+
+        page, links = extract_page(response.content, str(response.url))
+        changed = self.store.upsert(url, page, links, response.headers.get('ETag'),
+                                    response.headers.get('Last-Modified'))
+        self._count('unchanged' if not changed else 'changed' if stored is not None else 'new')
+        return [link for link in links if self._in_scope(link)]
+
+    def crawl(self) -> Dict[str, Any]:
+        """Crawl breadth-first and return the counters"""
+        started = time.perf_counter()
+        frontier = [url for url in self.seeds if self._in_scope(url)]
+        if self.use_sitemaps:
+            frontier.extend(self.sitemap_urls())
+        frontier = list(dict.fromkeys(frontier))[:self.max_pages]
+        seen = set(frontier)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='doc-crawler') as executor:
+            depth = 0
+            while frontier:
+                next_frontier = []
+                for links in executor.map(self._visit, frontier):
+                    for link in links:
+                        if depth < self.max_depth and link not in seen and len(seen) < self.max_pages:
+                            seen.add(link)
+                            next_frontier.append(link)
+                frontier = next_frontier
+                depth += 1
+
+        with self._lock:
+            return {**self.counters, 'visited': len(seen), 'seconds': time.perf_counter() - started}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the Atlan documentation into the document store")
+    parser.add_argument('seeds', nargs='*', default=DEFAULT_SEEDS, help='Start pages (their hosts bound the crawl)')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH)
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH)
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--host-delay', type=float, default=DEFAULT_HOST_DELAY_SECONDS)
+    parser.add_argument('--no-sitemaps', action='store_true')
+    args = parser.parse_args()
+
+    crawler = DocCrawler(DocumentStore(args.store), args.seeds, max_depth=args.max_depth, max_pages=args.max_pages,
+                         concurrency=args.concurrency, host_delay=args.host_delay,
+                         use_sitemaps=not args.no_sitemaps)
+    stats = crawler.crawl()
+    print(f"✅ Crawled {stats['visited']} pages in {stats['seconds']:.1f}s: {stats['new']} new, "
+          f"{stats['changed']} changed, {stats['unchanged'] + stats['not_modified']} unchanged, "
+          f"{stats['errors']} errors; {len(crawler.store)} pages in {args.store}")
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+# Set to "off" to fetch nothing in the background (queries then use fallback content)
+DOC_PREFETCH = os.getenv('DOC_PREFETCH', 'on').lower() != 'off'
+# Seconds between refresh passes over every documentation URL
+DEFAULT_REFRESH_SECONDS = float(os.getenv('DOC_PREFETCH_INTERVAL_SECONDS', '3600'))
+# Minimum seconds between two requests to the same host
+DEFAULT_HOST_DELAY_SECONDS = float(os.getenv('DOC_PREFETCH_HOST_DELAY_SECONDS', '0.5'))
+
+
+class HostRateLimiter:
+    """Spaces requests to each host at least min_interval seconds apart"""
+
+    def __init__(self, min_interval: float = DEFAULT_HOST_DELAY_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.min_interval = min_interval
+        self.clock = clock
+        self.next_allowed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url: str) -> float:
+        """Claim the next slot for url's host; returns seconds to wait before using it"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self.next_allowed.get(host, now))
+            self.next_allowed[host] = slot + self.min_interval
+        return slot - now
+
+
+class DocPrefetcher:
+    """
+    Background worker that keeps fetched documentation ready for queries.
+
+    A daemon thread fetches every URL once on start and again every
+    refresh_seconds, spacing requests per host with a HostRateLimiter (by
+    default the process-wide one, so prefetchers together stay polite), and
+    keeps the latest non-empty text per URL. Queries call get(), which only
+    reads what has already been fetched and never touches the network; a URL
+    whose refresh fails keeps its previous text. Subscribers (on_update, and
+    callbacks passed to subscribe()) are called after each pass that changed
+    any content. URLs added later with add_urls() are fetched straight away.
+    """
+
+    def __init__(self, urls: Iterable[str], fetch: Callable[[str], str],
+                 refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+                 limiter: Optional[HostRateLimiter] = None,
+                 on_update: Optional[Callable[[Dict[str, str]], None]] = None):
+        self.urls: List[str] = list(dict.fromkeys(urls))
+        self.fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self.limiter = limiter or get_host_limiter()
+        self.listeners: List[Callable[[Dict[str, str]], None]] = [on_update] if on_update else []
+        self.content: Dict[str, str] = {}
+        self.fetched_at: Dict[str, float] = {}
+        self.counters = {'passes': 0, 'fetched': 0, 'changed': 0, 'failed': 0, 'waited_seconds': 0.0}
+        self.ready = threading.Event()  # set after the first pass
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'DocPrefetcher':
+        """Start the worker thread (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='doc-prefetcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def add_urls(self, urls: Iterable[str]) -> int:
+        """Add URLs to keep fetched; a running worker starts a pass for them. Returns how many were new"""
+        with self._lock:
+            new = [url for url in dict.fromkeys(urls) if url not in self.urls]
+            self.urls.extend(new)
+        if new:
+            self._wake.set()
+        return len(new)
+
+    def subscribe(self, callback: Callable[[Dict[str, str]], None]):
+        """Call callback with all fetched content after each pass that changed any"""
+        with self._lock:
+            self.listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, str]], None]):
+        with self._lock:
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.refresh()
+            self._wake.wait(self.refresh_seconds)
+
+    def refresh(self) -> int:
+        """Fetch every URL once, honouring the per-host limit; returns how many changed"""
+        changed = 0
+        with self._lock:
+            urls = list(self.urls)
+        for url in urls:
+            wait = self.limiter.reserve(url)
+            if wait > 0:
+                with self._lock:
+                    self.counters['waited_seconds'] += wait
+                if self._stop.wait(wait):
+                    break
+
+            try:
+                text = self.fetch(url)
+            except Exception as e:
+                print(f"⚠️ Prefetch of {url} failed: {e}")
+                text = ""
+
+            with self._lock:
+                if not text:
+                    self.counters['failed'] += 1
+                    continue
+                self.counters['fetched'] += 1
+                self.fetched_at[url] = time.time()
+                if self.content.get(url) != text:
+                    self.content[url] = text
+                    self.counters['changed'] += 1
+                    changed += 1
+
+        with self._lock:
+            self.counters['passes'] += 1
+            snapshot = dict(self.content)
+            listeners = list(self.listeners)
+        self.ready.set()
+        if changed:
+            for listener in listeners:
+                listener(snapshot)
+        return changed
+
+    def get(self, url: str) -> str:
+        """Already-fetched text of url, or "" if it has not been fetched yet"""
+        with self._lock:
+            return self.content.get(url, "")
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the first pass has finished (for scripts and tests)"""
+        return self.ready.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                'urls': len(self.urls),
+                'ready_urls': len(self.content),
+                'oldest_fetch': min(self.fetched_at.values()) if self.fetched_at else None,
+                'running': self._thread is not None and self._thread.is_alive(),
+            }
+
+
+_default_host_limiter: Optional[HostRateLimiter] = None
+_default_host_limiter_lock = threading.Lock()
+
+
+def get_host_limiter() -> HostRateLimiter:
+    """Process-wide per-host limiter spaced by DOC_PREFETCH_HOST_DELAY_SECONDS"""
+    global _default_host_limiter
+    with _default_host_limiter_lock:
+        if _default_host_limiter is None:
+            _default_host_limiter = HostRateLimiter()
+        return _default_host_limiter
@@ -0,0 +1,272 @@
+import os
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# "auto" uses lxml when installed, else the streaming stdlib parser; "bs4" is the slow reference
+HTML_EXTRACTOR = os.getenv('HTML_EXTRACTOR', 'auto')
+
+SKIPPED_TAGS = {'script', 'style', 'noscript'}
+HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+# Elements whose boundaries separate words even without whitespace in the markup
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'caption', 'dd', 'details', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'head', 'header', 'hr', 'html', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'summary', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'title', 'tr', 'ul',
+    *HEADING_TAGS,
+}
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_-]+)', re.IGNORECASE)
+
+
+@dataclass
+class Block:
+    kind: str  # "heading", "text" or "code"
+    text: str  # whitespace-collapsed, except code which keeps its lines
+    level: int = 0  # heading level
+
+
+@dataclass
+class ExtractedPage:
+    title: str
+    blocks: List[Block] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """All visible text, whitespace-collapsed, in document order"""
+        return ' '.join(' '.join(block.text.split()) for block in self.blocks if block.text.strip())
+
+
+class _PageBuilder:
+    """Turns start/data/end events from any parser into an ExtractedPage"""
+
+    def __init__(self):
+        self.page = ExtractedPage(title='')
+        self.parts: List[str] = []
+        self.skip_depth = 0
+        self.pre_depth = 0
+        self.heading_level = 0
+        self.in_title = False
+        self.title_parts: List[str] = []
+
+    def _flush(self, kind: str = 'text', level: int = 0):
+        raw = ''.join(self.parts)
+        self.parts = []
+        if kind == 'code':
+            text = raw.strip('\n')
+        else:
+            text = ' '.join(raw.split())
+        if text.strip():
+            self.page.blocks.append(Block(kind, text, level))
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+            return
+        if tag == 'a' and attrs.get('href'):
+            self.page.links.append(attrs['href'])
+        if tag == 'title':
+            self.in_title = True
+        if tag == 'pre':
+            if self.pre_depth == 0:
+                self._flush()
+            self.pre_depth += 1
+        elif tag in HEADING_TAGS and not self.pre_depth:
+            self._flush()
+            self.heading_level = HEADING_TAGS[tag]
+        elif tag in BLOCK_TAGS and not self.pre_depth:
+            self.parts.append(' ')
+
+    def end(self, tag: str):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if tag == 'title':
+            self.in_title = False
+        if tag == 'pre' and self.pre_depth:
+            self.pre_depth -= 1
+            if self.pre_depth == 0:
+                self._flush('code')
+        elif tag in HEADING_TAGS and self.heading_level and not self.pre_depth:
+            self._flush('heading', self.heading_level)
+            self.heading_level = 0
+        elif tag in BLOCK_TAGS and not self.pre_depth:
+            self.parts.append(' ')
+
+    def data(self, text: str):
+        if self.skip_depth:
+            return
+        if self.in_title:
+            self.title_parts.append(text)
+        self.parts.append(text)
+
+    def finish(self) -> ExtractedPage:
+        if self.pre_depth:
+            self._flush('code')
+        elif self.heading_level:
+            self._flush('heading', self.heading_level)
+        else:
+            self._flush()
+        self.page.title = ' '.join(''.join(self.title_parts).split())
+        if not self.page.title:
+            self.page.title = next((block.text for block in self.page.blocks if block.kind == 'heading'), '')
+        return self.page
+
+
+def _decode(html: Union[bytes, str]) -> str:
+    if isinstance(html, str):
+        return html
+    match = _META_CHARSET.search(html[:2048])
+    encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return html.decode(encoding, errors='replace')
+    except LookupError:
+        return html.decode('utf-8', errors='replace')
+
+
+class _StreamingParser(HTMLParser):
+    """Single pass over the markup with the stdlib tokenizer; no tree is built"""
+
+    def __init__(self, builder: _PageBuilder):
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.builder.end(tag)
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+
+def _extract_stdlib(html: Union[bytes, str]) -> ExtractedPage:
+    builder = _PageBuilder()
+    parser = _StreamingParser(builder)
+    parser.feed(_decode(html))
+    parser.close()
+    return builder.finish()
+
+
+def _walk_lxml(root, builder: _PageBuilder):
+    """Depth-first walk with an explicit stack, so deeply nested markup cannot hit the recursion limit"""
+    stack = [(root, False)]
+    while stack:
+        element, closing = stack.pop()
+        tag = element.tag.lower() if isinstance(element.tag, str) else None  # None for comments
+        if tag is not None and not closing:
+            builder.start(tag, dict(element.attrib))
+            if element.text:
+                builder.data(element.text)
+            stack.append((element, True))
+            stack.extend((child, False) for child in reversed(element))
+            continue
+        if tag is not None:
+            builder.end(tag)
+        if element.tail:
+            builder.data(element.tail)
+
+
+def _extract_lxml(html: Union[bytes, str]) -> ExtractedPage:
+    builder = _PageBuilder()
+    if (html.strip() if isinstance(html, str) else html.strip()):
+        # huge_tree lifts libxml2's nesting cap, past which it silently drops the rest of the page
+        _walk_lxml(lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(huge_tree=True)), builder)
+    return builder.finish()
+
+
+def _walk_soup(root, builder: _PageBuilder):
+    """Same explicit-stack walk as _walk_lxml over a BeautifulSoup tree"""
+    stack = [(child, False) for child in reversed(list(root.children))]
+    while stack:
+        child, closing = stack.pop()
+        if closing:
+            builder.end(child.name)
+        elif isinstance(child, Tag):
+            builder.start(child.name, {name: value if isinstance(value, str) else ' '.join(value)
+                                       for name, value in child.attrs.items()})
+            stack.append((child, True))
+            stack.extend((grandchild, False) for grandchild in reversed(list(child.children)))
+        elif type(child) is NavigableString:  # not comments, doctypes or CDATA
+            builder.data(str(child))
+
+
+def _extract_bs4(html: Union[bytes, str]) -> ExtractedPage:
+    builder = _PageBuilder()
+    _walk_soup(BeautifulSoup(html, 'html.parser'), builder)
+    return builder.finish()
+
+
+BACKENDS: Dict[str, Callable[[Union[bytes, str]], ExtractedPage]] = {
+    'stdlib': _extract_stdlib,
+    'bs4': _extract_bs4,
+}
+if LXML_AVAILABLE:
+    BACKENDS['lxml'] = _extract_lxml
+
+
+def resolve_backend(backend: str = HTML_EXTRACTOR) -> str:
+    """Concrete backend name for a requested one ("auto" picks the fastest installed)"""
+    if backend == 'auto':
+        return 'lxml' if LXML_AVAILABLE else 'stdlib'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable HTML extractor: {backend} (available: {sorted(BACKENDS)})")
+    return backend
+
+
+def extract(html: Union[bytes, str], backend: str = HTML_EXTRACTOR) -> ExtractedPage:
+    """Title, heading/text/code blocks and link targets of an HTML page"""
+    return BACKENDS[resolve_backend(backend)](html)
+
+
+def extract_text(html: Union[bytes, str], backend: str = HTML_EXTRACTOR) -> str:
+    """Visible text of a page, whitespace-collapsed"""
+    return extract(html, backend).text
+
+
+def legacy_text(html: Union[bytes, str]) -> str:
+    """The original BeautifulSoup extractor, kept as the reference for benchmarks"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def sections(blocks: List[Block]) -> List[Tuple[str, str]]:
+    """
+    Group blocks under their headings for chunking.
+
+    Returns (heading path, body) pairs, e.g. ("Setup > Snowflake", "..."),
+    with code blocks kept on their own lines in the body.
+    """
+    result: List[Tuple[str, str]] = []
+    path: List[Tuple[int, str]] = []
+    body: List[str] = []
+
+    def close():
+        if body:
+            result.append((' > '.join(text for _, text in path), '\n'.join(body)))
+            body.clear()
+
+    for block in blocks:
+        if block.kind == 'heading':
+            close()
+            path = [(level, text) for level, text in path if level < block.level] + [(block.level, block.text)]
+        else:
+            body.append(block.text)
+    close()
+    return result
@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Pool size and timeouts shared by OpenAI and documentation traffic
+MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '60'))
+# "auto" uses HTTP/2 when the h2 package is installed (pip install "httpx[http2]")
+HTTP2 = os.getenv('HTTP_HTTP2', 'auto')
+
+# Latency samples kept per host for percentiles
+LATENCY_SAMPLES = 500
+
+
+class PoolMetrics:
+    """
+    Connection reuse and per-host latency of pooled HTTP clients.
+
+    New TCP connections and TLS handshakes are counted from httpcore trace
+    events; every other request was served on a reused keep-alive connection.
+    Latency is time to response headers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: "weakref.WeakKeyDictionary[httpx.Request, float]" = weakref.WeakKeyDictionary()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {'requests': 0, 'new_connections': 0, 'tls_handshakes': 0, 'errors': 0,
+                             'http2_responses': 0}
+            self.hosts: Dict[str, Dict[str, Any]] = {}
+
+    def _host(self, host: str) -> Dict[str, Any]:
+        if host not in self.hosts:
+            self.hosts[host] = {'requests': 0, 'new_connections': 0, 'errors': 0,
+                                'latencies': deque(maxlen=LATENCY_SAMPLES)}
+        return self.hosts[host]
+
+    def request_started(self, request: httpx.Request):
+        with self._lock:
+            self._started[request] = time.perf_counter()
+
+    def response_received(self, response: httpx.Response):
+        started = self._started.pop(response.request, None)
+        with self._lock:
+            self.counters['requests'] += 1
+            if response.http_version == 'HTTP/2':
+                self.counters['http2_responses'] += 1
+            host = self._host(response.request.url.host)
+            host['requests'] += 1
+            if started is not None:
+                host['latencies'].append(time.perf_counter() - started)
+
+    def trace(self, host: str, event_name: str):
+        """Count connection setup and failures reported by httpcore"""
+        with self._lock:
+            if event_name == 'connection.connect_tcp.complete':
+                self.counters['new_connections'] += 1
+                self._host(host)['new_connections'] += 1
+            elif event_name == 'connection.start_tls.complete':
+                self.counters['tls_handshakes'] += 1
+            elif event_name.endswith('.failed'):
+                self.counters['errors'] += 1
+                self._host(host)['errors'] += 1
+
+    @staticmethod
+    def _percentile(values, fraction: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals, connection reuse rate, and per-host request counts and latency (ms)"""
+        with self._lock:
+            requests = self.counters['requests']
+            reused = max(0, requests - self.counters['new_connections'])
+            return {
+                **self.counters,
+                'reused_connections': reused,
+                'reuse_rate': reused / requests if requests else 0.0,
+                'hosts': {
+                    name: {
+                        'requests': host['requests'],
+                        'new_connections': host['new_connections'],
+                        'errors': host['errors'],
+                        'p50_ms': self._percentile(host['latencies'], 0.5) * 1000,
+                        'p95_ms': self._percentile(host['latencies'], 0.95) * 1000,
+                    }
+                    for name, host in self.hosts.items()
+                },
+            }
+
+
+metrics = PoolMetrics()
+
+
+def _client_options() -> Dict[str, Any]:
+    return {
+        'limits': httpx.Limits(max_connections=MAX_CONNECTIONS,
+                               max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                               keepalive_expiry=KEEPALIVE_EXPIRY),
+        'timeout': httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        'http2': HTTP2 == 'on' or (HTTP2 == 'auto' and HTTP2_AVAILABLE),
+        'follow_redirects': True,
+    }
+
+
+def _host_of(request: httpx.Request) -> str:
+    return request.url.host or urlsplit(str(request.url)).netloc
+
+
+def _on_request(request: httpx.Request):
+    host = _host_of(request)
+    request.extensions['trace'] = lambda event_name, info: metrics.trace(host, event_name)
+    metrics.request_started(request)
+
+
+def _on_response(response: httpx.Response):
+    metrics.response_received(response)
+
+
+async def _on_request_async(request: httpx.Request):
+    host = _host_of(request)
+
+    async def trace(event_name, info):
+        metrics.trace(host, event_name)
+
+    request.extensions['trace'] = trace
+    metrics.request_started(request)
+
+
+async def _on_response_async(response: httpx.Response):
+    metrics.response_received(response)
+
+
+_shared_client: Optional[httpx.Client] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide keep-alive client for sync OpenAI clients and page fetches"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None or _shared_client.is_closed:
+            _shared_client = httpx.Client(
+                event_hooks={'request': [_on_request], 'response': [_on_response]},
+                **_client_options()
+            )
+        return _shared_client
+
+
+def make_async_http_client() -> httpx.AsyncClient:
+    """
+    New async client with the shared pool settings and metrics.
+
+    An async connection pool belongs to the event loop it runs on, so each
+    loop (e.g. one bulk classification run) gets its own client and reuses
+    its connections across all of that loop's requests.
+    """
+    return httpx.AsyncClient(
+        event_hooks={'request': [_on_request_async], 'response': [_on_response_async]},
+        **_client_options()
+    )
@@ -0,0 +1,125 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# C Aho-Corasick automaton is optional: pip install pyahocorasick
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# A rule group is an ordered list of (label, keywords). Earlier labels take
+# precedence, matching the if/elif chains the rules were originally written as.
+RuleGroup = Sequence[Tuple[str, Sequence[str]]]
+
+
+def _trie_pattern(keywords: Sequence[str]) -> str:
+    """Build a regex alternation that shares common prefixes between keywords.
+
+    A flat "a|b|c" alternation retries every keyword at every position; the
+    trie form only branches where keywords actually diverge, and the greedy
+    optional suffixes make it prefer the longest keyword at each position.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+@dataclass
+class RuleMatches:
+    """Keywords found in a text, resolved against the engine's rule groups"""
+    keywords: Set[str]
+    groups: Dict[str, RuleGroup] = field(repr=False)
+
+    def labels(self, group: str) -> List[str]:
+        """Labels in the group with at least one keyword hit, in precedence order"""
+        return [
+            label for label, keywords in self.groups[group]
+            if not self.keywords.isdisjoint(keywords)
+        ]
+
+    def first(self, group: str, default: Optional[str] = None) -> Optional[str]:
+        """Highest-precedence label in the group, or default if nothing matched"""
+        for label, keywords in self.groups[group]:
+            if not self.keywords.isdisjoint(keywords):
+                return label
+        return default
+
+    def hit_counts(self, group: str) -> Dict[str, int]:
+        """Number of distinct keyword hits per label in the group"""
+        return {
+            label: sum(keyword in self.keywords for keyword in keywords)
+            for label, keywords in self.groups[group]
+        }
+
+
+class KeywordRuleEngine:
+    """
+    Find every keyword of several rule groups in a single pass over a text.
+
+    Matching is case-insensitive substring matching, the same semantics as the
+    ``any(word in text.lower() for word in keywords)`` checks it replaces.
+    """
+
+    def __init__(self, groups: Dict[str, RuleGroup]):
+        self.groups = {name: [(label, tuple(keywords)) for label, keywords in rules]
+                       for name, rules in groups.items()}
+        self.all_keywords = sorted({
+            keyword for rules in self.groups.values() for _, keywords in rules for keyword in keywords
+        })
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE and self.all_keywords:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.all_keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+
+        # Without the automaton, a prefix-trie regex reports the longest keyword
+        # at each hit position
+        self._pattern = re.compile(_trie_pattern(self.all_keywords) or '(?!)')
+
+        # Any keyword contained in a reported keyword is also present in the text
+        self._implied = {
+            keyword: frozenset(other for other in self.all_keywords if other in keyword)
+            for keyword in self.all_keywords
+        }
+
+    def match(self, text: str) -> RuleMatches:
+        """Return all keyword hits in text"""
+        text_lower = text.lower()
+
+        if self._automaton is not None:
+            found = {keyword for _, keyword in self._automaton.iter(text_lower)}
+        else:
+            found = set()
+            search = self._pattern.search
+            position = 0
+            # Resume one character after each hit's start so overlapping keywords
+            # (e.g. "api" and "issue" in "apissue") are still found
+            while True:
+                hit = search(text_lower, position)
+                if hit is None:
+                    break
+                found |= self._implied[hit.group()]
+                position = hit.start() + 1
+
+        return RuleMatches(keywords=found, groups=self.groups)
+
+    def match_by_scanning(self, text: str) -> RuleMatches:
+        """Reference implementation: one substring scan per keyword"""
+        text_lower = text.lower()
+        found = {keyword for keyword in self.all_keywords if keyword in text_lower}
+        return RuleMatches(keywords=found, groups=self.groups)
@@ -0,0 +1,247 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+# USD per 1K prompt / completion tokens; dated model names match by prefix.
+# Override with LLM_PRICES='{"model": [prompt, completion], ...}'
+MODEL_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4': (0.03, 0.06),
+    'text-embedding-3-small': (0.00002, 0.0),
+    'text-embedding-3-large': (0.00013, 0.0),
+    'text-embedding-ada-002': (0.0001, 0.0),
+}
+MODEL_PRICES.update({model: tuple(prices) for model, prices in json.loads(os.getenv('LLM_PRICES', '{}')).items()})
+
+# Written on exit when set
+DEFAULT_ACCOUNTING_PATH = os.getenv('LLM_ACCOUNTING_PATH', '')
+
+OUTCOMES = ('ok', 'parse_failure', 'rate_limited', 'fallback')
+
+# Latency histogram bucket upper bounds (ms), roughly log-spaced
+LATENCY_BUCKETS_MS = [25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 7500, 10000, 20000, 60000]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of a call (0 for unknown models)"""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(name):
+            prompt_price, completion_price = MODEL_PRICES[name]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+    return 0.0
+
+
+@dataclass
+class CallRecord:
+    operation: str
+    model: str
+    outcome: str
+    latency_ms: float
+    prompt_tokens: int
+    completion_tokens: int
+    cost: float
+    timestamp: float
+
+
+class RollingHistogram:
+    """
+    Latency histogram over the last window_seconds.
+
+    Counts are kept in one slot per slot_seconds; slots older than the window
+    are dropped as time moves on, so percentiles track recent traffic.
+    """
+
+    def __init__(self, bounds: List[float] = LATENCY_BUCKETS_MS, window_seconds: float = 900,
+                 slot_seconds: float = 60):
+        self.bounds = list(bounds)
+        self.slot_seconds = slot_seconds
+        self.num_slots = max(1, int(window_seconds // slot_seconds))
+        self.slots: deque = deque()  # (slot index, bucket counts)
+
+    def _current(self, now: float) -> List[int]:
+        index = int(now // self.slot_seconds)
+        while self.slots and self.slots[0][0] <= index - self.num_slots:
+            self.slots.popleft()
+        if not self.slots or self.slots[-1][0] != index:
+            self.slots.append((index, [0] * (len(self.bounds) + 1)))
+        return self.slots[-1][1]
+
+    def add(self, value: float, now: Optional[float] = None):
+        counts = self._current(time.time() if now is None else now)
+        counts[bisect.bisect_left(self.bounds, value)] += 1
+
+    def counts(self, now: Optional[float] = None) -> List[int]:
+        """Bucket counts over the window; the last bucket is above the highest bound"""
+        self._current(time.time() if now is None else now)
+        return [sum(column) for column in zip(*(counts for _, counts in self.slots))]
+
+    def percentile(self, fraction: float, now: Optional[float] = None) -> float:
+        """Upper bound of the bucket holding the given fraction of values (0 if empty)"""
+        counts = self.counts(now)
+        total = sum(counts)
+        if not total:
+            return 0.0
+        running = 0
+        for bound, count in zip(self.bounds + [float('inf')], counts):
+            running += count
+            if running >= fraction * total:
+                return bound if bound != float('inf') else self.bounds[-1]
+        return self.bounds[-1]
+
+
+class LLMAccounting:
+    """
+    Per-call tokens, latency, outcome and estimated cost of LLM calls.
+
+    Every call is kept (up to max_records) for querying and dumping, and each
+    operation ("classify", "classify_packed", "rag_answer", ...) aggregates
+    lifetime totals plus a rolling latency histogram. Work items such as
+    tickets are counted separately, so the cost of every operation that
+    served them can be divided by how many there were.
+    """
+
+    def __init__(self, max_records: int = 10000, window_seconds: float = 900):
+        self.records: deque = deque(maxlen=max_records)
+        self.window_seconds = window_seconds
+        self.operations: Dict[str, Dict[str, Any]] = {}
+        self.items: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, model: str, latency: float, outcome: str = 'ok',
+               usage: Any = None) -> CallRecord:
+        """Account one call; usage is the response's usage object or None"""
+        prompt_tokens = int(getattr(usage, 'prompt_tokens', 0) or 0)
+        completion_tokens = int(getattr(usage, 'completion_tokens', 0) or 0)
+        call = CallRecord(
+            operation=operation,
+            model=model,
+            outcome=outcome,
+            latency_ms=latency * 1000,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost=estimate_cost(model, prompt_tokens, completion_tokens),
+            timestamp=time.time(),
+        )
+
+        with self._lock:
+            self.records.append(call)
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = {
+                    'calls': 0,
+                    'outcomes': {name: 0 for name in OUTCOMES},
+                    'prompt_tokens': 0,
+                    'completion_tokens': 0,
+                    'cost': 0.0,
+                    'latency': RollingHistogram(window_seconds=self.window_seconds),
+                }
+            stats['calls'] += 1
+            stats['outcomes'][outcome] = stats['outcomes'].get(outcome, 0) + 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens
+            stats['cost'] += call.cost
+            stats['latency'].add(call.latency_ms, call.timestamp)
+        return call
+
+    def record_call(self, operation: str, model: str, started: float, response: Any = None,
+                    error: Optional[Exception] = None, outcome: Optional[str] = None) -> CallRecord:
+        """
+        Account a call that began at time.perf_counter() == started.
+
+        Without an explicit outcome, an error counts as rate_limited (HTTP 429)
+        or fallback, and a response as ok.
+        """
+        if outcome is None:
+            if error is not None:
+                outcome = 'rate_limited' if getattr(error, 'status_code', None) == 429 else 'fallback'
+            else:
+                outcome = 'ok'
+        return self.record(operation, model, time.perf_counter() - started, outcome,
+                           getattr(response, 'usage', None))
+
+    def count_items(self, kind: str, count: int = 1):
+        """Count work items of a kind, e.g. "tickets" classified"""
+        with self._lock:
+            self.items[kind] = self.items.get(kind, 0) + count
+
+    def cost_per_item(self, kind: str, operations: Iterable[str]) -> float:
+        """Total cost of the given operations divided by the items of kind counted (0 if none)"""
+        with self._lock:
+            items = self.items.get(kind, 0)
+            cost = sum(self.operations[name]['cost'] for name in operations if name in self.operations)
+        return cost / items if items else 0.0
+
+    def summary(self, operation: Optional[str] = None) -> Dict[str, Any]:
+        """Totals and rolling latency percentiles per operation, or for one operation"""
+        with self._lock:
+            names = [operation] if operation is not None else list(self.operations)
+            result = {}
+            for name in names:
+                stats = self.operations.get(name)
+                if stats is None:
+                    result[name] = {'calls': 0, 'outcomes': {}, 'prompt_tokens': 0, 'completion_tokens': 0,
+                                    'cost': 0.0, 'cost_per_call': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0,
+                                    'p99_ms': 0.0, 'histogram': {}}
+                    continue
+                histogram = stats['latency']
+                counts = histogram.counts()
+                labels = [f"<={bound}ms" for bound in histogram.bounds] + [f">{histogram.bounds[-1]}ms"]
+                result[name] = {
+                    'calls': stats['calls'],
+                    'outcomes': dict(stats['outcomes']),
+                    'prompt_tokens': stats['prompt_tokens'],
+                    'completion_tokens': stats['completion_tokens'],
+                    'cost': stats['cost'],
+                    'cost_per_call': stats['cost'] / stats['calls'],
+                    'p50_ms': histogram.percentile(0.5),
+                    'p95_ms': histogram.percentile(0.95),
+                    'p99_ms': histogram.percentile(0.99),
+                    'histogram': {label: count for label, count in zip(labels, counts) if count},
+                }
+        return result[operation] if operation is not None else result
+
+    def calls(self, operation: Optional[str] = None, outcome: Optional[str] = None,
+              since: Optional[float] = None) -> List[CallRecord]:
+        """Recorded calls, optionally filtered by operation, outcome and start time"""
+        with self._lock:
+            records = list(self.records)
+        return [call for call in records
+                if (operation is None or call.operation == operation)
+                and (outcome is None or call.outcome == outcome)
+                and (since is None or call.timestamp >= since)]
+
+    def dump(self, path: str):
+        """Write the summary and every recorded call as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(), 'items': dict(self.items),
+                       'calls': [asdict(call) for call in self.calls()]}, f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self.operations.clear()
+            self.items.clear()
+
+
+_default_accounting: Optional[LLMAccounting] = None
+_default_accounting_lock = threading.Lock()
+
+
+def get_accounting() -> LLMAccounting:
+    """Process-wide accounting, dumped to LLM_ACCOUNTING_PATH on exit when set"""
+    global _default_accounting
+    with _default_accounting_lock:
+        if _default_accounting is None:
+            _default_accounting = LLMAccounting()
+            if DEFAULT_ACCOUNTING_PATH:
+                atexit.register(_default_accounting.dump, DEFAULT_ACCOUNTING_PATH)
+        return _default_accounting
@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Mapping, Optional
+
+import httpx
+import openai
+
+# "live" calls the API, "record" calls it and saves every exchange, "replay" serves
+# saved exchanges without network access
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'live')
+LLM_STORE_PATH = os.getenv('LLM_STORE_PATH', 'llm_recordings.jsonl')
+
+# Replay fault injection
+REPLAY_LATENCY_MS = float(os.getenv('LLM_REPLAY_LATENCY_MS', '0'))
+REPLAY_JITTER_MS = float(os.getenv('LLM_REPLAY_JITTER_MS', '0'))
+REPLAY_ERROR_RATE = float(os.getenv('LLM_REPLAY_ERROR_RATE', '0'))
+REPLAY_TIMEOUT_RATE = float(os.getenv('LLM_REPLAY_TIMEOUT_RATE', '0'))
+
+ENDPOINTS = {
+    'chat': "https://api.openai.com/v1/chat/completions",
+    'embeddings': "https://api.openai.com/v1/embeddings",
+}
+
+
+class ReplayMiss(LookupError):
+    """Raised when replaying a request that was never recorded"""
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable hash of an API request's parameters"""
+    payload = json.dumps({'kind': kind, **request}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _to_dict(response: Any) -> Dict[str, Any]:
+    if hasattr(response, 'model_dump'):
+        return response.model_dump(mode='json')
+    return json.loads(json.dumps(response, default=lambda value: vars(value)))
+
+
+def _from_dict(kind: str, data: Dict[str, Any]) -> Any:
+    if kind == 'embeddings':
+        from openai.types import CreateEmbeddingResponse
+        return CreateEmbeddingResponse.model_validate(data)
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion.model_validate(data)
+
+
+def chat_response(content: str, model: str = "replay") -> Dict[str, Any]:
+    """A chat completion payload with a single assistant reply, as stored by the recorder"""
+    return {
+        'id': f"chatcmpl-replay-{hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]}",
+        'object': 'chat.completion',
+        'created': 0,
+        'model': model,
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+    }
+
+
+class RecordingStore:
+    """JSONL file of recorded request/response pairs, keyed by request_key"""
+
+    def __init__(self, path: str = LLM_STORE_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['key']] = entry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put(self, kind: str, request: Dict[str, Any], response: Dict[str, Any],
+            headers: Optional[Dict[str, str]] = None) -> str:
+        key = request_key(kind, request)
+        entry = {'key': key, 'kind': kind, 'request': request, 'response': response, 'headers': headers or {}}
+        with self._lock:
+            self.entries[key] = entry
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+        return key
+
+
+class RawResponse:
+    """Stands in for the SDK's raw response: the parsed body plus the HTTP headers"""
+
+    def __init__(self, response: Any, headers: Optional[Dict[str, str]] = None):
+        self._response = response
+        self.headers = httpx.Headers(headers or {})
+
+    def parse(self) -> Any:
+        return self._response
+
+
+class _Resource:
+    """Stands in for client.chat.completions or client.embeddings"""
+
+    def __init__(self, backend, kind: str, raw: bool = False):
+        self._backend = backend
+        self._kind = kind
+        self._raw = raw
+
+    @property
+    def with_raw_response(self) -> '_Resource':
+        return _Resource(self._backend, self._kind, raw=True)
+
+    def create(self, **request):
+        return self._backend._create(self._kind, request, self._raw)
+
+
+class _Backend:
+    """Client-shaped wrapper: exposes chat.completions.create and embeddings.create"""
+
+    def __init__(self, is_async: bool = False):
+        self.is_async = is_async
+        self.chat = SimpleNamespace(completions=_Resource(self, 'chat'))
+        self.embeddings = _Resource(self, 'embeddings')
+
+    def _create(self, kind: str, request: Dict[str, Any], raw: bool = False):
+        if self.is_async:
+            return self._create_async(kind, request, raw)
+        return self._create_sync(kind, request, raw)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+        return False
+
+    async def close(self):
+        pass
+
+
+class RecordingClient(_Backend):
+    """
+    Passes requests to a real client and saves each successful exchange.
+
+    Raw-response calls (as made by the OpenAI scheduler) go through the real
+    client's with_raw_response, so its rate-limit headers reach the caller
+    and are saved alongside the response.
+    """
+
+    def __init__(self, client, store: RecordingStore, is_async: bool = False):
+        super().__init__(is_async)
+        self.client = client
+        self.store = store
+
+    def _real_resource(self, kind: str):
+        return self.client.chat.completions if kind == 'chat' else self.client.embeddings
+
+    def _record(self, kind: str, request: Dict[str, Any], response: Any, headers: Optional[Mapping[str, str]],
+                raw: bool):
+        self.store.put(kind, request, _to_dict(response), dict(headers or {}))
+        return RawResponse(response, dict(headers or {})) if raw else response
+
+    def _create_sync(self, kind: str, request: Dict[str, Any], raw: bool = False):
+        resource = self._real_resource(kind)
+        raw_api = getattr(resource, 'with_raw_response', None) if raw else None
+        if raw_api is not None:
+            raw_response = raw_api.create(**request)
+            return self._record(kind, request, raw_response.parse(), raw_response.headers, raw)
+        return self._record(kind, request, resource.create(**request), None, raw)
+
+    async def _create_async(self, kind: str, request: Dict[str, Any], raw: bool = False):
+        resource = self._real_resource(kind)
+        raw_api = getattr(resource, 'with_raw_response', None) if raw else None
+        if raw_api is not None:
+            raw_response = await raw_api.create(**request)
+            response = raw_response.parse()
+            if inspect.isawaitable(response):
+                response = await response
+            return self._record(kind, request, response, raw_response.headers, raw)
+        return self._record(kind, request, await resource.create(**request), None, raw)
+
+    async def close(self):
+        if hasattr(self.client, 'close'):
+            result = self.client.close()
+            if asyncio.iscoroutine(result):
+                await result
+
+
+class ReplayClient(_Backend):
+    """
+    Serves recorded responses with injected latency and failures.
+
+    Each request waits latency plus up to jitter seconds, then fails with a
+    simulated 429 (error_rate) or timeout (timeout_rate), or returns its
+    recording. Failures are drawn from a generator seeded by the request and
+    its attempt number, so a run is reproducible regardless of concurrency.
+    Raw-response calls also get the headers saved with the recording.
+    Unrecorded requests raise ReplayMiss unless default_reply builds a reply
+    content from the request.
+    """
+
+    def __init__(self, store: RecordingStore, latency: float = REPLAY_LATENCY_MS / 1000,
+                 jitter: float = REPLAY_JITTER_MS / 1000, error_rate: float = REPLAY_ERROR_RATE,
+                 timeout_rate: float = REPLAY_TIMEOUT_RATE, seed: int = 0,
+                 default_reply: Optional[Callable[[Dict[str, Any]], str]] = None, is_async: bool = False):
+        super().__init__(is_async)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.seed = seed
+        self.default_reply = default_reply
+        self.attempts: Dict[str, int] = {}
+        self.counters = {'served': 0, 'synthesized': 0, 'misses': 0, 'rate_limited': 0, 'timeouts': 0}
+        self._lock = threading.Lock()
+
+    def _plan(self, kind: str, request: Dict[str, Any]):
+        """Delay and outcome ('ok', 'rate_limited' or 'timeout') for this attempt"""
+        key = request_key(kind, request)
+        with self._lock:
+            attempt = self.attempts.get(key, 0)
+            self.attempts[key] = attempt + 1
+        rng = random.Random(f"{self.seed}:{key}:{attempt}")
+        delay = self.latency + rng.uniform(0, self.jitter)
+        draw = rng.random()
+        if draw < self.error_rate:
+            return key, delay, 'rate_limited'
+        if draw < self.error_rate + self.timeout_rate:
+            return key, delay, 'timeout'
+        return key, delay, 'ok'
+
+    def _respond(self, kind: str, key: str, outcome: str, request: Dict[str, Any], raw: bool = False):
+        http_request = httpx.Request('POST', ENDPOINTS[kind])
+        if outcome == 'rate_limited':
+            with self._lock:
+                self.counters['rate_limited'] += 1
+            raise openai.RateLimitError("Simulated rate limit (replay)",
+                                        response=httpx.Response(429, request=http_request), body=None)
+        if outcome == 'timeout':
+            with self._lock:
+                self.counters['timeouts'] += 1
+            raise openai.APITimeoutError(request=http_request)
+
+        entry = self.store.get(key)
+        if entry is not None:
+            with self._lock:
+                self.counters['served'] += 1
+            response = _from_dict(kind, entry['response'])
+            return RawResponse(response, entry.get('headers')) if raw else response
+        if self.default_reply is not None and kind == 'chat':
+            with self._lock:
+                self.counters['synthesized'] += 1
+            response = _from_dict(kind, chat_response(self.default_reply(request), request.get('model', 'replay')))
+            return RawResponse(response) if raw else response
+        with self._lock:
+            self.counters['misses'] += 1
+        raise ReplayMiss(f"No recording for {kind} request {key[:12]}")
+
+    def _create_sync(self, kind: str, request: Dict[str, Any], raw: bool = False):
+        key, delay, outcome = self._plan(kind, request)
+        time.sleep(delay)
+        return self._respond(kind, key, outcome, request, raw)
+
+    async def _create_async(self, kind: str, request: Dict[str, Any], raw: bool = False):
+        key, delay, outcome = self._plan(kind, request)
+        await asyncio.sleep(delay)
+        return self._respond(kind, key, outcome, request, raw)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters)
+
+
+_stores: Dict[str, RecordingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = LLM_STORE_PATH) -> RecordingStore:
+    """Process-wide store per path, so every client records into and replays from one place"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = RecordingStore(path)
+        return _stores[path]
+
+
+def make_client(factory: Callable[[], Any], is_async: bool = False, backend: Optional[str] = None):
+    """
+    Client for the LLM_BACKEND mode.
+
+    factory builds the real OpenAI client; replay never calls it, so no API
+    key or network is needed.
+    """
+    backend = backend or LLM_BACKEND
+    if backend == 'live':
+        return factory()
+    if backend == 'record':
+        return RecordingClient(factory(), get_store(), is_async=is_async)
+    if backend == 'replay':
+        return ReplayClient(get_store(), is_async=is_async)
+    raise ValueError(f"Unknown LLM backend: {backend}")
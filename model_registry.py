@@ -0,0 +1,180 @@
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Process-wide registry of loaded models and indexes.
+#
+# Streamlit runs every browser session in its own thread of the same process,
+# so anything stored in st.session_state is duplicated per session. Models
+# registered here are loaded once and the same handle is given to every session.
+
+_models: Dict[Hashable, Any] = {}
+_load_rss_bytes: Dict[Hashable, int] = {}
+_sessions: set = set()
+_lock = threading.RLock()
+
+
+def _current_rss_bytes() -> int:
+    """Resident set size of this process in bytes (0 if unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        import sys
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def get_shared(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Return the shared instance for key, creating it with factory on first use.
+
+    Loads are serialized so concurrent sessions asking for the same model wait
+    for a single load instead of each starting their own, and so the resident
+    memory added by each load can be attributed to it.
+    """
+    instance = _models.get(key)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        instance = _models.get(key)
+        if instance is None:
+            rss_before = _current_rss_bytes()
+            instance = factory()
+            _load_rss_bytes[key] = max(0, _current_rss_bytes() - rss_before)
+            _models[key] = instance
+        return instance
+
+
+def _api_key_fingerprint(api_key: Optional[str]) -> str:
+    """Short hash so clients built from different keys are not shared"""
+    key = api_key or os.getenv('OPENAI_API_KEY') or ''
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]
+
+
+def get_ticket_classifier(api_key: Optional[str] = None):
+    """Shared OpenAI-backed TicketClassifier"""
+    from ticket_classifier import TicketClassifier
+    from classification_cache import get_default_cache
+    return get_shared(
+        ('ticket_classifier', _api_key_fingerprint(api_key)),
+        lambda: TicketClassifier(api_key, cache=get_default_cache())
+    )
+
+
+def get_openai_rag_pipeline(api_key: Optional[str] = None):
+    """Shared OpenAI-backed rag_pipeline.AtlanRAGPipeline"""
+    from rag_pipeline import AtlanRAGPipeline
+    return get_shared(
+        ('rag_pipeline', _api_key_fingerprint(api_key)),
+        lambda: AtlanRAGPipeline(api_key)
+    )
+
+
+def get_atlan_classifier(topic_backend: str = "zero-shot", inference_backend: str = "pytorch",
+                         cascade_threshold: Optional[float] = None):
+    """Shared Hugging Face AtlanTicketClassifier"""
+    from classifier import AtlanTicketClassifier
+    from classification_cache import get_default_cache
+    return get_shared(
+        ('atlan_classifier', topic_backend, inference_backend, cascade_threshold),
+        lambda: AtlanTicketClassifier(
+            topic_backend=topic_backend, inference_backend=inference_backend, cache=get_default_cache(),
+            cascade_threshold=cascade_threshold
+        )
+    )
+
+
+def get_sentence_encoder(model_name: str = 'all-MiniLM-L6-v2'):
+    """Shared SentenceTransformer (the embedding topic backend and rag_corrected use the same one)"""
+    from sentence_transformers import SentenceTransformer
+    return get_shared(('sentence_encoder', model_name), lambda: SentenceTransformer(model_name))
+
+
+def get_vector_rag_pipeline():
+    """Shared rag_corrected.AtlanRAGPipeline (MiniLM embedder plus FAISS index)"""
+    from rag_corrected import AtlanRAGPipeline
+    return get_shared(('rag_corrected',), AtlanRAGPipeline)
+
+
+def _fetch_documentation(url: str) -> str:
+    """Visible text of a documentation page, through the shared revalidating page cache"""
+    from doc_cache import get_default_doc_cache
+    from html_extract import extract_text, resolve_backend
+    from http_pool import get_http_client
+    try:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        return get_default_doc_cache().fetch(url, get_http_client(), extract_text,
+                                             extractor=f'prefetch:{resolve_backend()}',
+                                             headers=headers, timeout=10)
+    except Exception as e:
+        print(f"⚠️ Failed to fetch {url}: {e}")
+        return ""
+
+
+def get_doc_prefetcher():
+    """
+    Shared documentation prefetcher.
+
+    Pipelines add their URLs to it rather than each running a worker thread
+    and holding its own copy of every page. It is started by the first
+    pipeline built with prefetching on.
+    """
+    from doc_prefetcher import DocPrefetcher
+    return get_shared(('doc_prefetcher',), lambda: DocPrefetcher([], _fetch_documentation))
+
+
+def register_session(session_id: Hashable):
+    """Record a session that uses the shared models"""
+    with _lock:
+        _sessions.add(session_id)
+
+
+def _key_name(key: Hashable) -> str:
+    """Readable name for a registry key"""
+    if isinstance(key, tuple):
+        return '/'.join(str(part) for part in key)
+    return str(key)
+
+
+def memory_report() -> Dict[str, Any]:
+    """
+    Report memory held by shared models and what sharing saves.
+
+    Every session beyond the first would otherwise have loaded its own copy
+    of each model, so the saving is the per-session footprint times the
+    number of extra sessions.
+    """
+    with _lock:
+        per_model_mb = {
+            _key_name(key): rss / (1024 * 1024)
+            for key, rss in _load_rss_bytes.items()
+        }
+        per_session_mb = sum(per_model_mb.values())
+        sessions = len(_sessions)
+
+    return {
+        'models': per_model_mb,
+        'sessions': sessions,
+        'saved_per_extra_session_mb': per_session_mb,
+        'total_saved_mb': per_session_mb * max(0, sessions - 1),
+    }
+
+
+def clear():
+    """Drop all shared instances (for tests and manual reloads)"""
+    with _lock:
+        _models.clear()
+        _load_rss_bytes.clear()
+        _sessions.clear()
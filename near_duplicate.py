@@ -0,0 +1,186 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from llm_accounting import LLMAccounting, get_accounting
+from openai_scheduler import OpenAIScheduler, get_scheduler
+
+# Cosine similarity at or above which a recent ticket's classification is reused
+DEFAULT_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.92'))
+# How long a classified ticket stays eligible for reuse
+DEFAULT_WINDOW_SECONDS = float(os.getenv('NEAR_DUPLICATE_WINDOW_SECONDS', '1800'))
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+def openai_embedder(client, model: Optional[str] = None, accounting: Optional[LLMAccounting] = None,
+                    scheduler: Optional[OpenAIScheduler] = None) -> Embedder:
+    """
+    Embed texts with an OpenAI embeddings model (OPENAI_EMBEDDING_MODEL by default).
+
+    Requests go through the shared OpenAI scheduler, so they are rate-limited,
+    retried and counted against tokens/min like chat requests, and are
+    accounted as the "embed" operation.
+    """
+    model = model or os.getenv('OPENAI_EMBEDDING_MODEL', 'text-embedding-ada-002')
+    accounting = accounting or get_accounting()
+    scheduler = scheduler or get_scheduler()
+
+    def embed(texts: List[str]) -> np.ndarray:
+        started = time.perf_counter()
+        try:
+            response = scheduler.embedding(client, model=model, input=texts)
+        except Exception as e:
+            accounting.record_call('embed', model, started, error=e)
+            raise
+        accounting.record_call('embed', model, started, response)
+        return np.array([item.embedding for item in response.data], dtype=np.float32)
+
+    return embed
+
+
+def hashing_embedder(dimensions: int = 1024) -> Embedder:
+    """
+    Embed texts locally as hashed word and character-trigram counts.
+
+    No model or API call; catches reworded copies that share most of their
+    wording, not paraphrases.
+    """
+    def embed(texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r'[a-z0-9]+', text.lower())
+            features = words + [f"#{word[i:i + 3]}" for word in words for i in range(max(1, len(word) - 2))]
+            for feature in features:
+                vectors[row, zlib.crc32(feature.encode('utf-8')) % dimensions] += 1.0
+        return vectors
+
+    return embed
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class NearDuplicateIndex:
+    """
+    In-memory approximate nearest-neighbour index of recently classified tickets.
+
+    Vectors are bucketed by random-hyperplane LSH: each of num_tables tables
+    hashes a vector to the signs of num_planes projections, so vectors with
+    high cosine similarity usually share a bucket in at least one table. Only
+    bucket-mates are compared exactly. Entries older than window_seconds, or
+    beyond max_entries, are dropped oldest first.
+    """
+
+    def __init__(self, embed: Embedder, threshold: float = DEFAULT_THRESHOLD,
+                 window_seconds: float = DEFAULT_WINDOW_SECONDS, num_planes: int = 8, num_tables: int = 8,
+                 max_entries: int = 5000, seed: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.embed = embed
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.num_planes = num_planes
+        self.num_tables = num_tables
+        self.max_entries = max_entries
+        self.seed = seed
+        self.clock = clock
+
+        self._planes: Optional[np.ndarray] = None  # (num_tables * num_planes, dimensions), built on first vector
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(num_tables)]
+        self._entries: Dict[int, Tuple[float, np.ndarray, Tuple[int, ...], Any]] = {}
+        self._order: deque = deque()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.counters = {'lookups': 0, 'reused': 0, 'added': 0, 'expired': 0, 'compared': 0, 'embed_errors': 0}
+
+    def embed_texts(self, texts: Sequence[str]) -> Optional[np.ndarray]:
+        """Unit-length embeddings of texts, or None if the embedder failed"""
+        try:
+            return _normalize_rows(np.asarray(self.embed(list(texts)), dtype=np.float32))
+        except Exception as e:
+            with self._lock:
+                self.counters['embed_errors'] += 1
+            print(f"⚠️ Near-duplicate embedding failed: {e}")
+            return None
+
+    def _signatures(self, vector: np.ndarray) -> Tuple[int, ...]:
+        if self._planes is None:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.num_tables * self.num_planes, vector.shape[0])).astype(np.float32)
+        bits = (self._planes @ vector > 0).reshape(self.num_tables, self.num_planes)
+        weights = 1 << np.arange(self.num_planes)
+        return tuple(int(signature) for signature in bits @ weights)
+
+    def _expire(self, now: float):
+        while self._order and (len(self._order) > self.max_entries or
+                               self._entries[self._order[0]][0] < now - self.window_seconds):
+            entry_id = self._order.popleft()
+            _, _, signatures, _ = self._entries.pop(entry_id)
+            for table, signature in zip(self._tables, signatures):
+                bucket = table[signature]
+                bucket.remove(entry_id)
+                if not bucket:
+                    del table[signature]
+            self.counters['expired'] += 1
+
+    def find(self, vector: np.ndarray) -> Optional[Tuple[Any, float]]:
+        """The payload of the most similar live entry at or above threshold, with its similarity"""
+        with self._lock:
+            self.counters['lookups'] += 1
+            self._expire(self.clock())
+            if not self._entries:
+                return None
+
+            candidates = set()
+            for table, signature in zip(self._tables, self._signatures(vector)):
+                candidates.update(table.get(signature, ()))
+            self.counters['compared'] += len(candidates)
+
+            best_id, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                similarity = float(self._entries[entry_id][1] @ vector)
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None:
+                return None
+            self.counters['reused'] += 1
+            return self._entries[best_id][3], best_similarity
+
+    def add(self, vector: np.ndarray, payload: Any):
+        """Remember payload under vector for reuse by later near-duplicates"""
+        with self._lock:
+            now = self.clock()
+            signatures = self._signatures(vector)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (now, vector, signatures, payload)
+            self._order.append(entry_id)
+            for table, signature in zip(self._tables, signatures):
+                table.setdefault(signature, []).append(entry_id)
+            self.counters['added'] += 1
+            self._expire(now)
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookups, calls avoided, and live entries"""
+        with self._lock:
+            self._expire(self.clock())
+            lookups = self.counters['lookups']
+            return {
+                **self.counters,
+                'calls_avoided': self.counters['reused'],
+                'reuse_rate': self.counters['reused'] / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._tables = [{} for _ in range(self.num_tables)]
+            self._entries.clear()
+            self._order.clear()
@@ -0,0 +1,75 @@
+import os
+import platform
+from pathlib import Path
+from transformers import AutoTokenizer, pipeline
+
+# ONNX Runtime support is optional: pip install "optimum[onnxruntime]"
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+DEFAULT_CACHE_DIR = os.getenv('ONNX_CACHE_DIR', '.onnx_cache')
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+def _artifact_dir(model_id: str, cache_dir: str) -> Path:
+    """Directory holding the exported artifacts for a model"""
+    return Path(cache_dir) / model_id.replace('/', '__')
+
+
+def _quantization_config():
+    """Dynamic int8 quantization config for the current CPU"""
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+
+
+def export_quantized_model(model_id: str, cache_dir: str = DEFAULT_CACHE_DIR) -> Path:
+    """
+    Export a sequence classification model to ONNX and quantize it to int8.
+
+    Artifacts are cached on disk, so the export only runs the first time a
+    model is requested.
+
+    Returns:
+        Directory containing the quantized model, config and tokenizer
+    """
+    if not ONNX_AVAILABLE:
+        raise ImportError("ONNX backend requires: pip install \"optimum[onnxruntime]\"")
+
+    target_dir = _artifact_dir(model_id, cache_dir)
+    if (target_dir / QUANTIZED_FILE_NAME).exists():
+        return target_dir
+
+    print(f"🔄 Exporting {model_id} to ONNX (one-time)...")
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+    model.save_pretrained(target_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(target_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(save_dir=target_dir, quantization_config=_quantization_config())
+
+    print(f"✅ Quantized model cached at {target_dir}")
+    return target_dir
+
+
+def load_onnx_pipeline(task: str, model_id: str, cache_dir: str = DEFAULT_CACHE_DIR):
+    """
+    Build a Hugging Face pipeline served by the int8 ONNX Runtime model.
+
+    The returned object is called exactly like the PyTorch pipeline for the
+    same task, so callers do not need to know which backend is in use.
+    """
+    model_dir = export_quantized_model(model_id, cache_dir)
+
+    model = ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=QUANTIZED_FILE_NAME
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    return pipeline(task, model=model, tokenizer=tokenizer)
@@ -0,0 +1,324 @@
+import asyncio
+import inspect
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+# Error codes that fail the same way however long we wait (429 insufficient_quota)
+NON_RETRYABLE_ERROR_CODES = {'insufficient_quota', 'billing_hard_limit_reached'}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request could not be sent successfully before its deadline"""
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse rate-limit reset durations such as "1s", "6m0s" or "20ms" into seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if not parts:
+        return None
+    scale = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at capacity per minute.
+
+    Reservations are taken immediately and may drive the balance negative;
+    the caller then waits until the refill has paid the debt back, so waiting
+    requests are served in arrival order.
+    """
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.configured_capacity = self.capacity
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount tokens and return the seconds to wait before using them"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, amount: float):
+        """Return (positive) or charge (negative) tokens after the fact"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], reset_seconds: Optional[float]):
+        """Align with the limit and remaining budget the server reported (never above the configured limit)"""
+        self._refill(time.monotonic())
+        if limit:
+            self.capacity = min(limit, self.configured_capacity)
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+            # Drained: wait out the server's reset time rather than our estimate
+            if remaining <= 0 and reset_seconds:
+                self.tokens = -reset_seconds * self.rate
+
+
+class OpenAIScheduler:
+    """
+    Shared gate for OpenAI API calls.
+
+    Every request first reserves one request and its estimated tokens from
+    requests/min and tokens/min buckets, which are kept in line with the
+    x-ratelimit-* response headers. Rate-limited and transient failures are
+    retried with jittered exponential backoff until the request's deadline,
+    after which the last error is raised so callers can fall back.
+    """
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 200000,
+                 deadline_seconds: float = 60.0, base_delay: float = 0.5, max_delay: float = 20.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.deadline_seconds = deadline_seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.counters = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'deadline_exceeded': 0}
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(request: Mapping[str, Any]) -> int:
+        """Rough token cost of a chat request: prompt characters / 4 plus the completion cap"""
+        prompt_chars = sum(len(str(message.get('content', ''))) for message in request.get('messages', []))
+        return prompt_chars // 4 + int(request.get('max_tokens') or 256)
+
+    @staticmethod
+    def estimate_embedding_tokens(request: Mapping[str, Any]) -> int:
+        """Rough token cost of an embeddings request: input characters / 4"""
+        inputs = request.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return sum(len(str(text)) for text in inputs) // 4 + 1
+
+    def _reserve(self, estimated_tokens: int, deadline: float, last_error: Optional[Exception]) -> float:
+        """Reserve a request and its tokens; raises, giving them back, if the wait would overrun the deadline"""
+        with self._lock:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        try:
+            self._check_wait(wait, deadline, last_error)
+        except Exception:
+            with self._lock:
+                self.requests.adjust(1)
+                self.tokens.adjust(estimated_tokens)
+            raise
+        return wait
+
+    def _record_response(self, headers: Optional[Mapping[str, str]], estimated_tokens: int, usage: Any):
+        """Sync buckets with rate-limit headers and charge actual token usage"""
+        with self._lock:
+            self.counters['requests'] += 1
+            if usage is not None and getattr(usage, 'total_tokens', None):
+                self.tokens.adjust(estimated_tokens - usage.total_tokens)
+            if not headers:
+                return
+
+            def number(name: str) -> Optional[float]:
+                try:
+                    return float(headers.get(name))
+                except (TypeError, ValueError):
+                    return None
+
+            self.requests.sync(number('x-ratelimit-limit-requests'), number('x-ratelimit-remaining-requests'),
+                               _parse_duration(headers.get('x-ratelimit-reset-requests')))
+            self.tokens.sync(number('x-ratelimit-limit-tokens'), number('x-ratelimit-remaining-tokens'),
+                             _parse_duration(headers.get('x-ratelimit-reset-tokens')))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying error, or None if it is not retryable"""
+        status_code = getattr(error, 'status_code', None)
+        connection_error = type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
+        if not connection_error and (status_code is None or
+                                     (status_code not in RETRYABLE_STATUS_CODES and status_code < 500)):
+            return None
+
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        # An exhausted quota or billing limit does not recover by waiting
+        if getattr(error, 'code', None) in NON_RETRYABLE_ERROR_CODES:
+            return None
+        if str(headers.get('x-should-retry', '')).lower() == 'false':
+            return None
+
+        if status_code == 429:
+            with self._lock:
+                self.counters['rate_limited'] += 1
+
+        # Honour the server's hint when it gives one, otherwise full-jitter backoff
+        retry_after = _parse_duration(headers.get('retry-after'))
+        if headers.get('retry-after-ms'):
+            retry_after = _parse_duration(headers['retry-after-ms'] + 'ms')
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _queue(self, change: int):
+        """Move a request into (+1) or out of (-1) the waiting queue; out of the queue is in flight"""
+        with self._lock:
+            self.queue_depth += change
+            self.in_flight -= change
+
+    def _deadline(self, deadline_seconds: Optional[float]) -> float:
+        return time.monotonic() + (deadline_seconds if deadline_seconds is not None else self.deadline_seconds)
+
+    def _backoff(self, error: Exception, attempt: int, estimated_tokens: int, deadline: float) -> float:
+        """Delay before retrying error; re-raises it if not retryable or past the deadline"""
+        delay = self._retry_delay(error, attempt)
+        if delay is None:
+            raise error
+        with self._lock:
+            self.counters['retries'] += 1
+            self.tokens.adjust(estimated_tokens)  # Nothing was consumed
+        self._check_wait(delay, deadline, error)
+        return delay
+
+    def _check_wait(self, wait: float, deadline: float, last_error: Optional[Exception]):
+        """Raise if waiting would overrun the deadline"""
+        if time.monotonic() + wait > deadline:
+            with self._lock:
+                self.counters['deadline_exceeded'] += 1
+            if last_error is not None:
+                raise last_error
+            raise DeadlineExceeded(f"Rate limit wait of {wait:.1f}s exceeds the request deadline")
+        if wait > 0:
+            with self._lock:
+                self.throttled_seconds += wait
+
+    def chat_completion(self, client, deadline_seconds: Optional[float] = None, **request) -> Any:
+        """Create a chat completion on a sync client, throttled and retried until the deadline"""
+        return self._create(client.chat.completions, self.estimate_tokens(request), deadline_seconds, request)
+
+    def embedding(self, client, deadline_seconds: Optional[float] = None, **request) -> Any:
+        """Create embeddings on a sync client, throttled and retried until the deadline"""
+        return self._create(client.embeddings, self.estimate_embedding_tokens(request), deadline_seconds, request)
+
+    def _create(self, resource, estimated_tokens: int, deadline_seconds: Optional[float],
+                request: Mapping[str, Any]) -> Any:
+        """Call resource.create(**request) under the rate limits, retrying until the deadline"""
+        deadline = self._deadline(deadline_seconds)
+        raw_api = getattr(resource, 'with_raw_response', None)
+        last_error = None
+
+        with self._lock:
+            self.queue_depth += 1
+        try:
+            for attempt in itertools.count():
+                wait = self._reserve(estimated_tokens, deadline, last_error)
+                time.sleep(wait)
+
+                self._queue(-1)
+                try:
+                    if raw_api is not None:
+                        raw = raw_api.create(**request)
+                        response, headers = raw.parse(), raw.headers
+                    else:
+                        response, headers = resource.create(**request), None
+                except Exception as e:
+                    last_error = e
+                else:
+                    self._record_response(headers, estimated_tokens, getattr(response, 'usage', None))
+                    return response
+                finally:
+                    self._queue(+1)
+
+                time.sleep(self._backoff(last_error, attempt, estimated_tokens, deadline))
+        finally:
+            with self._lock:
+                self.queue_depth -= 1
+
+    async def chat_completion_async(self, client, deadline_seconds: Optional[float] = None, **request) -> Any:
+        """Create a chat completion on an async client, throttled and retried until the deadline"""
+        deadline = self._deadline(deadline_seconds)
+        estimated_tokens = self.estimate_tokens(request)
+        completions = client.chat.completions
+        raw_api = getattr(completions, 'with_raw_response', None)
+        last_error = None
+
+        with self._lock:
+            self.queue_depth += 1
+        try:
+            for attempt in itertools.count():
+                wait = self._reserve(estimated_tokens, deadline, last_error)
+                await asyncio.sleep(wait)
+
+                self._queue(-1)
+                try:
+                    if raw_api is not None:
+                        raw = await raw_api.create(**request)
+                        response, headers = raw.parse(), raw.headers
+                        if inspect.isawaitable(response):
+                            response = await response
+                    else:
+                        response, headers = await completions.create(**request), None
+                except Exception as e:
+                    last_error = e
+                else:
+                    self._record_response(headers, estimated_tokens, getattr(response, 'usage', None))
+                    return response
+                finally:
+                    self._queue(+1)
+
+                await asyncio.sleep(self._backoff(last_error, attempt, estimated_tokens, deadline))
+        finally:
+            with self._lock:
+                self.queue_depth -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight requests, retry counters and remaining budgets"""
+        with self._lock:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                'queue_depth': self.queue_depth,
+                'in_flight': self.in_flight,
+                **self.counters,
+                'throttled_seconds': self.throttled_seconds,
+                'requests_available': self.requests.tokens,
+                'tokens_available': self.tokens.tokens,
+            }
+
+
+_default_scheduler: Optional[OpenAIScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> OpenAIScheduler:
+    """Process-wide scheduler sized by OPENAI_RPM, OPENAI_TPM and OPENAI_DEADLINE_SECONDS"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = OpenAIScheduler(
+                requests_per_minute=float(os.getenv('OPENAI_RPM', '500')),
+                tokens_per_minute=float(os.getenv('OPENAI_TPM', '200000')),
+                deadline_seconds=float(os.getenv('OPENAI_DEADLINE_SECONDS', '60')),
+            )
+        return _default_scheduler
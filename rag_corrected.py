@@ -1,16 +1,16 @@
 import os
-import requests
 import json
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer
 import faiss
 import pickle
-import time
 from dotenv import load_dotenv
+from doc_prefetcher import DOC_PREFETCH
+from doc_crawler import DEFAULT_STORE_PATH, DocumentStore
+from html_extract import sections
+from model_registry import get_doc_prefetcher, get_sentence_encoder
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -30,7 +30,7 @@ class AtlanRAGPipeline:
         
         # Initialize sentence transformer for embeddings
         try:
-            self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+            self.embedder = get_sentence_encoder('all-MiniLM-L6-v2')
             print("✅ Embeddings model loaded")
         except Exception as e:
             print(f"❌ Failed to load embeddings model: {e}")
@@ -237,40 +237,36 @@ Authorization: Bearer YOUR_API_KEY
             """
         }
         
-        # Initialize vector storage
-        self.chunks = []
-        self.chunk_metadata = []
-        self.vector_index = None
+        # Initialize vector storage: (index, chunks, metadata), always replaced as a whole
+        self.knowledge = (None, [], [])
         
-        # Build knowledge base
+        # Build knowledge base from the fallback docs now; scraped pages are
+        # fetched in the background and the index is rebuilt when they arrive
+        self.prefetcher = get_doc_prefetcher()
+        self.prefetcher.add_urls(url for urls in self.knowledge_urls.values() for url in urls)
+        self.prefetcher.subscribe(self._on_docs_updated)
         self._build_knowledge_base()
+        if DOC_PREFETCH:
+            self.prefetcher.start()
     
-    def _scrape_content(self, url: str) -> str:
-        """Scrape content from URL"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Extract text
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text[:8000] if len(text) > 8000 else text  # Limit content length
-            
-        except Exception as e:
-            print(f"⚠️ Failed to scrape {url}: {e}")
-            return ""
+    def close(self):
+        """Stop rebuilding the index when the shared prefetcher fetches new pages"""
+        self.prefetcher.unsubscribe(self._on_docs_updated)
+    
+    def _on_docs_updated(self, content: Dict[str, str]):
+        self._build_knowledge_base()
+    
+    @property
+    def vector_index(self):
+        return self.knowledge[0]
+    
+    @property
+    def chunks(self) -> List[str]:
+        return self.knowledge[1]
+    
+    @property
+    def chunk_metadata(self) -> List[Dict]:
+        return self.knowledge[2]
     
     def _chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """Split text into overlapping chunks"""
@@ -304,10 +300,10 @@ Authorization: Bearer YOUR_API_KEY
                     'type': 'documentation'
                 })
         
-        # Try to scrape additional content
+        # Add pages the prefetcher has already scraped
         for category, urls in self.knowledge_urls.items():
             for url in urls:
-                scraped_content = self._scrape_content(url)
+                scraped_content = self.prefetcher.get(url)[:8000]  # Limit content length
                 if scraped_content:
                     chunks = self._chunk_text(scraped_content)
                     for chunk in chunks:
@@ -317,7 +313,25 @@ Authorization: Bearer YOUR_API_KEY
                             'category': category,
                             'type': 'web_scraped'
                         })
-                time.sleep(1)  # Rate limiting
+        
+        # Add every page from the crawled document store (python doc_crawler.py)
+        if os.path.exists(DEFAULT_STORE_PATH):
+            scraped_urls = {url for urls in self.knowledge_urls.values() for url in urls if self.prefetcher.get(url)}
+            store = DocumentStore(DEFAULT_STORE_PATH)
+            for document in store.documents():
+                if document['url'] in scraped_urls:
+                    continue
+                # Chunk each section on its own, prefixed with its heading path
+                for heading, body in sections(document['blocks']) or [('', document['text'])]:
+                    for chunk in self._chunk_text(body):
+                        all_chunks.append(f"{heading}: {chunk}" if heading else chunk)
+                        all_metadata.append({
+                            'source': document['url'],
+                            'category': document['category'],
+                            'type': 'crawled',
+                            'section': heading
+                        })
+            store.close()
         
         if not all_chunks:
             print("❌ No content available for knowledge base")
@@ -330,11 +344,11 @@ Authorization: Bearer YOUR_API_KEY
             
             # Build FAISS index
             dimension = embeddings.shape[1]
-            self.vector_index = faiss.IndexFlatIP(dimension)  # Inner product for similarity
-            self.vector_index.add(embeddings.astype('float32'))
+            vector_index = faiss.IndexFlatIP(dimension)  # Inner product for similarity
+            vector_index.add(embeddings.astype('float32'))
             
-            self.chunks = all_chunks
-            self.chunk_metadata = all_metadata
+            # One assignment, so a concurrent query never pairs the index with other chunks
+            self.knowledge = (vector_index, all_chunks, all_metadata)
             
             print(f"✅ Knowledge base built with {len(all_chunks)} chunks")
             
@@ -343,7 +357,8 @@ Authorization: Bearer YOUR_API_KEY
     
     def _retrieve_relevant_chunks(self, query: str, k: int = 3) -> List[Tuple[str, Dict]]:
         """Retrieve relevant chunks using vector similarity"""
-        if self.vector_index is None or self.embedder is None:
+        vector_index, chunks, chunk_metadata = self.knowledge
+        if vector_index is None or self.embedder is None:
             # Fallback to simple keyword matching
             return self._keyword_based_retrieval(query, k)
         
@@ -352,16 +367,16 @@ Authorization: Bearer YOUR_API_KEY
             query_embedding = self.embedder.encode([query])
             
             # Search in FAISS index
-            scores, indices = self.vector_index.search(query_embedding.astype('float32'), k)
+            scores, indices = vector_index.search(query_embedding.astype('float32'), k)
             
             # Return chunks with metadata
             results = []
             for score, idx in zip(scores[0], indices[0]):
-                if idx < len(self.chunks):  # Valid index
+                if 0 <= idx < len(chunks):  # Valid index
                     results.append((
-                        self.chunks[idx],
+                        chunks[idx],
                         {
-                            'metadata': self.chunk_metadata[idx],
+                            'metadata': chunk_metadata[idx],
                             'score': float(score)
                         }
                     ))
@@ -376,15 +391,16 @@ Authorization: Bearer YOUR_API_KEY
         """Fallback keyword-based retrieval"""
         query_words = set(query.lower().split())
         scored_chunks = []
+        _, chunks, chunk_metadata = self.knowledge
         
-        for i, chunk in enumerate(self.chunks):
+        for i, chunk in enumerate(chunks):
             chunk_words = set(chunk.lower().split())
             overlap = len(query_words & chunk_words)
             if overlap > 0:
                 scored_chunks.append((
                     chunk,
                     {
-                        'metadata': self.chunk_metadata[i],
+                        'metadata': chunk_metadata[i],
                         'score': overlap / len(query_words)
                     }
                 ))
@@ -1,6 +1,5 @@
 import openai
-import requests
-from bs4 import BeautifulSoup
+import hashlib
 import json
 import os
 import re
@@ -8,6 +7,16 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
 import time
+from openai_scheduler import OpenAIScheduler, get_scheduler
+from http_pool import get_http_client
+from llm_backend import make_client
+from llm_accounting import LLMAccounting, get_accounting
+from deadline_budget import BudgetRunner
+from doc_cache import DocumentCache, get_default_doc_cache
+from doc_prefetcher import DOC_PREFETCH
+from model_registry import get_doc_prefetcher
+from html_extract import extract_text, resolve_backend
+from context_packer import ContextPacker
 
 load_dotenv()
 
@@ -17,13 +26,28 @@ class RAGResponse:
     sources: List[str]
     confidence: float
     reasoning: str
+    context_tokens: int = 0  # documentation tokens put in the prompt
+    provisional: bool = False  # keyword answer standing in while the model answer finishes
+    from_model: bool = False  # written by the model, not a keyword or error fallback
 
 class AtlanRAGPipeline:
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = openai.OpenAI(
-            api_key=api_key or os.getenv('OPENAI_API_KEY')
-        )
+    def __init__(self, api_key: Optional[str] = None, scheduler: Optional[OpenAIScheduler] = None,
+                 accounting: Optional[LLMAccounting] = None, doc_cache: Optional[DocumentCache] = None,
+                 prefetch: bool = DOC_PREFETCH):
+        # Retries are left to the shared scheduler, which knows the rate limits;
+        # connections come from the process-wide keep-alive pool. LLM_BACKEND can
+        # record or replay the traffic instead (see llm_backend)
+        self.client = make_client(lambda: openai.OpenAI(
+            api_key=api_key or os.getenv('OPENAI_API_KEY'),
+            max_retries=0,
+            http_client=get_http_client()
+        ))
         self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+        self.scheduler = scheduler or get_scheduler()
+        self.accounting = accounting or get_accounting()
+        self.budget_runner = BudgetRunner()
+        # Fits the most relevant documentation passages into RAG_CONTEXT_TOKENS
+        self.context_packer = ContextPacker(self.model)
         
         # Predefined knowledge base URLs for different topics
         self.knowledge_base = {
@@ -212,42 +236,35 @@ class AtlanRAGPipeline:
             """
         }
         
-        # Cache for fetched content
-        self.content_cache = {}
+        # Memory + disk cache of fetched pages, shared across instances and restarts
+        self.doc_cache = doc_cache or get_default_doc_cache()
+        
+        # Documentation is fetched in the background by the process-wide
+        # prefetcher; queries only read what is ready
+        self.prefetcher = get_doc_prefetcher()
+        self.prefetcher.add_urls(url for urls in self.knowledge_base.values() for url in urls)
+        if prefetch:
+            self.prefetcher.start()
+    
+    @staticmethod
+    def _extract_text(html: bytes) -> str:
+        """Visible text of a page, whitespace-collapsed (the context packer trims it per query)"""
+        return extract_text(html)
     
     def fetch_page_content(self, url: str) -> str:
         """
         Fetch and extract text content from a web page.
-        """
-        if url in self.content_cache:
-            return self.content_cache[url]
         
+        Served from the document cache while fresh; stale pages are revalidated
+        with ETag / Last-Modified, and kept if the site cannot be reached.
+        """
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Extract text content
-            text = soup.get_text()
-            
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            # Limit content length
-            text = text[:4000] if len(text) > 4000 else text
-            
-            self.content_cache[url] = text
-            return text
+            return self.doc_cache.fetch(url, get_http_client(), self._extract_text,
+                                        extractor=f'rag_pipeline:{resolve_backend()}',
+                                        headers=headers, timeout=10)
             
         except Exception as e:
             # Silently fail for web scraping errors to avoid cluttering output
@@ -284,13 +301,12 @@ class AtlanRAGPipeline:
         # Remove duplicates and limit to top 3 URLs
         relevant_urls = list(set(relevant_urls))[:3]
         
-        # Fetch content from relevant URLs
+        # Use content the prefetcher has already fetched (never the network)
         content_pairs = []
         for url in relevant_urls:
-            content = self.fetch_page_content(url)
+            content = self.prefetcher.get(url)
             if content:
                 content_pairs.append((url, content))
-                time.sleep(0.5)  # Rate limiting
         
         # If no content was fetched, use fallback content
         if not content_pairs:
@@ -308,10 +324,30 @@ class AtlanRAGPipeline:
         
         return content_pairs
     
-    def generate_rag_response(self, query: str, topic_tags: List[str]) -> RAGResponse:
+    def generate_rag_response(self, query: str, topic_tags: List[str], budget: Optional[float] = None) -> RAGResponse:
         """
         Generate a response using RAG based on the query and topic tags.
+        
+        With a budget (seconds), a provisional keyword-based answer is returned
+        once it runs out while the model answer finishes in the background
+        (see reconciled_response).
         """
+        if budget is not None:
+            return self.budget_runner.run(
+                self._query_key(query, topic_tags),
+                lambda: self.generate_rag_response(query, topic_tags),
+                budget,
+                provisional=lambda: RAGResponse(
+                    answer=self._keyword_answer(query),
+                    sources=[],
+                    confidence=0.5,
+                    reasoning="Model response over the latency budget - provisional answer from documentation keywords",
+                    provisional=True
+                ),
+                # A canned keyword answer never matches the model's wording, so there is nothing to confirm
+                same=None,
+                answered=lambda final: final.from_model
+            )[0]
         
         # Get relevant content
         content_pairs = self.get_relevant_content(topic_tags, query)
@@ -324,15 +360,10 @@ class AtlanRAGPipeline:
                 reasoning="No relevant content found"
             )
         
-        # Prepare context for the AI model
-        context_parts = []
-        sources = []
-        
-        for url, content in content_pairs:
-            context_parts.append(f"Source: {url}\nContent: {content}\n")
-            sources.append(url)
-        
-        context = "\n---\n".join(context_parts)
+        # Prepare context for the AI model: the most relevant passages within the token budget
+        packed = self.context_packer.pack(query, content_pairs)
+        context = packed.format()
+        sources = packed.sources
         
         system_prompt = """
         You are a helpful customer support AI assistant for Atlan, a data catalog and governance platform.
@@ -360,8 +391,10 @@ class AtlanRAGPipeline:
         Please provide a comprehensive answer that helps the customer resolve their question.
         """
         
+        started = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
+            response = self.scheduler.chat_completion(
+                self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -371,28 +404,61 @@ class AtlanRAGPipeline:
                 max_tokens=1000
             )
             
+            self.accounting.record_call('rag_answer', self.model, started, response)
             answer = response.choices[0].message.content.strip()
             
             return RAGResponse(
                 answer=answer,
                 sources=sources,
                 confidence=0.85,  # High confidence when we have relevant content
-                reasoning=f"Generated answer using {len(sources)} documentation sources"
+                reasoning=f"Generated answer using {len(sources)} documentation sources "
+                          f"({packed.tokens} of {packed.candidate_tokens} context tokens)",
+                context_tokens=packed.tokens,
+                from_model=True
             )
             
         except Exception as e:
+            self.accounting.record_call('rag_answer', self.model, started, error=e)
             error_message = str(e)
             
             # Check if it's an API quota error
             if "429" in error_message or "quota" in error_message.lower() or "billing" in error_message.lower():
                 # Provide a helpful response using the retrieved content
                 if content_pairs:
-                    # Extract key information from the documentation content
-                    combined_content = "\n".join([content for _, content in content_pairs[:2]])
+                    answer = self._keyword_answer(query)
                     
-                    # Provide a basic response based on the query and content
-                    if any(word in query.lower() for word in ['connect', 'connection', 'setup', 'configure']):
-                        answer = """Based on the Atlan documentation, here are the key steps for connecting data sources:
+                    return RAGResponse(
+                        answer=answer,
+                        sources=sources,
+                        confidence=0.75,
+                        reasoning="API quota exceeded - provided response based on documentation content"
+                    )
+            
+            # Default error response
+            return RAGResponse(
+                answer=f"I apologize, but I encountered an error while processing your question. Please check the Atlan documentation at https://docs.atlan.com/ or contact support directly for assistance.",
+                sources=sources,
+                confidence=0.0,
+                reasoning=f"Error generating response: API quota exceeded"
+            )
+    
+    @staticmethod
+    def _query_key(query: str, topic_tags: List[str]) -> str:
+        return hashlib.sha256("\x1f".join([query] + sorted(topic_tags)).encode('utf-8')).hexdigest()
+    
+    def reconciled_response(self, query: str, topic_tags: List[str]) -> Optional[RAGResponse]:
+        """The model's answer to a query that got a provisional one, once it has arrived"""
+        return self.budget_runner.result(self._query_key(query, topic_tags))
+    
+    def _keyword_answer(self, query: str) -> str:
+        """
+        Canned documentation answer chosen by keywords in the query.
+        
+        Used when the model cannot answer: quota errors, and provisional answers
+        while a slow model call is still running.
+        """
+        if any(word in query.lower() for word in ['connect', 'connection', 'setup', 'configure']):
+            answer = """Based on the Atlan documentation, here are the key steps for connecting data sources:
 
 1. **Access the Integrations Panel**: Navigate to the integrations section in your Atlan workspace
 2. **Select Your Data Source**: Choose from supported connectors like Snowflake, Databricks, Power BI, etc.
@@ -401,9 +467,9 @@ class AtlanRAGPipeline:
 5. **Set Up Crawling**: Configure automated metadata discovery
 
 For specific connection guides, please refer to the Atlan documentation for detailed step-by-step instructions."""
-                    
-                    elif any(word in query.lower() for word in ['api', 'sdk', 'python', 'java']):
-                        answer = """Based on the Atlan documentation, here's information about APIs and SDKs:
+        
+        elif any(word in query.lower() for word in ['api', 'sdk', 'python', 'java']):
+            answer = """Based on the Atlan documentation, here's information about APIs and SDKs:
 
 **Available SDKs:**
 - Python SDK: Install with `pip install pyatlan`
@@ -419,9 +485,9 @@ For specific connection guides, please refer to the Atlan documentation for deta
 All API calls require an API key. Generate your API key from the Admin panel in your Atlan workspace.
 
 For detailed API documentation and code examples, please visit the Atlan Developer Hub."""
-                    
-                    elif any(word in query.lower() for word in ['sso', 'authentication', 'login', 'okta', 'azure']):
-                        answer = """Based on the Atlan documentation, here's information about SSO configuration:
+        
+        elif any(word in query.lower() for word in ['sso', 'authentication', 'login', 'okta', 'azure']):
+            answer = """Based on the Atlan documentation, here's information about SSO configuration:
 
 **Supported Identity Providers:**
 - OKTA
@@ -442,9 +508,9 @@ For detailed API documentation and code examples, please visit the Atlan Develop
 - Ensure user attributes are mapped correctly
 
 For detailed SSO setup instructions, please refer to the Atlan documentation."""
-                    
-                    elif any(word in query.lower() for word in ['glossary', 'term', 'business term', 'definition', 'vocabulary', 'metadata']):
-                        answer = """Based on the Atlan documentation, here's information about Glossary management:
+        
+        elif any(word in query.lower() for word in ['glossary', 'term', 'business term', 'definition', 'vocabulary', 'metadata']):
+            answer = """Based on the Atlan documentation, here's information about Glossary management:
 
 **Atlan Glossary Features:**
 - AtlasGlossary: Centralized business vocabulary container
@@ -472,9 +538,9 @@ For detailed SSO setup instructions, please refer to the Atlan documentation."""
 - Manage term approval workflows
 
 For detailed glossary management instructions, please refer to the Atlan documentation."""
-                    
-                    else:
-                        answer = """Based on the Atlan documentation, Atlan is a modern data catalog that helps you:
+        
+        else:
+            answer = """Based on the Atlan documentation, Atlan is a modern data catalog that helps you:
 
 **Core Features:**
 - Discover and search data assets across your organization
@@ -490,21 +556,8 @@ For detailed glossary management instructions, please refer to the Atlan documen
 4. Start discovering and using your data through the catalog
 
 For more detailed information, please visit the Atlan documentation."""
-                    
-                    return RAGResponse(
-                        answer=answer,
-                        sources=sources,
-                        confidence=0.75,
-                        reasoning="API quota exceeded - provided response based on documentation content"
-                    )
-            
-            # Default error response
-            return RAGResponse(
-                answer=f"I apologize, but I encountered an error while processing your question. Please check the Atlan documentation at https://docs.atlan.com/ or contact support directly for assistance.",
-                sources=sources,
-                confidence=0.0,
-                reasoning=f"Error generating response: API quota exceeded"
-            )
+        
+        return answer
     
     def should_use_rag(self, topic_tags: List[str]) -> bool:
         """
@@ -0,0 +1,238 @@
+import json
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+# The fixed taxonomy from the classification prompt
+TOPIC_TAGS = ['How-to', 'Product', 'Connector', 'Lineage', 'API/SDK', 'SSO',
+              'Glossary', 'Best practices', 'Sensitive data']
+SENTIMENTS = ['Frustrated', 'Curious', 'Angry', 'Neutral', 'Urgent']
+PRIORITIES = ['P0 (High)', 'P1 (Medium)', 'P2 (Low)']
+
+CLASSIFICATION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'topic_tags': {'type': 'array', 'items': {'type': 'string', 'enum': TOPIC_TAGS}},
+        'sentiment': {'type': 'string', 'enum': SENTIMENTS},
+        'priority': {'type': 'string', 'enum': PRIORITIES},
+        'confidence': {'type': 'number'},
+        'reasoning': {'type': 'string'},
+    },
+    'required': ['topic_tags', 'sentiment', 'priority', 'confidence', 'reasoning'],
+    'additionalProperties': False,
+}
+
+PACKED_CLASSIFICATION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'classifications': {
+            'type': 'array',
+            'items': {
+                **CLASSIFICATION_SCHEMA,
+                'properties': {'ticket_id': {'type': 'string'}, **CLASSIFICATION_SCHEMA['properties']},
+                'required': ['ticket_id'] + CLASSIFICATION_SCHEMA['required'],
+            },
+        },
+    },
+    'required': ['classifications'],
+    'additionalProperties': False,
+}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a reply holds no usable classification"""
+
+
+def response_format(mode: str, packed: bool = False) -> Dict[str, Any]:
+    """Chat completion response_format for "json_schema" or "json_object" mode ({} when off)"""
+    if mode == 'json_schema':
+        return {'response_format': {
+            'type': 'json_schema',
+            'json_schema': {
+                'name': 'ticket_classifications' if packed else 'ticket_classification',
+                'strict': True,
+                'schema': PACKED_CLASSIFICATION_SCHEMA if packed else CLASSIFICATION_SCHEMA,
+            },
+        }}
+    if mode == 'json_object':
+        return {'response_format': {'type': 'json_object'}}
+    return {}
+
+
+def _close_partial(text: str) -> str:
+    """Close the strings, arrays and objects left open by a truncated JSON document"""
+    closers = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            closers.append('}' if char == '{' else ']')
+        elif char in '}]' and closers:
+            closers.pop()
+
+    text = text + '"' if in_string else text
+    return text.rstrip().rstrip(',') + ''.join(reversed(closers))
+
+
+def extract_json(text: str) -> Tuple[Any, bool]:
+    """
+    Pull a JSON value out of a model reply.
+
+    Accepts bare JSON, JSON inside markdown fences or surrounded by prose, and
+    JSON cut off mid-document (the last incomplete member is dropped).
+
+    Returns:
+        Tuple of (value, repaired) where repaired is False only for bare JSON
+    """
+    text = (text or '').strip()
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    fenced = re.search(r'```(?:json)?\s*(.*?)(?:```|$)', text, re.DOTALL)
+    candidates = [fenced.group(1).strip()] if fenced else []
+    candidates.append(text)
+
+    decoder = json.JSONDecoder()
+    for candidate in candidates:
+        starts = [m.start() for m in re.finditer(r'[\[{]', candidate)]
+        if not starts:
+            continue
+
+        # The outermost value, complete or cut off mid-document
+        try:
+            return decoder.raw_decode(candidate, starts[0])[0], True
+        except json.JSONDecodeError:
+            pass
+        partial = candidate[starts[0]:]
+        for _ in range(20):
+            try:
+                return json.loads(_close_partial(partial)), True
+            except json.JSONDecodeError:
+                # Drop the incomplete trailing member and try again
+                cut = partial.rfind(',')
+                if cut <= 0:
+                    break
+                partial = partial[:cut]
+
+        # Prose with stray brackets ahead of the JSON: first complete object after them
+        for start in starts[1:]:
+            try:
+                value = decoder.raw_decode(candidate, start)[0]
+            except json.JSONDecodeError:
+                continue
+            if isinstance(value, dict):
+                return value, True
+
+    raise StructuredOutputError("No JSON found in reply")
+
+
+# Other ways models write priorities: "P0", "p0 - high", "High"
+PRIORITY_ALIASES = {'p0': 'P0 (High)', 'high': 'P0 (High)', 'p1': 'P1 (Medium)', 'medium': 'P1 (Medium)',
+                    'p2': 'P2 (Low)', 'low': 'P2 (Low)'}
+
+
+def _normalize_label(value: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', value.lower())
+
+
+def _match_label(value: Any, labels: List[str], aliases: Dict[str, str] = None) -> str:
+    """Case- and punctuation-insensitive match of value to one of labels ('' if none)"""
+    if not isinstance(value, str):
+        return ''
+    normalized = _normalize_label(value)
+    for label in labels:
+        if normalized == _normalize_label(label):
+            return label
+    for alias, label in (aliases or {}).items():
+        if normalized.startswith(alias):
+            return label
+    return ''
+
+
+def validate_classification(value: Any) -> Dict[str, Any]:
+    """
+    Check a decoded reply against the taxonomy and normalize it.
+
+    Topic tags outside the taxonomy are dropped; sentiment and priority must
+    name a known label. Confidence is clamped to [0, 1].
+    """
+    if not isinstance(value, dict):
+        raise StructuredOutputError(f"Expected a JSON object, got {type(value).__name__}")
+
+    tags = value.get('topic_tags')
+    if isinstance(tags, str):
+        tags = [tags]
+    topic_tags = []
+    for tag in tags or []:
+        label = _match_label(tag, TOPIC_TAGS)
+        if label and label not in topic_tags:
+            topic_tags.append(label)
+    if not topic_tags:
+        raise StructuredOutputError(f"No valid topic tags in {tags!r}")
+
+    sentiment = _match_label(value.get('sentiment'), SENTIMENTS)
+    if not sentiment:
+        raise StructuredOutputError(f"Unknown sentiment {value.get('sentiment')!r}")
+    priority = _match_label(value.get('priority'), PRIORITIES, PRIORITY_ALIASES)
+    if not priority:
+        raise StructuredOutputError(f"Unknown priority {value.get('priority')!r}")
+
+    try:
+        confidence = min(1.0, max(0.0, float(value.get('confidence', 0.0))))
+    except (TypeError, ValueError):
+        confidence = 0.0
+
+    return {
+        'topic_tags': topic_tags,
+        'sentiment': sentiment,
+        'priority': priority,
+        'confidence': confidence,
+        'reasoning': str(value.get('reasoning') or 'No reasoning provided'),
+    }
+
+
+class ParseStats:
+    """Counts of replies parsed cleanly, parsed after repair, rejected, and retried"""
+
+    def __init__(self):
+        self.counts = {'clean': 0, 'repaired': 0, 'failed': 0, 'retries': 0}
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        replies = counts['clean'] + counts['repaired'] + counts['failed']
+        return {
+            **counts,
+            'replies': replies,
+            'failure_rate': counts['failed'] / replies if replies else 0.0,
+            'retry_rate': counts['retries'] / replies if replies else 0.0,
+        }
+
+
+def parse_classification(text: str, stats: ParseStats = None) -> Dict[str, Any]:
+    """Extract and validate one classification from a reply, counting the outcome"""
+    try:
+        value, repaired = extract_json(text)
+        fields = validate_classification(value)
+    except StructuredOutputError:
+        if stats is not None:
+            stats.record('failed')
+        raise
+    if stats is not None:
+        stats.record('repaired' if repaired else 'clean')
+    return fields
@@ -6,8 +6,14 @@ Run this to validate core functionality without API calls
 
 import json
 import os
+import tempfile
+import time
 from pathlib import Path
 
+# Keep the tests off the network and out of the working directory's page cache
+os.environ.setdefault('DOC_PREFETCH', 'off')
+os.environ.setdefault('DOC_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'doc_cache.sqlite'))
+
 def test_file_structure():
     """Test if all required files exist"""
     print("🔍 Testing file structure...")
@@ -101,7 +107,7 @@ def test_rag_logic():
     try:
         from rag_pipeline import AtlanRAGPipeline
         
-        rag = AtlanRAGPipeline("dummy_key")  # Won't make API calls
+        rag = AtlanRAGPipeline("dummy_key", prefetch=False)  # Won't make API calls
         
         # Test topic classification logic
         test_cases = [
@@ -135,6 +141,1646 @@ def test_rag_logic():
         print(f"❌ RAG logic test failed: {e}")
         return False
 
+def test_keyword_rules():
+    """Test single-pass keyword rules against per-keyword scans"""
+    print("🔍 Testing keyword rule engine...")
+    
+    try:
+        import keyword_rules
+        from keyword_rules import KeywordRuleEngine
+        
+        groups = {
+            'topic': [('API/SDK', ['api', 'sdk']), ('Lineage', ['lineage', 'downstream'])],
+            'priority': [('P0 (High)', ['down', 'urgent']), ('P1 (Medium)', ['issue', "can't"])],
+        }
+        texts = [
+            "Downstream lineage is missing",           # 'down' inside 'downstream'
+            "APISSUE in the python client",            # overlapping 'api' / 'issue'
+            "I can't work out the SDK docs",
+            "Nothing relevant here",
+        ]
+        
+        for use_automaton in (True, False):
+            saved = keyword_rules.AHOCORASICK_AVAILABLE
+            keyword_rules.AHOCORASICK_AVAILABLE = saved and use_automaton
+            engine = KeywordRuleEngine(groups)
+            keyword_rules.AHOCORASICK_AVAILABLE = saved
+            
+            for text in texts:
+                if engine.match(text).keywords != engine.match_by_scanning(text).keywords:
+                    print(f"❌ Keyword hits differ for: {text}")
+                    return False
+        
+        matches = engine.match(texts[0])
+        if matches.first('priority') != 'P0 (High)' or matches.labels('topic') != ['Lineage']:
+            print("❌ Rule precedence not respected")
+            return False
+        if engine.match(texts[3]).first('topic', 'Product') != 'Product':
+            print("❌ Default label not returned")
+            return False
+        
+        print("✅ Keyword rule tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Keyword rule test failed: {e}")
+        return False
+
+def test_classification_cache():
+    """Test the persistent classification cache"""
+    print("🔍 Testing classification cache...")
+    
+    try:
+        import tempfile
+        from classification_cache import ClassificationCache
+        
+        fields = {
+            'topic_tags': ['Connector'],
+            'sentiment': 'Frustrated',
+            'priority': 'P1 (Medium)',
+            'confidence': 0.9,
+            'reasoning': 'test'
+        }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ClassificationCache(os.path.join(tmp_dir, 'cache.sqlite'), max_entries=2)
+            
+            cache.put("Snowflake  broken", "Sync fails", "model-a", fields)
+            if cache.get("Snowflake broken ", "Sync fails", "model-a") != fields:
+                print("❌ Normalized subject should hit the cache")
+                return False
+            if cache.get("Snowflake broken", "Sync fails", "model-b") is not None:
+                print("❌ Different backend id should miss the cache")
+                return False
+            
+            cache.put("Second", "ticket", "model-a", fields)
+            cache.put("Second", "ticket", "model-a", fields)  # replacing an entry does not grow the count
+            cache.put("Third", "ticket", "model-a", fields)
+            if cache.entries != 2 or cache.stats()['entries'] != 2:
+                print("❌ Cache should evict down to max_entries")
+                return False
+            
+            if cache.invalidate("model-a") != 2 or cache.stats()['hit_rate'] != 0.5:
+                print(f"❌ Unexpected stats after invalidation: {cache.stats()}")
+                return False
+            cache.close()
+        
+        print("✅ Classification cache tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Classification cache test failed: {e}")
+        return False
+
+class _StubTokenizer:
+    """Whitespace tokenizer standing in for a Hugging Face tokenizer"""
+    model_max_length = 512
+    
+    def __call__(self, texts, add_special_tokens=False, truncation=False):
+        return {'input_ids': [text.split() for text in texts]}
+    
+    def decode(self, ids, skip_special_tokens=True):
+        return ' '.join(ids)
+
+class _StubPipeline:
+    """Keyword-driven stand-in for a transformers pipeline that records every batch it is given"""
+    
+    def __init__(self, task):
+        self.task = task
+        self.tokenizer = _StubTokenizer()
+        self.batches = []
+    
+    def _predict(self, text, labels):
+        lowered = text.lower()
+        if self.task == 'sentiment-analysis':
+            label = 'negative' if 'broken' in lowered else 'positive' if 'thanks' in lowered else 'neutral'
+            return {'label': label, 'score': 0.9}
+        first = labels[2] if 'snowflake' in lowered else labels[0]  # connector issues, else how-to
+        return {'labels': [first] + [label for label in labels if label != first],
+                'scores': [0.9] + [0.1 / (len(labels) - 1)] * (len(labels) - 1)}
+    
+    def __call__(self, inputs, labels=None, batch_size=None):
+        batch = [inputs] if isinstance(inputs, str) else list(inputs)
+        step = batch_size or len(batch)
+        self.batches.extend(batch[i:i + step] for i in range(0, len(batch), step))
+        results = [self._predict(text, labels) for text in batch]
+        if self.task == 'sentiment-analysis':
+            return results
+        return results[0] if isinstance(inputs, str) else results
+
+def _import_classifier():
+    """Import classifier, standing in for torch and transformers when they are not installed"""
+    import sys
+    import types
+    
+    if 'classifier' not in sys.modules:
+        try:
+            import torch  # noqa: F401
+            import transformers  # noqa: F401
+        except ImportError:
+            torch_stub = types.ModuleType('torch')
+            torch_stub.set_num_threads = lambda threads: None
+            transformers_stub = types.ModuleType('transformers')
+            transformers_stub.AutoTokenizer = transformers_stub.AutoModelForSequenceClassification = object
+            transformers_stub.pipeline = lambda task, model=None, tokenizer=None: _StubPipeline(task)
+            stubs = {'torch': torch_stub, 'transformers': transformers_stub}
+            stubs = {name: module for name, module in stubs.items() if name not in sys.modules}
+            sys.modules.update(stubs)
+            try:
+                import classifier
+            finally:
+                for name in stubs:
+                    del sys.modules[name]
+    import classifier
+    return classifier
+
+def _stub_classifier(**kwargs):
+    """AtlanTicketClassifier whose transformers pipelines are stubs (no model downloads)"""
+    classifier = _import_classifier()
+    
+    classifier.pipeline = lambda task, model=None, tokenizer=None: _StubPipeline(task)
+    return classifier.AtlanTicketClassifier(**kwargs)
+
+def _stub_tickets(count):
+    """Tickets of mixed lengths and keywords for the stub classifier"""
+    import pandas as pd
+    
+    descriptions = [
+        "Snowflake connector is broken",
+        "How do I add a glossary term? " + "Please explain the steps in detail. " * 6,
+        "Thanks, lineage looks great",
+        "Sync is broken again and the Snowflake crawler " + "keeps failing on every run " * 3,
+    ]
+    return pd.DataFrame({
+        'ticket_id': [f"TEAM-{i:03d}" for i in range(count)],
+        'subject': [f"Ticket {i}" for i in range(count)],
+        'description': [descriptions[i % len(descriptions)] + f" (#{i})" for i in range(count)],
+    })
+
+def test_parallel_classification():
+    """Test sharded classification: merge order, shard retries, parent-side cache and cascade counts"""
+    print("🔍 Testing parallel classification...")
+    
+    try:
+        import tempfile
+        from concurrent.futures import Future
+        from classification_cache import ClassificationCache
+        classifier = _import_classifier()
+        
+        class InProcessExecutor:
+            """Runs shards synchronously in this process, failing the first attempt of chosen shards"""
+            submitted = []
+            fail_once = set()
+            
+            def __init__(self, max_workers=None, mp_context=None, initializer=None, initargs=()):
+                initializer(*initargs)
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc):
+                return False
+            
+            def submit(self, fn, shard_df, batch_size):
+                first_ticket = shard_df['ticket_id'].iloc[0]
+                InProcessExecutor.submitted.append(list(shard_df['ticket_id']))
+                future = Future()
+                if first_ticket in InProcessExecutor.fail_once:
+                    InProcessExecutor.fail_once.discard(first_ticket)
+                    future.set_exception(RuntimeError("worker crashed"))
+                else:
+                    future.set_result(fn(shard_df, batch_size))
+                return future
+        
+        original_executor = classifier.ProcessPoolExecutor
+        classifier.ProcessPoolExecutor = InProcessExecutor
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                cache = ClassificationCache(os.path.join(tmp_dir, 'cache.sqlite'))
+                model = _stub_classifier(cache=cache)
+                tickets = _stub_tickets(10)
+                expected = _stub_classifier()._classify_batched(tickets.iloc[1:], batch_size=4)
+                
+                # Ticket 0 is cached already; it must not be sent to a worker
+                model.classify_ticket(tickets['subject'][0], tickets['description'][0])
+                model.cascade_counts = {}
+                
+                InProcessExecutor.fail_once = {'TEAM-003'}
+                results = model.classify_multiple_tickets(tickets, batch_size=4, num_workers=2, max_retries=1)
+                sent = [ticket for shard in InProcessExecutor.submitted for ticket in shard]
+                
+                if list(results['ticket_id']) != list(tickets['ticket_id']):
+                    print(f"❌ Shards merged out of order: {list(results['ticket_id'])}")
+                    return False
+                if 'TEAM-000' in sent or results['decided_by'][0] != 'cache':
+                    print("❌ Cached ticket should be answered in the parent, not sharded")
+                    return False
+                if sent.count('TEAM-003') != 2 or len(set(sent)) != 9:
+                    print(f"❌ Failed shard should be resubmitted once: {InProcessExecutor.submitted}")
+                    return False
+                if list(results['sentiment'][1:]) != list(expected['sentiment']) or \
+                        list(results['topic_tags'][1:]) != list(expected['topic_tags']):
+                    print("❌ Sharded results should match the single-process batched results")
+                    return False
+                if model.cascade_counts.get('topic:model') != 9 or model.cascade_counts.get('sentiment:model') != 9:
+                    print(f"❌ Worker cascade counts not merged: {model.cascade_counts}")
+                    return False
+                if cache.get(tickets['subject'][5], tickets['description'][5], model.backend_id) is None:
+                    print("❌ Worker results should be cached by the parent")
+                    return False
+                
+                # A shard that keeps failing is classified in the main process
+                InProcessExecutor.submitted = []
+                InProcessExecutor.fail_once = {'TEAM-000'}
+                fallback = model.classify_multiple_tickets(tickets.iloc[:3].assign(subject="Other"),
+                                                           num_workers=2, max_retries=0)
+                if list(fallback['ticket_id']) != ['TEAM-000', 'TEAM-001', 'TEAM-002'] or \
+                        fallback['decided_by'].isna().any():
+                    print("❌ Exhausted shard should fall back to the main process")
+                    return False
+                cache.close()
+
+            # Sessions sharing one classifier must not lose cascade count updates
+            import threading
+            shared = _stub_classifier()
+            threads = [
+                threading.Thread(target=lambda: [shared.classify_ticket("Ticket", "Snowflake connector is broken",
+                                                                        use_cache=False) for _ in range(50)])
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if shared.cascade_counts.get('topic:model') != 400 or shared.cascade_counts.get('sentiment:model') != 400:
+                print(f"❌ Concurrent cascade counts were lost: {shared.cascade_counts}")
+                return False
+        finally:
+            classifier.ProcessPoolExecutor = original_executor
+        
+        print("✅ Parallel classification tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Parallel classification test failed: {e}")
+        return False
+
+def test_batched_classification():
+    """Test that batched classification matches classifying one ticket at a time"""
+    print("🔍 Testing batched classification...")
+    
+    try:
+        tickets = _stub_tickets(7)
+        columns = ['ticket_id', 'topic_tags', 'sentiment', 'priority', 'confidence', 'reasoning', 'decided_by']
+        
+        per_ticket = _stub_classifier().classify_multiple_tickets(tickets, batched=False)
+        batched_model = _stub_classifier()
+        batched = batched_model.classify_multiple_tickets(tickets, batch_size=3)
+        if batched[columns].to_dict('records') != per_ticket[columns].to_dict('records'):
+            print("❌ Batched results should match per-ticket results")
+            return False
+        
+        # Seven tickets in batches of three: one call per stage, split 3 + 3 + 1
+        if [len(batch) for batch in batched_model.sentiment_pipeline.batches] != [3, 3, 1] or \
+                [len(batch) for batch in batched_model.zero_shot_pipeline.batches] != [3, 3, 1]:
+            print("❌ Tickets should reach the models in batches of batch_size")
+            return False
+        if list(batched.columns[:3]) != ['ticket_id', 'subject', 'description']:
+            print("❌ Ticket columns should be kept")
+            return False
+        
+        # A failing model call falls back to rules, is labelled as such and is not cached
+        import tempfile
+        from classification_cache import ClassificationCache
+        
+        def broken(*args, **kwargs):
+            raise RuntimeError("CUDA out of memory")
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ClassificationCache(os.path.join(tmp_dir, 'cache.sqlite'))
+            failing = _stub_classifier(cache=cache)
+            failing.sentiment_pipeline.__class__ = type('BrokenPipeline', (_StubPipeline,), {'__call__': broken})
+            degraded = failing.classify_multiple_tickets(tickets, batch_size=3)
+            single = failing.classify_ticket("Snowflake down", "Connector is broken")
+            if set(degraded['decided_by']) != {'rules'} or set(degraded['confidence']) != {0.7} or \
+                    single.decided_by != 'rules' or single.confidence != 0.7:
+                print(f"❌ Model failures should be marked as rule fallbacks: {set(degraded['decided_by'])}")
+                return False
+            if cache.stats()['entries'] != 0:
+                print("❌ Rule fallbacks after a model failure should not be cached")
+                return False
+            cache.close()
+        
+        print("✅ Batched classification tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batched classification test failed: {e}")
+        return False
+
+def test_length_bucketing():
+    """Test that length-bucketed batches group similar lengths and results keep input order"""
+    print("🔍 Testing length-bucketed batching...")
+    
+    try:
+        texts = [
+            "Snowflake sync is broken " + "again and again " * 10,  # 29 words
+            "Thanks",  # 1
+            "The connector is broken",  # 4
+            "Thanks for the lineage docs " + "they help a lot " * 5,  # 25
+            "Neutral question about tags",  # 4
+            "Thanks a lot team",  # 4
+        ]
+        model = _stub_classifier(max_tokens=20)
+        sentiments = model.classify_sentiments_batch(texts, batch_size=2)
+        expected = ['Frustrated', 'Curious', 'Frustrated', 'Curious', 'Neutral', 'Curious']
+        if sentiments != expected:
+            print(f"❌ Bucketed results should come back in input order: {sentiments}")
+            return False
+        
+        batches = model.sentiment_pipeline.batches
+        lengths = [[len(text.split()) for text in batch] for batch in batches]
+        if [len(batch) for batch in batches] != [2, 2, 2] or \
+                [length for batch in lengths for length in batch] != [1, 4, 4, 4, 20, 20]:
+            print(f"❌ Batches should hold tickets of similar (truncated) length: {lengths}")
+            return False
+        
+        topics = model.classify_topics_batch(texts, batch_size=4)
+        if [tags[0] for tags in topics] != ['Connector', 'How-to', 'How-to', 'How-to', 'How-to', 'How-to']:
+            print(f"❌ Bucketed topic results should come back in input order: {topics}")
+            return False
+        
+        unbucketed = _stub_classifier(max_tokens=20, length_bucketing=False)
+        if unbucketed.classify_sentiments_batch(texts, batch_size=2) != expected or \
+                unbucketed.sentiment_pipeline.batches[0] != texts[:2]:
+            print("❌ Without bucketing, batches should follow input order")
+            return False
+        
+        print("✅ Length bucketing tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Length bucketing test failed: {e}")
+        return False
+
+def test_model_registry():
+    """Test that shared models are loaded once across concurrent sessions"""
+    print("🔍 Testing shared model registry...")
+    
+    try:
+        import threading
+        import model_registry
+        
+        model_registry.clear()
+        load_count = []
+        
+        def factory():
+            load_count.append(1)
+            return object()
+        
+        handles = []
+        threads = [
+            threading.Thread(target=lambda: handles.append(model_registry.get_shared('test_model', factory)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        if len(load_count) != 1 or len(set(id(handle) for handle in handles)) != 1:
+            print(f"❌ Expected one shared load, got {len(load_count)}")
+            return False
+        
+        # One sentence encoder for the embedding topic backend and the vector RAG pipeline
+        import sys
+        import types
+        encoder_loads = []
+        stub_module = types.ModuleType('sentence_transformers')
+        stub_module.SentenceTransformer = lambda name: encoder_loads.append(name) or object()
+        installed = sys.modules.get('sentence_transformers')
+        sys.modules['sentence_transformers'] = stub_module
+        try:
+            encoders = {id(model_registry.get_sentence_encoder()) for _ in range(3)}
+        finally:
+            if installed is None:
+                del sys.modules['sentence_transformers']
+            else:
+                sys.modules['sentence_transformers'] = installed
+        if encoder_loads != ['all-MiniLM-L6-v2'] or len(encoders) != 1:
+            print(f"❌ Sentence encoder should be loaded once: {encoder_loads}")
+            return False
+        
+        for session_id in range(3):
+            model_registry.register_session(session_id)
+        report = model_registry.memory_report()
+        model_registry.clear()
+        
+        if report['sessions'] != 3 or 'test_model' not in report['models']:
+            print(f"❌ Unexpected memory report: {report}")
+            return False
+        
+        print("✅ Model registry tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Model registry test failed: {e}")
+        return False
+
+def test_cascade_calibration():
+    """Test calibrated rule confidence for the rules-first cascade"""
+    print("🔍 Testing cascade calibration...")
+    
+    try:
+        from keyword_rules import KeywordRuleEngine
+        from cascade import RuleCalibration
+        
+        engine = KeywordRuleEngine({
+            'topic': [('Connector', ['snowflake', 'connector']), ('SSO', ['okta'])],
+            'sentiment': [('Urgent', ['urgent'])],
+        })
+        decisive = engine.match("Snowflake connector broken")
+        contested = engine.match("Snowflake login through Okta")
+        
+        calibration = RuleCalibration()
+        if calibration.decide('topic', decisive)[1] <= calibration.decide('topic', contested)[1]:
+            print("❌ Uncontested multi-keyword rules should be more confident")
+            return False
+        
+        # Rules that always disagree with the reference should lose confidence
+        before = calibration.decide('sentiment', engine.match("urgent"))[1]
+        calibration.fit([engine.match("urgent")] * 20, {'sentiment': ['Frustrated'] * 20})
+        label, after = calibration.decide('sentiment', engine.match("urgent please"))
+        if label != 'Urgent' or after >= before or after > 0.2:
+            print(f"❌ Calibration did not lower confidence: {before:.2f} -> {after:.2f}")
+            return False
+        
+        print("✅ Cascade calibration tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Cascade calibration test failed: {e}")
+        return False
+
+def test_async_classification():
+    """Test concurrent bulk classification against a fake async OpenAI client"""
+    print("🔍 Testing async bulk classification...")
+    
+    try:
+        import asyncio
+        from types import SimpleNamespace
+        from ticket_classifier import TicketClassifier
+        
+        in_flight = {'now': 0, 'peak': 0}
+        
+        async def create(model, messages, **kwargs):
+            in_flight['now'] += 1
+            in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+            await asyncio.sleep(0.01)
+            in_flight['now'] -= 1
+            if messages[1]['content'].startswith('Please classify these'):
+                # Packed request: answer all but the first ticket of the pack
+                packed = json.loads(messages[1]['content'].split('\n', 1)[1])
+                reply = json.dumps([{'ticket_id': item['ticket_id'], 'topic_tags': ['SSO'], 'sentiment': 'Neutral',
+                                     'priority': 'P2 (Low)', 'confidence': 0.8, 'reasoning': 'packed'}
+                                    for item in packed[1:]])
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+            subject = messages[1]['content'].split('Subject: ')[1].split('\n')[0]
+            if subject == 'fail':
+                raise RuntimeError('simulated API error')
+            reply = json.dumps({'topic_tags': ['SSO'], 'sentiment': 'Neutral', 'priority': 'P2 (Low)',
+                                'confidence': 0.8, 'reasoning': subject})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+        
+        class FakeAsyncClient:
+            chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+            async def __aenter__(self):
+                return self
+            async def __aexit__(self, *exc_info):
+                return False
+        
+        classifier = TicketClassifier(api_key='test-key')
+        classifier._make_async_client = FakeAsyncClient
+        tickets = [{'subject': 'fail' if i == 3 else f'ticket {i}', 'description': 'Okta login is broken'}
+                   for i in range(12)]
+        results = classifier.classify_multiple_tickets(tickets, concurrency=4)
+        
+        reasons = [result['classification']['reasoning'] for result in results]
+        if reasons[:3] != ['ticket 0', 'ticket 1', 'ticket 2'] or reasons[-1] != 'ticket 11':
+            print(f"❌ Results out of order: {reasons}")
+            return False
+        if results[3]['classification']['confidence'] != 0.6:
+            print("❌ Failed ticket should get the keyword fallback")
+            return False
+        if in_flight['peak'] > 4:
+            print(f"❌ Concurrency limit exceeded: {in_flight['peak']} in flight")
+            return False
+        
+        packed = classifier.classify_multiple_tickets(tickets, concurrency=4, pack_size=4)
+        reasons = [result['classification']['reasoning'] for result in packed]
+        if reasons[:3] != ['ticket 0', 'packed', 'packed'] or reasons[4] != 'ticket 4':
+            print(f"❌ Tickets missing from packed replies should be retried singly: {reasons}")
+            return False
+        
+        print("✅ Async bulk classification tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Async bulk classification test failed: {e}")
+        return False
+
+def test_structured_output():
+    """Test recovery and validation of malformed classification replies"""
+    print("🔍 Testing structured output parsing...")
+    
+    try:
+        from types import SimpleNamespace
+        from structured_output import StructuredOutputError, extract_json, validate_classification
+        from ticket_classifier import TicketClassifier, supported_structured_output
+        
+        reply = {'topic_tags': ['sso'], 'sentiment': 'neutral', 'priority': 'P0', 'confidence': 1.7, 'reasoning': 'x'}
+        text = json.dumps(reply)
+        cases = {
+            'bare': (text, False),
+            'fenced': (f"```json\n{text}\n```", True),
+            'prose': (f"Here is the classification [v2]: {text} Hope this helps!", True),
+            'truncated': (text[:text.index('"reasoning"') + 8], True),
+        }
+        for name, (reply_text, expect_repaired) in cases.items():
+            value, repaired = extract_json(reply_text)
+            fields = validate_classification(value)
+            if repaired != expect_repaired or fields['topic_tags'] != ['SSO'] or fields['priority'] != 'P0 (High)':
+                print(f"❌ {name} reply parsed as {fields} (repaired={repaired})")
+                return False
+            if fields['confidence'] != 1.0:
+                print("❌ Confidence should be clamped to 1.0")
+                return False
+        
+        for bad in ("I cannot classify this ticket.", json.dumps({**reply, 'sentiment': 'Happy'})):
+            try:
+                validate_classification(extract_json(bad)[0])
+                print(f"❌ Invalid reply accepted: {bad}")
+                return False
+            except StructuredOutputError:
+                pass
+        
+        # A rejected response_format steps down a mode; an unparseable reply is retried once
+        replies = ["Sorry, I cannot help with that.", text]
+        requests = []
+        
+        def create(**request):
+            requests.append(request)
+            if request.get('response_format', {}).get('type') == 'json_schema':
+                error = RuntimeError("Invalid parameter: 'response_format' of type 'json_schema' is not supported")
+                error.status_code = 400
+                raise error
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=replies.pop(0)))])
+        
+        classifier = TicketClassifier(api_key='test-key', structured_output='json_schema')
+        classifier.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        classification = classifier.classify_ticket("SSO login", "Okta fails", use_cache=False)
+        
+        stats = classifier.parse_stats.stats()
+        if classifier.structured_output != 'json_object' or len(requests) != 3:
+            print(f"❌ Expected a downgrade to json_object, got {classifier.structured_output}")
+            return False
+        if classification.topic_tags != ['SSO'] or stats['failed'] != 1 or stats['retries'] != 1:
+            print(f"❌ Unparseable reply should be retried: {classification}, {stats}")
+            return False
+        
+        # By default only models with structured outputs are asked for json_schema
+        modes = [supported_structured_output(model) for model in
+                 ('gpt-3.5-turbo', 'gpt-4-turbo', 'gpt-4o-mini', 'gpt-4o-2024-05-13', 'gpt-4.1-nano')]
+        if modes != ['json_object', 'json_object', 'json_schema', 'json_object', 'json_schema']:
+            print(f"❌ Unexpected default structured output modes: {modes}")
+            return False
+        auto = TicketClassifier(api_key='test-key', structured_output='auto')
+        if auto.structured_output != supported_structured_output(auto.model):
+            print("❌ auto should resolve to the model's supported mode")
+            return False
+        
+        print("✅ Structured output tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Structured output test failed: {e}")
+        return False
+
+def test_near_duplicate_reuse():
+    """Test near-duplicate reuse of recent classifications"""
+    print("🔍 Testing near-duplicate reuse...")
+    
+    try:
+        from types import SimpleNamespace
+        from near_duplicate import NearDuplicateIndex, hashing_embedder
+        from ticket_classifier import TicketClassifier
+        
+        now = [0.0]
+        index = NearDuplicateIndex(hashing_embedder(), threshold=0.8, window_seconds=60, clock=lambda: now[0])
+        calls = []
+        
+        def create(**request):
+            calls.append(request)
+            reply = json.dumps({'topic_tags': ['Connector'], 'sentiment': 'Frustrated', 'priority': 'P0 (High)',
+                                'confidence': 0.9, 'reasoning': 'Snowflake outage'})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+        
+        classifier = TicketClassifier(api_key='test-key', near_duplicates=index)
+        classifier.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        
+        first = classifier.classify_ticket("Snowflake connector broken", "Our Snowflake sync fails since this morning")
+        second = classifier.classify_ticket("Snowflake connector broken!", "Our snowflake sync is failing since this morning")
+        other = classifier.classify_ticket("How do I create a glossary term?", "Looking for steps to add business terms")
+        
+        if first.decided_by != 'model' or second.decided_by != 'reused' or len(calls) != 2:
+            print(f"❌ Near-duplicate should reuse the first classification ({len(calls)} calls)")
+            return False
+        if second.priority != 'P0 (High)' or other.decided_by != 'model':
+            print("❌ Unrelated ticket should not be reused")
+            return False
+        
+        now[0] = 120.0
+        expired = classifier.classify_ticket("Snowflake connector broken", "Our Snowflake sync fails since this morning")
+        stats = index.stats()
+        if expired.decided_by != 'model' or stats['calls_avoided'] != 1 or stats['expired'] != 2:
+            print(f"❌ Entries should expire after the window: {stats}")
+            return False
+        
+        print("✅ Near-duplicate reuse tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Near-duplicate reuse test failed: {e}")
+        return False
+
+def test_http_pool():
+    """Test keep-alive reuse and metrics of the shared HTTP pool"""
+    print("🔍 Testing shared HTTP connection pool...")
+    
+    try:
+        import http.server
+        import threading
+        from doc_cache import DocumentCache
+        from http_pool import get_http_client, metrics
+        from rag_pipeline import AtlanRAGPipeline
+        
+        class DocsHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+            def do_GET(self):
+                body = b"<html><body><h1>Lineage</h1><p>View upstream assets</p></body></html>"
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+        
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), DocsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}"
+            metrics.reset()
+            rag = AtlanRAGPipeline("dummy_key", doc_cache=DocumentCache(':memory:', enabled=False), prefetch=False)
+            pages = [rag.fetch_page_content(f"{url}/page{i}") for i in range(3)]
+            get_http_client().get(url)
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        stats = metrics.stats()
+        if "View upstream assets" not in pages[0]:
+            print(f"❌ Unexpected page text: {pages[0]!r}")
+            return False
+        if stats['requests'] != 4 or stats['new_connections'] != 1 or stats['reused_connections'] != 3:
+            print(f"❌ Requests should share one keep-alive connection: {stats}")
+            return False
+        if stats['hosts']['127.0.0.1']['requests'] != 4:
+            print("❌ Per-host metrics missing")
+            return False
+        
+        print("✅ Shared HTTP pool tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Shared HTTP pool test failed: {e}")
+        return False
+
+def test_llm_replay():
+    """Test recording and replaying OpenAI traffic with injected failures"""
+    print("🔍 Testing record/replay LLM backend...")
+    
+    try:
+        import tempfile
+        from types import SimpleNamespace
+        from llm_backend import RecordingClient, RecordingStore, ReplayClient, chat_response
+        from openai.types.chat import ChatCompletion
+        from openai_scheduler import OpenAIScheduler
+        from ticket_classifier import TicketClassifier
+        
+        reply = json.dumps({'topic_tags': ['Lineage'], 'sentiment': 'Curious', 'priority': 'P2 (Low)',
+                            'confidence': 0.85, 'reasoning': 'recorded'})
+        headers = {'x-ratelimit-limit-requests': '100', 'x-ratelimit-remaining-requests': '7',
+                   'x-ratelimit-reset-requests': '1s'}
+        live_calls = []
+        
+        def create(**request):
+            live_calls.append(request)
+            return ChatCompletion.model_validate(chat_response(reply))
+        
+        def create_raw(**request):
+            response = create(**request)
+            return SimpleNamespace(parse=lambda: response, headers=headers)
+        
+        live_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=create, with_raw_response=SimpleNamespace(create=create_raw))))
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_path = os.path.join(tmp_dir, 'recordings.jsonl')
+            recording_scheduler = OpenAIScheduler(base_delay=0.01)
+            classifier = TicketClassifier(api_key='test-key', scheduler=recording_scheduler)
+            classifier.client = RecordingClient(live_client, RecordingStore(store_path))
+            recorded = classifier.classify_ticket("Lineage missing", "Upstream tables not shown")
+            
+            # Record mode passes the rate-limit headers to the scheduler and saves them
+            if recording_scheduler.stats()['requests_available'] > 7.5:
+                print("❌ The scheduler should see rate-limit headers in record mode")
+                return False
+            saved = list(RecordingStore(store_path).entries.values())
+            if [entry['headers'] for entry in saved] != [headers]:
+                print(f"❌ Recordings should keep the response headers: {saved}")
+                return False
+            
+            # Replay from disk: same answer and headers, no live call
+            classifier.client = ReplayClient(RecordingStore(store_path), latency=0.01)
+            classifier.scheduler = OpenAIScheduler()
+            replayed = classifier.classify_ticket("Lineage missing", "Upstream tables not shown")
+            if len(live_calls) != 1 or replayed != recorded or replayed.reasoning != 'recorded':
+                print(f"❌ Replay should serve the recording without a live call: {replayed}")
+                return False
+            if classifier.scheduler.stats()['requests_available'] > 7.5:
+                print("❌ Replay should serve the recorded rate-limit headers")
+                return False
+            
+            # Every attempt rate limited: the scheduler retries until its deadline, then rules take over
+            flaky = ReplayClient(RecordingStore(store_path), error_rate=1.0)
+            classifier.client = flaky
+            classifier.scheduler = OpenAIScheduler(deadline_seconds=0.2, base_delay=0.01, max_delay=0.05)
+            degraded = classifier.classify_ticket("Lineage missing", "Upstream tables not shown")
+            if degraded.decided_by != 'rules' or flaky.stats()['rate_limited'] < 2:
+                print(f"❌ Injected 429s should be retried then fall back: {flaky.stats()}")
+                return False
+            
+            classifier.client = ReplayClient(RecordingStore(store_path))
+            unrecorded = classifier.classify_ticket("Something new", "Never recorded")
+            if unrecorded.decided_by != 'rules':
+                print("❌ Unrecorded requests should fall back")
+                return False
+        
+        print("✅ Record/replay backend tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Record/replay backend test failed: {e}")
+        return False
+
+def test_llm_accounting():
+    """Test per-call token, latency, outcome and cost accounting"""
+    print("🔍 Testing LLM call accounting...")
+    
+    try:
+        import tempfile
+        from types import SimpleNamespace
+        from llm_accounting import LLMAccounting, RollingHistogram, estimate_cost
+        from near_duplicate import openai_embedder
+        from openai_scheduler import OpenAIScheduler
+        from ticket_classifier import CLASSIFICATION_OPERATIONS, TicketClassifier
+        
+        if abs(estimate_cost('gpt-4o-mini-2024-07-18', 1000, 1000) - 0.00075) > 1e-12:
+            print("❌ Dated model names should use their base model's prices")
+            return False
+        
+        histogram = RollingHistogram(window_seconds=120, slot_seconds=60)
+        for latency_ms in [40] * 90 + [900] * 9 + [15000]:
+            histogram.add(latency_ms, now=0)
+        if (histogram.percentile(0.5, now=0), histogram.percentile(0.99, now=0)) != (50, 1000):
+            print("❌ Histogram percentiles are wrong")
+            return False
+        if histogram.percentile(0.5, now=600) != 0.0:
+            print("❌ Old slots should roll out of the window")
+            return False
+        
+        class RateLimited(Exception):
+            status_code = 429
+        
+        replies = iter([
+            json.dumps({'topic_tags': ['SSO'], 'sentiment': 'Neutral', 'priority': 'P1 (Medium)',
+                        'confidence': 0.9, 'reasoning': 'ok'}),
+            "not json at all", "still not json",
+        ])
+        
+        def create(**request):
+            if 'Okta' not in request['messages'][1]['content']:
+                raise RateLimited("simulated 429")
+            usage = SimpleNamespace(prompt_tokens=400, completion_tokens=60, total_tokens=460)
+            return SimpleNamespace(usage=usage,
+                                   choices=[SimpleNamespace(message=SimpleNamespace(content=next(replies)))])
+        
+        accounting = LLMAccounting()
+        classifier = TicketClassifier(api_key='test-key', accounting=accounting,
+                                      scheduler=OpenAIScheduler(deadline_seconds=0.05, base_delay=0.01))
+        classifier.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        classifier.model = 'gpt-3.5-turbo'
+        classifier.classify_ticket("Okta SSO", "Login loop with Okta")
+        classifier.classify_ticket("Okta again", "Okta SAML error")
+        classifier.classify_ticket("Snowflake", "Sync broken")
+        
+        summary = accounting.summary('classify')
+        expected_outcomes = {'ok': 1, 'parse_failure': 2, 'rate_limited': 1, 'fallback': 0}
+        if summary['outcomes'] != expected_outcomes or summary['prompt_tokens'] != 1200:
+            print(f"❌ Unexpected accounting summary: {summary}")
+            return False
+        if abs(summary['cost'] - 3 * estimate_cost('gpt-3.5-turbo', 400, 60)) > 1e-12:
+            print("❌ Cost should add up over calls")
+            return False
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dump_path = os.path.join(tmp_dir, 'accounting.json')
+            accounting.dump(dump_path)
+            with open(dump_path) as f:
+                dumped = json.load(f)
+        if len(dumped['calls']) != 4 or dumped['summary']['classify']['calls'] != 4:
+            print("❌ Dump should contain every call")
+            return False
+        
+        # Cost per ticket covers every classification operation, near-duplicate embeddings included
+        embeddings = SimpleNamespace(create=lambda model, input: SimpleNamespace(
+            usage=SimpleNamespace(prompt_tokens=50, total_tokens=50),
+            data=[SimpleNamespace(embedding=[1.0, 0.0]) for _ in input]
+        ))
+        openai_embedder(SimpleNamespace(embeddings=embeddings), 'text-embedding-3-small', accounting)(["a", "b"])
+        expected_cost = (3 * estimate_cost('gpt-3.5-turbo', 400, 60) + estimate_cost('text-embedding-3-small', 50, 0)) / 3
+        if accounting.summary('embed')['calls'] != 1 or \
+                abs(accounting.cost_per_item('tickets', CLASSIFICATION_OPERATIONS) - expected_cost) > 1e-12:
+            print("❌ Cost per ticket should include embeddings and divide by tickets classified")
+            return False
+        
+        print("✅ LLM accounting tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ LLM accounting test failed: {e}")
+        return False
+
+def test_deadline_budget():
+    """Test provisional results under a latency budget and their later reconciliation"""
+    print("🔍 Testing deadline budget...")
+    
+    try:
+        import tempfile
+        from types import SimpleNamespace
+        from classification_cache import ClassificationCache
+        from rag_pipeline import AtlanRAGPipeline
+        from ticket_classifier import TicketClassifier
+        
+        def slow_client(content, delay):
+            def create(**request):
+                time.sleep(delay)
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+            return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        
+        reply = json.dumps({'topic_tags': ['Product'], 'sentiment': 'Curious', 'priority': 'P2 (Low)',
+                            'confidence': 0.9, 'reasoning': 'model'})
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ClassificationCache(os.path.join(tmp_dir, 'cache.sqlite'))
+            classifier = TicketClassifier(api_key='test-key', cache=cache)
+            classifier.client = slow_client(reply, 0.3)
+            
+            start = time.time()
+            provisional = classifier.classify_ticket("Okta login", "SSO broken for everyone", budget=0.05)
+            if provisional.decided_by != 'provisional' or time.time() - start > 0.25:
+                print("❌ Over-budget call should return the provisional result immediately")
+                return False
+            if classifier.reconciled_classification("Okta login", "SSO broken for everyone") is not None:
+                print("❌ Model result should not be available yet")
+                return False
+            
+            time.sleep(0.5)
+            final = classifier.reconciled_classification("Okta login", "SSO broken for everyone")
+            if final is None or final.topic_tags != ['Product'] or classifier.budget_runner.stats()['corrected'] != 1:
+                print(f"❌ Late model result should replace the provisional one: {final}")
+                return False
+            cached = classifier.classify_ticket("Okta login", "SSO broken for everyone")
+            if cached.reasoning != 'model' or cached.decided_by != 'cache':
+                print("❌ Late model result should land in the cache")
+                return False
+            
+            # A late call that falls back to rules after an API error reconciles nothing
+            def failing_client(delay):
+                def create(**request):
+                    time.sleep(delay)
+                    raise RuntimeError("API unavailable")
+                return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+            
+            classifier.client = failing_client(0.3)
+            classifier.classify_ticket("Snowflake sync", "Connector keeps failing", budget=0.05)
+            time.sleep(0.5)
+            stats = classifier.budget_runner.stats()
+            if classifier.reconciled_classification("Snowflake sync", "Connector keeps failing") is not None or \
+                    stats['late_errors'] != 1 or (stats['confirmed'], stats['corrected']) != (0, 1):
+                print(f"❌ A late rule fallback should count as failed, not reconciled: {stats}")
+                return False
+            
+            classifier.client = slow_client(reply, 0.0)
+            on_time = classifier.classify_ticket("Lineage", "Upstream missing", budget=1.0)
+            if on_time.decided_by != 'model' or classifier.budget_runner.stats()['on_time'] != 1:
+                print("❌ In-budget call should return the model result")
+                return False
+        
+        rag = AtlanRAGPipeline("dummy_key", prefetch=False)
+        rag.get_relevant_content = lambda topic_tags, query: [("https://docs.atlan.com/", "docs")]
+        rag.client = slow_client("Full model answer", 0.3)
+        quick = rag.generate_rag_response("How do I set up SSO with Okta?", ['SSO'], budget=0.05)
+        time.sleep(0.5)
+        late = rag.reconciled_response("How do I set up SSO with Okta?", ['SSO'])
+        if not quick.provisional or "SSO" not in quick.answer or late is None or late.provisional or \
+                late.answer != "Full model answer":
+            print("❌ RAG answer should be provisional, then reconciled")
+            return False
+        if rag.budget_runner.stats()['confirmed'] or rag.budget_runner.stats()['corrected']:
+            print("❌ Keyword answers should not be counted as confirmed or corrected")
+            return False
+        
+        rag.client = failing_client(0.3)
+        rag.generate_rag_response("How do I rotate SSO certificates?", ['SSO'], budget=0.05)
+        time.sleep(0.5)
+        if rag.reconciled_response("How do I rotate SSO certificates?", ['SSO']) is not None or \
+                rag.budget_runner.stats()['late_errors'] != 1:
+            print("❌ A late error answer should not replace the provisional one")
+            return False
+        
+        print("✅ Deadline budget tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Deadline budget test failed: {e}")
+        return False
+
+def test_doc_cache():
+    """Test the tiered, revalidating documentation cache"""
+    print("🔍 Testing documentation page cache...")
+    
+    try:
+        import http.server
+        import tempfile
+        import threading
+        from doc_cache import CachedPage, DocumentCache
+        from html_extract import resolve_backend
+        from http_pool import get_http_client
+        from rag_pipeline import AtlanRAGPipeline
+        
+        site = {'etag': '"v1"', 'body': b"<html><body><p>Connect Snowflake in three steps</p></body></html>"}
+        seen = []
+        
+        class DocsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                seen.append(self.headers.get('If-None-Match'))
+                if self.headers.get('If-None-Match') == site['etag']:
+                    self.send_response(304)
+                    self.send_header('ETag', site['etag'])
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', site['etag'])
+                self.send_header('Content-Length', str(len(site['body'])))
+                self.end_headers()
+                self.wfile.write(site['body'])
+            def log_message(self, *args):
+                pass
+        
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), DocsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/docs"
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'docs.sqlite')
+            try:
+                cache = DocumentCache(path, ttl_seconds=0)
+                rag = AtlanRAGPipeline("dummy_key", doc_cache=cache, prefetch=False)
+                first = rag.fetch_page_content(url)
+                second = rag.fetch_page_content(url)  # expired: conditional request, 304
+                if "Connect Snowflake" not in first or second != first or seen != [None, '"v1"']:
+                    print(f"❌ Expired page should be revalidated with its ETag: {seen}")
+                    return False
+                
+                # A new process reads the page from disk without the network while fresh
+                restarted = DocumentCache(path, ttl_seconds=3600)
+                if restarted.fetch(url, get_http_client(), rag._extract_text, f"rag_pipeline:{resolve_backend()}") != first or len(seen) != 2:
+                    print("❌ Fresh page on disk should be served without a request")
+                    return False
+                
+                # A second extractor gets its own text from the stored body; the first keeps its own
+                other = restarted.fetch(url, get_http_client(), lambda raw: "other extractor", "other")
+                texts = DocumentCache(path, ttl_seconds=3600).get(url).texts
+                if other != "other extractor" or len(seen) != 2 or \
+                        texts != {f"rag_pipeline:{resolve_backend()}": first, "other": "other extractor"}:
+                    print(f"❌ Extracted text should be kept per extractor: {texts}")
+                    return False
+                restarted.close()
+                
+                site.update(etag='"v2"', body=b"<html><body><p>Snowflake setup changed</p></body></html>")
+                if "changed" not in rag.fetch_page_content(url):
+                    print("❌ Changed page should be refreshed")
+                    return False
+            finally:
+                server.shutdown()
+                server.server_close()
+            
+            if "changed" not in rag.fetch_page_content(url):
+                print("❌ Stale page should be served when the site is down")
+                return False
+            
+            stats = cache.stats()
+            if (stats['fetched'], stats['revalidated'], stats['refreshed'], stats['stale_served']) != (1, 1, 1, 1):
+                print(f"❌ Unexpected cache counters: {stats}")
+                return False
+            
+            small = DocumentCache(os.path.join(tmp_dir, 'small.sqlite'), memory_bytes=300)
+            for i in range(5):
+                small.put(CachedPage(f"{url}/{i}", b"x" * 100, {"default": "text"}, None, None, time.time()))
+            if small.stats()['memory_entries'] != 2 or small.stats()['entries'] != 5:
+                print("❌ Memory tier should stay within its size bound")
+                return False
+            
+            bounded = DocumentCache(os.path.join(tmp_dir, 'bounded.sqlite'), max_entries=3)
+            for i in range(5):
+                bounded.put(CachedPage(f"{url}/{i}", b"x", {"default": "text"}, None, None, time.time()))
+                bounded.put(CachedPage(f"{url}/{i}", b"y", {"default": "text"}, None, None, time.time()))
+            if bounded.entries != 3 or bounded.stats()['entries'] != 3 or bounded.get(f"{url}/4").raw != b"y":
+                print("❌ Disk tier should evict down to max_entries")
+                return False
+        
+        print("✅ Documentation cache tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Documentation cache test failed: {e}")
+        return False
+
+def test_doc_prefetcher():
+    """Test background documentation prefetching and per-host rate limiting"""
+    print("🔍 Testing documentation prefetcher...")
+    
+    try:
+        import http.server
+        import threading
+        from doc_cache import DocumentCache
+        from doc_prefetcher import DocPrefetcher, HostRateLimiter, get_host_limiter
+        from model_registry import get_doc_prefetcher
+        from rag_pipeline import AtlanRAGPipeline
+        
+        request_times = []
+        
+        class DocsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                request_times.append(time.monotonic())
+                body = f"<html><body><p>Prefetched page {self.path}</p></body></html>".encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+        
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), DocsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        urls = [f"{base}/product", f"{base}/sso", f"{base}/api"]
+        
+        try:
+            rag = AtlanRAGPipeline("dummy_key", doc_cache=DocumentCache(':memory:', enabled=False), prefetch=False)
+            rag.knowledge_base = {'product': urls[:2], 'sso': urls[1:]}
+            other = AtlanRAGPipeline("dummy_key", doc_cache=DocumentCache(':memory:', enabled=False), prefetch=False)
+            if rag.prefetcher is not get_doc_prefetcher() or other.prefetcher is not rag.prefetcher or \
+                    rag.prefetcher.limiter is not get_host_limiter() or rag.prefetcher.stats()['running']:
+                print("❌ Pipelines should share one idle process-wide prefetcher")
+                return False
+            
+            # Nothing fetched yet: the query answers from fallback content without any request
+            pairs = rag.get_relevant_content(['Product'], "How do I use Atlan?")
+            if request_times or pairs[0][0] != "Atlan Documentation (product)":
+                print("❌ Query should not fetch pages itself")
+                return False
+            
+            rag.prefetcher = DocPrefetcher(urls, rag.fetch_page_content, limiter=HostRateLimiter(0.05)).start()
+            if not rag.prefetcher.wait_ready(timeout=10):
+                print("❌ Prefetcher did not finish its first pass")
+                return False
+            
+            gaps = [later - earlier for earlier, later in zip(request_times, request_times[1:])]
+            if len(request_times) != 3 or min(gaps) < 0.04:
+                print(f"❌ Requests to one host should be spaced out: {gaps}")
+                return False
+            
+            pairs = rag.get_relevant_content(['Product'], "How do I use Atlan?")
+            if sorted(url for url, _ in pairs) != sorted(urls[:2]) or "Prefetched page" not in pairs[0][1]:
+                print(f"❌ Query should read prefetched pages: {pairs}")
+                return False
+            if len(request_times) != 3:
+                print("❌ Query should not touch the network")
+                return False
+            
+            # URLs added later wake the idle worker instead of waiting for the next refresh
+            added = rag.prefetcher.add_urls([urls[0], f"{base}/glossary"])
+            deadline = time.monotonic() + 10
+            while not rag.prefetcher.get(f"{base}/glossary") and time.monotonic() < deadline:
+                time.sleep(0.01)
+            rag.prefetcher.stop()
+            if added != 1 or not rag.prefetcher.get(f"{base}/glossary"):
+                print("❌ Added URLs should be fetched straight away")
+                return False
+            if rag.prefetcher.stats()['running']:
+                print("❌ stop() should stop the prefetcher")
+                return False
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        stats = rag.prefetcher.stats()
+        if (stats['passes'], stats['fetched'], stats['ready_urls']) != (2, 7, 4):
+            print(f"❌ Unexpected prefetcher counters: {stats}")
+            return False
+        
+        print("✅ Documentation prefetcher tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Documentation prefetcher test failed: {e}")
+        return False
+
+def test_doc_crawler():
+    """Test the sitemap and link crawler against a local fixture site"""
+    print("🔍 Testing documentation crawler...")
+    
+    try:
+        import http.server
+        import tempfile
+        import threading
+        from doc_crawler import DocCrawler, DocumentStore
+        
+        site = {
+            '/robots.txt': "User-agent: *\nDisallow: /private/\nSitemap: {base}/sitemap.xml\n",
+            '/sitemap.xml': '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                            '<url><loc>{base}/orphan</loc></url></urlset>',
+            '/': '<html><title>Atlan Docs</title><body><a href="/guide/setup">Setup</a> <a href="/api/reference#auth">API</a>'
+                 ' <a href="/private/secret">Secret</a> <a href="http://example.com/">Elsewhere</a>'
+                 ' <a href="/logo.png">Logo</a></body></html>',
+            '/guide/setup': '<html><body><h1>Connect Snowflake</h1><a href="/deep/one">More</a></body></html>',
+            '/api/reference': '<html><body><p>Authenticate with an API key</p></body></html>',
+            '/orphan': '<html><body><p>Only listed in the sitemap</p></body></html>',
+            '/deep/one': '<html><body><p>Depth two</p><a href="/deep/two">Deeper</a></body></html>',
+            '/deep/two': '<html><body><p>Too deep</p></body></html>',
+            '/private/secret': '<html><body><p>Do not crawl</p></body></html>',
+        }
+        requested = []
+        
+        class SiteHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                requested.append(self.path)
+                page = site.get(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                body = page.format(base=base).encode()
+                content_type = 'text/html' if page.startswith('<html') else 'text/plain'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+        
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = DocumentStore(os.path.join(tmp_dir, 'docs.sqlite'))
+            try:
+                def crawl():
+                    return DocCrawler(store, [f"{base}/"], max_depth=2, concurrency=4, host_delay=0).crawl()
+                
+                first = crawl()
+                urls = {document['url']: document for document in store.documents()}
+                expected = {f"{base}{path}" for path in ['/', '/guide/setup', '/api/reference', '/orphan', '/deep/one']}
+                if set(urls) != expected or first['new'] != 5 or first['disallowed'] != 1:
+                    print(f"❌ Unexpected crawl: {sorted(urls)} {first}")
+                    return False
+                if '/deep/two' in requested or '/private/secret' in requested or '/logo.png' in requested:
+                    print(f"❌ Crawler fetched out-of-scope pages: {requested}")
+                    return False
+                if urls[f"{base}/guide/setup"]['category'] != 'how_to' or urls[f"{base}/api/reference"]['category'] != 'api_sdk':
+                    print("❌ Pages should be categorized by URL")
+                    return False
+                
+                second = crawl()
+                site['/orphan'] = '<html><body><p>Sitemap page, now updated</p></body></html>'
+                third = crawl()
+                if (second['new'], second['unchanged'], third['changed'], third['unchanged']) != (0, 5, 1, 4):
+                    print(f"❌ Unchanged pages should be skipped by content hash: {second} {third}")
+                    return False
+                if "now updated" not in store.get(f"{base}/orphan")['text']:
+                    print("❌ Changed page should be re-stored")
+                    return False
+            finally:
+                store.close()
+                server.shutdown()
+                server.server_close()
+        
+        print("✅ Documentation crawler tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Documentation crawler test failed: {e}")
+        return False
+
+def test_html_extract():
+    """Test the pluggable HTML extractor against the original BeautifulSoup one"""
+    print("🔍 Testing HTML extraction...")
+    
+    try:
+        from html_extract import BACKENDS, extract, legacy_text, sections
+        
+        html = ("<html><head><title>Snowflake &amp; Atlan</title><style>.nav{}</style></head><body>"
+                "<nav><a href='/docs'>Docs</a></nav><!-- build 42 --><h1>Connect Snowflake</h1>"
+                "<p>Open <b>Admin</b> &gt; Integrations.</p><h2>Python SDK</h2>"
+                "<pre><code>pip install pyatlan\nclient = AtlanClient()</code></pre>"
+                "<script>track()</script><p>Then run a crawl.</p></body></html>").encode()
+        
+        pages = {backend: extract(html, backend) for backend in BACKENDS}
+        reference = pages['bs4']
+        for backend, page in pages.items():
+            if page.blocks != reference.blocks or page.links != ['/docs'] or page.title != "Snowflake & Atlan":
+                print(f"❌ {backend} backend disagrees with bs4: {page}")
+                return False
+        
+        kinds = [(block.kind, block.level) for block in reference.blocks]
+        if kinds != [('text', 0), ('heading', 1), ('text', 0), ('heading', 2), ('code', 0), ('text', 0)]:
+            print(f"❌ Headings and code blocks should be kept as structure: {kinds}")
+            return False
+        if reference.blocks[4].text != "pip install pyatlan\nclient = AtlanClient()":
+            print("❌ Code blocks should keep their lines")
+            return False
+        if sections(reference.blocks)[2][0] != "Connect Snowflake > Python SDK":
+            print(f"❌ Unexpected sections: {sections(reference.blocks)}")
+            return False
+        
+        # Same characters as the original extractor, but words at block boundaries stay apart
+        if ''.join(reference.text.split()) != ''.join(legacy_text(html).split()):
+            print("❌ Extracted text should match the original extractor")
+            return False
+        if "Snowflake Open Admin" not in reference.text or "track()" in reference.text:
+            print(f"❌ Unexpected text: {reference.text}")
+            return False
+        
+        # Nesting deeper than the recursion limit; <noscript> fallbacks are not page text
+        deep = ("<html><body>" + "<div>" * 1500 + "<p>Deep text</p>" + "</div>" * 1500 +
+                "<noscript>Enable JavaScript</noscript><p>After</p></body></html>")
+        for backend in BACKENDS:
+            if extract(deep, backend).text != "Deep text After":
+                print(f"❌ {backend} backend should handle deep nesting and skip noscript: {extract(deep, backend).text!r}")
+                return False
+        
+        print("✅ HTML extraction tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ HTML extraction test failed: {e}")
+        return False
+
+def test_context_packer():
+    """Test token-budgeted RAG context assembly"""
+    print("🔍 Testing RAG context packing...")
+    
+    try:
+        import tempfile
+        from context_packer import ContextPacker, _encoding
+        from llm_backend import RecordingStore, ReplayClient
+        from llm_accounting import LLMAccounting
+        from rag_pipeline import AtlanRAGPipeline
+        
+        navigation = "Home Docs Connectors Governance Lineage Glossary Pricing Blog Careers Login " * 12
+        setup = ("To connect Snowflake, open Admin and choose Integrations. Pick the Snowflake connector. "
+                 "Enter the account URL, warehouse and a service user with the ACCOUNTADMIN role. "
+                 "Test the connection and schedule the Snowflake crawler to run nightly. ")
+        filler = "Atlan helps teams collaborate on data assets across the organization. " * 30
+        documents = [
+            ("https://docs.example/product", navigation + filler),
+            ("https://docs.example/setup", navigation + setup + filler),
+            ("https://docs.example/how-to", navigation + setup + filler),  # same page under another category
+        ]
+        
+        _encoding.cache_clear()
+        packer = ContextPacker(budget_tokens=200, passage_tokens=60)
+        if _encoding.cache_info().currsize:
+            print("❌ The tokenizer encoding should load on first use, not when the packer is built")
+            return False
+        packed = packer.pack("How do I connect Snowflake and schedule the crawler?", documents)
+        if packed.tokens > 200 or not packed.passages or packed.tokens >= packed.candidate_tokens:
+            print(f"❌ Context should fit the budget: {packed.tokens} of {packed.candidate_tokens}")
+            return False
+        if packer.count_tokens(packed.format()) != packed.tokens:
+            print("❌ Budget should count the formatted context, headers and separators included")
+            return False
+        if "ACCOUNTADMIN" not in packed.passages[0].text:
+            print(f"❌ Most relevant passage should come first: {packed.passages[0].text[:80]}")
+            return False
+        if packed.format().count("ACCOUNTADMIN") != 1 or packed.duplicates == 0:
+            print("❌ Repeated passages should be included once")
+            return False
+        
+        # Pipeline: the prompt carries the packed context and the answer reports its size
+        prompts = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rag = AtlanRAGPipeline("dummy_key", accounting=LLMAccounting(), prefetch=False)
+            rag.client = ReplayClient(RecordingStore(os.path.join(tmp_dir, 'replay.jsonl')),
+                                      default_reply=lambda request: prompts.append(request) or "Use Admin > Integrations.")
+            rag.context_packer = packer
+            rag.get_relevant_content = lambda topic_tags, query: documents
+            response = rag.generate_rag_response("How do I connect Snowflake?", ["How-to"])
+        
+        prompt = prompts[0]['messages'][-1]['content'] if prompts else ""
+        if "ACCOUNTADMIN" not in prompt or prompt.count("Careers Login") > 12:
+            print("❌ Prompt should carry the relevant passages, not whole pages")
+            return False
+        if not 0 < response.context_tokens <= 200 or "https://docs.example/setup" not in response.sources:
+            print(f"❌ Unexpected response: {response}")
+            return False
+        
+        print(f"✅ Context packing tests passed ({response.context_tokens} context tokens)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Context packing test failed: {e}")
+        return False
+
+def test_openai_scheduler():
+    """Test retries and deadlines of the shared OpenAI scheduler"""
+    print("🔍 Testing OpenAI request scheduler...")
+    
+    try:
+        from types import SimpleNamespace
+        from openai_scheduler import OpenAIScheduler
+        
+        class FakeAPIError(Exception):
+            def __init__(self, status_code, headers=None, code=None):
+                super().__init__(f"status {status_code}")
+                self.status_code = status_code
+                self.code = code
+                self.response = SimpleNamespace(headers=headers or {})
+        
+        def fake_client(create):
+            return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        
+        scheduler = OpenAIScheduler(base_delay=0.01)
+        attempts = []
+        
+        def flaky(**request):
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise FakeAPIError(429)
+            return SimpleNamespace(usage=None)
+        
+        scheduler.chat_completion(fake_client(flaky), messages=[{'role': 'user', 'content': 'hi'}])
+        if len(attempts) != 3 or scheduler.stats()['rate_limited'] != 2:
+            print(f"❌ Expected two rate-limited retries, got {scheduler.stats()}")
+            return False
+        
+        def bad_request(**request):
+            raise FakeAPIError(400)
+        
+        def rate_limited(**request):
+            raise FakeAPIError(429, {'retry-after': '30'})
+        
+        for create, deadline in ((bad_request, 10), (rate_limited, 1)):
+            start = time.time()
+            try:
+                scheduler.chat_completion(fake_client(create), deadline_seconds=deadline, messages=[])
+                print("❌ Expected the error to be raised")
+                return False
+            except FakeAPIError:
+                if time.time() - start > 1:
+                    print("❌ Scheduler waited past the deadline")
+                    return False
+        
+        stats = scheduler.stats()
+        if stats['queue_depth'] != 0 or stats['in_flight'] != 0 or stats['deadline_exceeded'] != 1:
+            print(f"❌ Unexpected scheduler stats: {stats}")
+            return False
+        
+        # An exhausted quota fails at once instead of retrying until the deadline
+        quota_attempts = []
+        def out_of_quota(**request):
+            quota_attempts.append(1)
+            raise FakeAPIError(429, code='insufficient_quota')
+        try:
+            scheduler.chat_completion(fake_client(out_of_quota), deadline_seconds=10, messages=[])
+        except FakeAPIError:
+            pass
+        if len(quota_attempts) != 1:
+            print(f"❌ insufficient_quota should not be retried ({len(quota_attempts)} attempts)")
+            return False
+        
+        # Calls rejected for their deadline give their reservation back instead of deepening the debt
+        small = OpenAIScheduler(tokens_per_minute=1000)
+        small.tokens.tokens = -500.0
+        for _ in range(5):
+            try:
+                small.chat_completion(fake_client(flaky), deadline_seconds=1, max_tokens=500, messages=[])
+            except Exception:
+                pass
+        if small.stats()['tokens_available'] < -500 or small.stats()['deadline_exceeded'] != 5:
+            print(f"❌ Rejected calls should not drain the token bucket: {small.stats()}")
+            return False
+        
+        # Server-reported limits never raise the configured OPENAI_RPM / OPENAI_TPM
+        small._record_response({'x-ratelimit-limit-tokens': '90000'}, 0, None)
+        if small.tokens.capacity != 1000:
+            print(f"❌ Configured token limit should be kept: {small.tokens.capacity}")
+            return False
+        
+        # Near-duplicate embeddings share the same limits and retries
+        from near_duplicate import openai_embedder
+        embed_attempts = []
+        def embeddings(**request):
+            embed_attempts.append(request)
+            if len(embed_attempts) < 2:
+                raise FakeAPIError(429)
+            return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=4, total_tokens=4),
+                                   data=[SimpleNamespace(embedding=[1.0, 0.0]) for _ in request['input']])
+        embedder_scheduler = OpenAIScheduler(base_delay=0.01)
+        vectors = openai_embedder(SimpleNamespace(embeddings=SimpleNamespace(create=embeddings)),
+                                  'text-embedding-3-small', scheduler=embedder_scheduler)(["a ticket", "another"])
+        embed_stats = embedder_scheduler.stats()
+        if vectors.shape != (2, 2) or len(embed_attempts) != 2 or \
+                (embed_stats['requests'], embed_stats['retries']) != (1, 1):
+            print(f"❌ Embeddings should go through the scheduler: {embed_stats}")
+            return False
+        
+        print("✅ OpenAI scheduler tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ OpenAI scheduler test failed: {e}")
+        return False
+
+def test_batch_jobs():
+    """Test the offline batch-job flow with canned responses"""
+    print("🔍 Testing batch-job classification...")
+    
+    try:
+        import tempfile
+        from batch_jobs import LocalBatchRunner, run_batch_job
+        from classification_cache import ClassificationCache
+        from ticket_classifier import TicketClassifier
+        
+        with open('sample_tickets.json', 'r', encoding='utf-8') as f:
+            tickets = json.load(f)
+        
+        canned = {
+            tickets[0]['ticket_id']: json.dumps({'topic_tags': ['SSO'], 'sentiment': 'Angry', 'priority': 'P0 (High)',
+                                                 'confidence': 0.9, 'reasoning': 'canned'}),
+            tickets[1]['ticket_id']: 'not json',
+        }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ClassificationCache(os.path.join(tmp_dir, 'cache.sqlite'))
+            classifier = TicketClassifier(api_key='test-key', cache=cache)
+            output_path = os.path.join(tmp_dir, 'classified.jsonl')
+            written = run_batch_job('sample_tickets.json', output_path, classifier,
+                                    LocalBatchRunner(canned), poll_interval=0)
+            with open(output_path, 'r', encoding='utf-8') as f:
+                results = [json.loads(line) for line in f]
+            
+            # Rule-written replies (batch_jobs --local) are labelled as such and never cached
+            cache.invalidate()
+            run_batch_job('sample_tickets.json', output_path, classifier,
+                          LocalBatchRunner(canned), poll_interval=0, decided_by='rules')
+            with open(output_path, 'r', encoding='utf-8') as f:
+                local_results = [json.loads(line) for line in f]
+            if local_results[0]['classification']['decided_by'] != 'rules' or cache.stats()['entries'] != 0:
+                print("❌ Local rule replies should be labelled rules and kept out of the cache")
+                return False
+            cache.close()
+        
+        if written != len(tickets) or [r['ticket_id'] for r in results] != [t['ticket_id'] for t in tickets]:
+            print("❌ Batch results should cover every ticket in order")
+            return False
+        classifications = [r['classification'] for r in results]
+        if classifications[0]['topic_tags'] != ['SSO'] or classifications[0]['reasoning'] != 'canned' or \
+                classifications[0]['decided_by'] != 'model':
+            print(f"❌ Canned response not parsed: {classifications[0]}")
+            return False
+        if classifications[2]['confidence'] != 0.6:
+            print("❌ Tickets without a batch response should get the keyword fallback")
+            return False
+        
+        print("✅ Batch-job tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batch-job test failed: {e}")
+        return False
+
+def test_ticket_stream():
+    """Test chunked ticket readers against the sample data"""
+    print("🔍 Testing streaming ticket readers...")
+    
+    try:
+        import tempfile
+        import pandas as pd
+        import ticket_stream
+        
+        with open('sample_tickets.json', 'r', encoding='utf-8') as f:
+            tickets = json.load(f)
+        
+        # Tiny reads so tickets straddle read boundaries
+        block_size = ticket_stream.READ_BLOCK_SIZE
+        ticket_stream.READ_BLOCK_SIZE = 7
+        try:
+            chunks = list(ticket_stream.iter_json_array_chunks('sample_tickets.json', chunk_size=5))
+        finally:
+            ticket_stream.READ_BLOCK_SIZE = block_size
+        
+        if [ticket for chunk in chunks for ticket in chunk] != tickets or max(len(c) for c in chunks) > 5:
+            print("❌ JSON array chunks do not match json.load")
+            return False
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Malformed input fails where it is, without reading the rest of the file
+            valid = json.dumps(tickets[0])
+            rest = ", ".join([valid] * 2000)
+            malformed = {
+                'syntax': f'[{valid}, {{"subject": "Broken" "description": "x"}}, {rest}]',
+                'unterminated': f'[{valid}, {{"subject": "Broken, {rest}]',
+            }
+            characters_read = []
+            
+            def counting_open(*args, **kwargs):
+                f = open(*args, **kwargs)
+                read = f.read
+                def counted(size=-1):
+                    block = read(size)
+                    characters_read.append(len(block))
+                    return block
+                f.read = counted
+                return f
+            
+            ticket_stream.open = counting_open
+            max_element = ticket_stream.MAX_ELEMENT_CHARS
+            ticket_stream.MAX_ELEMENT_CHARS = 4096
+            try:
+                for name, content in malformed.items():
+                    path = os.path.join(tmp_dir, f'{name}.json')
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                    characters_read.clear()
+                    try:
+                        list(ticket_stream.iter_json_array_chunks(path, chunk_size=5))
+                        print(f"❌ {name} JSON should raise")
+                        return False
+                    except ValueError:
+                        pass
+                    if sum(characters_read) > 3 * ticket_stream.READ_BLOCK_SIZE:
+                        print(f"❌ {name} JSON should fail without buffering the file: read {sum(characters_read)}")
+                        return False
+            finally:
+                del ticket_stream.open
+                ticket_stream.MAX_ELEMENT_CHARS = max_element
+            
+            jsonl_path = os.path.join(tmp_dir, 'tickets.jsonl')
+            with open(jsonl_path, 'w', encoding='utf-8') as f:
+                for ticket in tickets:
+                    f.write(json.dumps(ticket) + "\n")
+            
+            output_path = os.path.join(tmp_dir, 'results.csv')
+            with ticket_stream.ResultWriter(output_path) as writer:
+                for chunk_df in ticket_stream.iter_ticket_chunks(jsonl_path, chunk_size=5):
+                    writer.write(chunk_df)
+            
+            if writer.rows_written != len(tickets) or len(pd.read_csv(output_path)) != len(tickets):
+                print(f"❌ Expected {len(tickets)} rows written, got {writer.rows_written}")
+                return False
+        
+        print("✅ Streaming ticket reader tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Streaming ticket reader test failed: {e}")
+        return False
+
 def test_streamlit_syntax():
     """Test if Streamlit app has valid syntax"""
     print("🔍 Testing Streamlit app syntax...")
@@ -168,6 +1814,28 @@ def main():
         ("Sample Data", test_sample_data),
         ("Module Imports", test_imports),
         ("RAG Logic", test_rag_logic),
+        ("Keyword Rules", test_keyword_rules),
+        ("Classification Cache", test_classification_cache),
+        ("Batched Classification", test_batched_classification),
+        ("Length Bucketing", test_length_bucketing),
+        ("Parallel Classification", test_parallel_classification),
+        ("Model Registry", test_model_registry),
+        ("Async Classification", test_async_classification),
+        ("Structured Output", test_structured_output),
+        ("Near-Duplicate Reuse", test_near_duplicate_reuse),
+        ("OpenAI Scheduler", test_openai_scheduler),
+        ("HTTP Pool", test_http_pool),
+        ("Documentation Cache", test_doc_cache),
+        ("Documentation Prefetch", test_doc_prefetcher),
+        ("Documentation Crawler", test_doc_crawler),
+        ("HTML Extraction", test_html_extract),
+        ("Context Packing", test_context_packer),
+        ("LLM Replay", test_llm_replay),
+        ("LLM Accounting", test_llm_accounting),
+        ("Deadline Budget", test_deadline_budget),
+        ("Batch Jobs", test_batch_jobs),
+        ("Ticket Stream", test_ticket_stream),
+        ("Cascade Calibration", test_cascade_calibration),
         ("Streamlit Syntax", test_streamlit_syntax),
     ]
     
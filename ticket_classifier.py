@@ -1,40 +1,51 @@
 import openai
+import asyncio
 import json
 import os
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict, replace
 from dotenv import load_dotenv
+from keyword_rules import KeywordRuleEngine
+from classification_cache import ClassificationCache
+from openai_scheduler import OpenAIScheduler, get_scheduler
+from http_pool import get_http_client, make_async_http_client
+from llm_backend import make_client
+from llm_accounting import LLMAccounting, get_accounting
+from deadline_budget import BudgetRunner
+from structured_output import (ParseStats, StructuredOutputError, extract_json, parse_classification,
+                               response_format, validate_classification)
+from near_duplicate import NearDuplicateIndex, hashing_embedder, openai_embedder
 
 load_dotenv()
 
-@dataclass
-class TicketClassification:
-    topic_tags: List[str]
-    sentiment: str
-    priority: str
-    confidence: float
-    reasoning: str
+# Keyword rules for the rule-based fallback, in precedence order
+FALLBACK_RULES = KeywordRuleEngine({
+    'topic': [
+        ('Connector', ['connect', 'connection', 'connector', 'snowflake', 'databricks', 'power bi']),
+        ('API/SDK', ['api', 'sdk', 'python', 'java', 'endpoint']),
+        ('SSO', ['sso', 'authentication', 'login', 'okta', 'saml']),
+        ('Lineage', ['lineage', 'dependency', 'upstream', 'downstream']),
+        ('Glossary', ['glossary', 'term', 'definition']),
+        ('Sensitive data', ['sensitive', 'pii', 'gdpr', 'privacy', 'compliance']),
+        ('How-to', ['how to', 'how do', 'tutorial', 'guide', 'steps']),
+        ('Best practices', ['best practice', 'recommendation', 'optimize']),
+    ],
+    'sentiment': [
+        ('Angry', ['angry', 'furious', 'outraged', 'disgusted']),
+        ('Frustrated', ['frustrated', 'annoyed', 'disappointed']),
+        ('Urgent', ['urgent', 'asap', 'immediately', 'critical']),
+        ('Curious', ['curious', 'wondering', 'interested', 'question']),
+    ],
+    'priority': [
+        ('P0 (High)', ['critical', 'urgent', 'blocking', 'down', 'broken', 'emergency']),
+        ('P1 (Medium)', ['important', 'needed', 'issue', 'problem']),
+    ],
+})
 
-class TicketClassifier:
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = openai.OpenAI(
-            api_key=api_key or os.getenv('OPENAI_API_KEY')
-        )
-        self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
-        
-    def classify_ticket(self, subject: str, description: str) -> TicketClassification:
-        """
-        Classify a support ticket using OpenAI's GPT model.
-        
-        Args:
-            subject: Ticket subject line
-            description: Ticket description/content
-            
-        Returns:
-            TicketClassification object with classification results
-        """
-        
-        system_prompt = """
+CLASSIFICATION_SYSTEM_PROMPT = """
         You are an AI assistant that classifies customer support tickets for Atlan, a data catalog and governance platform.
         
         Your task is to analyze support tickets and classify them according to these criteria:
@@ -71,128 +82,550 @@ class TicketClassifier:
             "reasoning": "Brief explanation of classification decisions"
         }
         """
+
+# Appended to the system prompt when several tickets are sent in one request
+PACKED_PROMPT_SUFFIX = """
+        You will receive a JSON array of tickets, each with a "ticket_id". Classify every
+        ticket independently and respond ONLY with a JSON object whose "classifications"
+        array holds one object per ticket, in the format above plus its "ticket_id":
+        {"classifications": [
+            {"ticket_id": "...", "topic_tags": [...], "sentiment": "...", "priority": "...", "confidence": 0.85, "reasoning": "..."}
+        ]}
+        """
+
+# Requests in flight at once for bulk classification
+DEFAULT_CONCURRENCY = int(os.getenv('OPENAI_CONCURRENCY', '8'))
+
+# Tickets per chat completion for bulk classification (1 sends each ticket on its own)
+DEFAULT_PACK_SIZE = int(os.getenv('OPENAI_PACK_SIZE', '1'))
+
+# "json_schema" constrains replies to the taxonomy schema, "json_object" only to valid
+# JSON, "off" relies on the prompt; unsupported modes step down to the next one.
+# "auto" picks json_schema for models with structured outputs, else json_object
+STRUCTURED_OUTPUT_MODES = ('json_schema', 'json_object', 'off')
+DEFAULT_STRUCTURED_OUTPUT = os.getenv('OPENAI_STRUCTURED_OUTPUT', 'auto')
+# Model name prefixes that accept response_format json_schema, and older snapshots that do not
+JSON_SCHEMA_MODELS = ('gpt-4o', 'gpt-4.1', 'gpt-5', 'o1', 'o3', 'o4')
+JSON_SCHEMA_EXCLUDED = ('gpt-4o-2024-05-13', 'o1-preview', 'o1-mini')
+
+# Extra requests for a reply that holds no valid classification
+PARSE_RETRIES = 1
+
+# Reuse classifications of recent near-identical tickets: "off", "openai" (embeddings
+# API) or "hashing" (local word/trigram vectors, no API call)
+NEAR_DUPLICATE_REUSE = os.getenv('NEAR_DUPLICATE_REUSE', 'off')
+
+# Accounting operations that classification pays for, retries included
+CLASSIFICATION_OPERATIONS = ('classify', 'classify_packed', 'embed')
+
+# Change with the prompt, so classifications cached under an older prompt are never reused
+PROMPT_VERSION = hashlib.sha256(CLASSIFICATION_SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:8]
+PACKED_PROMPT_VERSION = hashlib.sha256(
+    (CLASSIFICATION_SYSTEM_PROMPT + PACKED_PROMPT_SUFFIX).encode('utf-8')
+).hexdigest()[:8]
+
+@dataclass
+class TicketClassification:
+    topic_tags: List[str]
+    sentiment: str
+    priority: str
+    confidence: float
+    reasoning: str
+    # "model", "rules" (keyword fallback), "cache" (persistent cache hit), "reused" (near-duplicate),
+    # "parse_failure", or "provisional" (rules standing in for a model call still running past its budget)
+    decided_by: str = "model"
+
+def supported_structured_output(model: str) -> str:
+    """Strictest structured output mode the model is known to accept"""
+    if model.startswith(JSON_SCHEMA_MODELS) and not model.startswith(JSON_SCHEMA_EXCLUDED):
+        return 'json_schema'
+    return 'json_object'
+
+class TicketClassifier:
+    # classify_multiple_tickets takes and returns lists of ticket dicts (see ticket_stream)
+    input_format = "records"
+
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[ClassificationCache] = None,
+                 scheduler: Optional[OpenAIScheduler] = None, structured_output: str = DEFAULT_STRUCTURED_OUTPUT,
+                 near_duplicates: Optional[NearDuplicateIndex] = None, accounting: Optional[LLMAccounting] = None):
+        if structured_output not in STRUCTURED_OUTPUT_MODES + ('auto',):
+            raise ValueError(f"Unknown structured output mode: {structured_output}")
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        # Retries are left to the shared scheduler, which knows the rate limits;
+        # connections come from the process-wide keep-alive pool. LLM_BACKEND can
+        # record or replay the traffic instead (see llm_backend)
+        self.client = make_client(lambda: openai.OpenAI(
+            api_key=self.api_key,
+            max_retries=0,
+            http_client=get_http_client()
+        ))
+        self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+        self.cache = cache
+        self.scheduler = scheduler or get_scheduler()
+        # Asking json_schema of a model without structured outputs costs a 400 before the downgrade
+        if structured_output == 'auto':
+            structured_output = supported_structured_output(self.model)
+        self.structured_output = structured_output
+        self.parse_stats = ParseStats()
+        # Token usage reported by the API, for comparing single and packed requests
+        self.token_usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        self.accounting = accounting or get_accounting()
+        self.budget_runner = BudgetRunner()
         
+        if near_duplicates is None and NEAR_DUPLICATE_REUSE == 'openai':
+            near_duplicates = NearDuplicateIndex(
+                openai_embedder(self.client, accounting=self.accounting, scheduler=self.scheduler)
+            )
+        elif near_duplicates is None and NEAR_DUPLICATE_REUSE == 'hashing':
+            near_duplicates = NearDuplicateIndex(hashing_embedder())
+        self.near_duplicates = near_duplicates
+    
+    @property
+    def backend_id(self) -> str:
+        """Identifies model and prompt for classification cache keys"""
+        return f"openai:{self.model}:{PROMPT_VERSION}"
+    
+    @property
+    def packed_backend_id(self) -> str:
+        """Cache id for classifications made in packed requests"""
+        return f"openai:{self.model}:{PACKED_PROMPT_VERSION}"
+    
+    def _record_usage(self, response):
+        """Add a completion's reported token usage to the running totals"""
+        self.token_usage['requests'] += 1
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            self.token_usage['prompt_tokens'] += usage.prompt_tokens or 0
+            self.token_usage['completion_tokens'] += usage.completion_tokens or 0
+    
+    def _build_messages(self, subject: str, description: str) -> List[Dict]:
+        """Chat messages asking the model to classify one ticket"""
         user_prompt = f"""
         Please classify this support ticket:
         
         Subject: {subject}
         Description: {description}
         """
+        return [
+            {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _ticket_key(self, subject: str, description: str) -> str:
+        return ClassificationCache.make_key(subject, description, self.backend_id)
+    
+    def reconciled_classification(self, subject: str, description: str) -> Optional[TicketClassification]:
+        """The model's classification of a ticket that got a provisional one, once it has arrived"""
+        return self.budget_runner.result(self._ticket_key(subject, description))
+    
+    def _account_classification(self, operation: str, started: float, response,
+                                classification: Optional[TicketClassification]):
+        """Account a completed classification request, as a parse failure if its reply was unusable"""
+        failed = classification is None or classification.decided_by == 'parse_failure'
+        self.accounting.record_call(operation, self.model, started, response,
+                                    outcome='parse_failure' if failed else 'ok')
+    
+    def _completion_options(self, packed: bool = False, max_tokens: int = 500) -> Dict:
+        """Sampling settings and response_format for a classification request"""
+        return {
+            'temperature': 0.3,
+            'max_tokens': max_tokens,
+            **response_format(self.structured_output, packed),
+        }
+    
+    def _downgrade_structured_output(self, error: Exception) -> bool:
+        """Step down to the next structured output mode if the model rejected this one"""
+        if getattr(error, 'status_code', None) != 400 or 'response_format' not in str(error).lower():
+            return False
+        if self.structured_output == STRUCTURED_OUTPUT_MODES[-1]:
+            return False
+        
+        next_mode = STRUCTURED_OUTPUT_MODES[STRUCTURED_OUTPUT_MODES.index(self.structured_output) + 1]
+        print(f"⚠️ {self.model} does not support {self.structured_output} output, using {next_mode}")
+        self.structured_output = next_mode
+        return True
+    
+    def _find_near_duplicates(self, tickets: List[Dict]) -> List[Tuple[Optional[TicketClassification], Optional[object]]]:
+        """
+        Look tickets up in the near-duplicate index with one embedding call.
+        
+        Returns (reused classification or None, embedding) per ticket; the
+        embedding is None when reuse is off or embedding failed.
+        """
+        if self.near_duplicates is None or not tickets:
+            return [(None, None)] * len(tickets)
         
+        vectors = self.near_duplicates.embed_texts(
+            [f"{ticket.get('subject', '')}\n{ticket.get('description', '')}" for ticket in tickets]
+        )
+        if vectors is None:
+            return [(None, None)] * len(tickets)
+        
+        found = []
+        for vector in vectors:
+            match = self.near_duplicates.find(vector)
+            if match is None:
+                found.append((None, vector))
+                continue
+            neighbour, similarity = match
+            found.append((TicketClassification(**{
+                **asdict(neighbour),
+                'decided_by': 'reused',
+                'reasoning': f"Near-duplicate of a recent ticket (similarity {similarity:.2f}): {neighbour.reasoning}"
+            }), vector))
+        return found
+    
+    def _parse_response(self, subject: str, description: str, result_text: str,
+                        final: bool = True, vector=None, decided_by: str = 'model') -> Optional[TicketClassification]:
+        """
+        Turn the model's reply into a classification, caching it if valid.
+        
+        Fenced, prose-wrapped and truncated JSON is recovered and checked against
+        the taxonomy. An unusable reply returns None so the caller can retry, or
+        a low-confidence placeholder when final. Replies not written by the
+        model (decided_by other than "model") are never cached.
+        """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
+            fields = parse_classification(result_text, self.parse_stats)
+        except StructuredOutputError as e:
+            if not final:
+                return None
+            return TicketClassification(
+                topic_tags=['Product'],
+                sentiment='Neutral',
+                priority='P1 (Medium)',
+                confidence=0.1,
+                reasoning=f'JSON parsing failed: {str(e)}',
+                decided_by='parse_failure'
             )
+        
+        classification = TicketClassification(**fields, decided_by=decided_by)
+        if self.cache is not None and decided_by == 'model':
+            self.cache.put(subject, description, self.backend_id, asdict(classification))
+        if vector is not None:
+            self.near_duplicates.add(vector, classification)
+        return classification
+    
+    def classify_ticket(self, subject: str, description: str, use_cache: bool = True,
+                        budget: Optional[float] = None) -> TicketClassification:
+        """
+        Classify a support ticket using OpenAI's GPT model.
+        
+        Args:
+            subject: Ticket subject line
+            description: Ticket description/content
+            use_cache: Check the classification cache before calling the API
+            budget: Seconds to wait for the model; past it, a provisional rule-based
+                classification is returned while the model call finishes in the
+                background (see reconciled_classification)
             
-            result_text = response.choices[0].message.content.strip()
-            
-            # Parse the JSON response
+        Returns:
+            TicketClassification object with classification results
+        """
+        if budget is not None:
+            return self.budget_runner.run(
+                self._ticket_key(subject, description),
+                lambda: self.classify_ticket(subject, description, use_cache),
+                budget,
+                provisional=lambda: replace(
+                    self._fallback_classification(
+                        subject, description,
+                        reasoning='Model response over the latency budget - provisional rule-based classification'
+                    ),
+                    decided_by='provisional'
+                ),
+                same=lambda provisional, final: (provisional.topic_tags, provisional.sentiment, provisional.priority)
+                == (final.topic_tags, final.sentiment, final.priority),
+                # A late call that fell back to rules is no better than the provisional result
+                answered=lambda final: final.decided_by not in ('rules', 'parse_failure')
+            )[0]
+        
+        self.accounting.count_items('tickets')
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(subject, description, self.backend_id)
+            if cached is not None:
+                return TicketClassification(**cached, decided_by='cache')
+        
+        reused, vector = self._find_near_duplicates([{'subject': subject, 'description': description}])[0]
+        if reused is not None:
+            return reused
+        
+        attempt = 0
+        while True:
+            started = time.perf_counter()
             try:
-                result_dict = json.loads(result_text)
-                return TicketClassification(
-                    topic_tags=result_dict.get('topic_tags', []),
-                    sentiment=result_dict.get('sentiment', 'Neutral'),
-                    priority=result_dict.get('priority', 'P1 (Medium)'),
-                    confidence=result_dict.get('confidence', 0.0),
-                    reasoning=result_dict.get('reasoning', 'No reasoning provided')
-                )
-            except json.JSONDecodeError as e:
-                # Fallback classification if JSON parsing fails
-                return TicketClassification(
-                    topic_tags=['Product'],
-                    sentiment='Neutral',
-                    priority='P1 (Medium)',
-                    confidence=0.1,
-                    reasoning=f'JSON parsing failed: {str(e)}'
+                response = self.scheduler.chat_completion(
+                    self.client,
+                    model=self.model,
+                    messages=self._build_messages(subject, description),
+                    **self._completion_options()
                 )
-                
-        except Exception as e:
-            error_message = str(e)
-            
-            # Provide intelligent fallback based on content analysis if API fails
-            fallback_topic = ['Product']
-            fallback_sentiment = 'Neutral'
-            fallback_priority = 'P1 (Medium)'
-            fallback_reasoning = 'API quota exceeded - using rule-based classification'
-            
-            # Simple keyword-based classification as fallback
-            combined_text = f"{subject} {description}".lower()
-            
-            # Topic classification
-            if any(word in combined_text for word in ['connect', 'connection', 'connector', 'snowflake', 'databricks', 'power bi']):
-                fallback_topic = ['Connector']
-            elif any(word in combined_text for word in ['api', 'sdk', 'python', 'java', 'endpoint']):
-                fallback_topic = ['API/SDK']
-            elif any(word in combined_text for word in ['sso', 'authentication', 'login', 'okta', 'saml']):
-                fallback_topic = ['SSO']
-            elif any(word in combined_text for word in ['lineage', 'dependency', 'upstream', 'downstream']):
-                fallback_topic = ['Lineage']
-            elif any(word in combined_text for word in ['glossary', 'term', 'definition']):
-                fallback_topic = ['Glossary']
-            elif any(word in combined_text for word in ['sensitive', 'pii', 'gdpr', 'privacy', 'compliance']):
-                fallback_topic = ['Sensitive data']
-            elif any(word in combined_text for word in ['how to', 'how do', 'tutorial', 'guide', 'steps']):
-                fallback_topic = ['How-to']
-            elif any(word in combined_text for word in ['best practice', 'recommendation', 'optimize']):
-                fallback_topic = ['Best practices']
+            except Exception as e:
+                self.accounting.record_call('classify', self.model, started, error=e)
+                if self._downgrade_structured_output(e):
+                    continue
+                # Provide intelligent fallback based on content analysis if API fails
+                return self._fallback_classification(subject, description)
             
-            # Sentiment classification
-            if any(word in combined_text for word in ['angry', 'furious', 'outraged', 'disgusted']):
-                fallback_sentiment = 'Angry'
-            elif any(word in combined_text for word in ['frustrated', 'annoyed', 'disappointed']):
-                fallback_sentiment = 'Frustrated'
-            elif any(word in combined_text for word in ['urgent', 'asap', 'immediately', 'critical']):
-                fallback_sentiment = 'Urgent'
-            elif any(word in combined_text for word in ['curious', 'wondering', 'interested', 'question']):
-                fallback_sentiment = 'Curious'
+            self._record_usage(response)
+            classification = self._parse_response(
+                subject, description, response.choices[0].message.content,
+                final=attempt >= PARSE_RETRIES, vector=vector
+            )
+            self._account_classification('classify', started, response, classification)
+            if classification is not None:
+                return classification
+            attempt += 1
+            self.parse_stats.record('retries')
+    
+    async def classify_ticket_async(self, subject: str, description: str, client: openai.AsyncOpenAI,
+                                    use_cache: bool = True) -> TicketClassification:
+        """Async version of classify_ticket on an AsyncOpenAI client"""
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(subject, description, self.backend_id)
+            if cached is not None:
+                return TicketClassification(**cached, decided_by='cache')
+        
+        reused, vector = None, None
+        if self.near_duplicates is not None:
+            # Embedding uses the sync client, so keep it off the event loop
+            reused, vector = (await asyncio.to_thread(
+                self._find_near_duplicates, [{'subject': subject, 'description': description}]
+            ))[0]
+            if reused is not None:
+                return reused
+        
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await self.scheduler.chat_completion_async(
+                    client,
+                    model=self.model,
+                    messages=self._build_messages(subject, description),
+                    **self._completion_options()
+                )
+            except Exception as e:
+                self.accounting.record_call('classify', self.model, started, error=e)
+                if self._downgrade_structured_output(e):
+                    continue
+                return self._fallback_classification(subject, description)
             
-            # Priority classification
-            if any(word in combined_text for word in ['critical', 'urgent', 'blocking', 'down', 'broken', 'emergency']):
-                fallback_priority = 'P0 (High)'
-            elif any(word in combined_text for word in ['important', 'needed', 'issue', 'problem']):
-                fallback_priority = 'P1 (Medium)'
+            self._record_usage(response)
+            classification = self._parse_response(
+                subject, description, response.choices[0].message.content,
+                final=attempt >= PARSE_RETRIES, vector=vector
+            )
+            self._account_classification('classify', started, response, classification)
+            if classification is not None:
+                return classification
+            attempt += 1
+            self.parse_stats.record('retries')
+    
+    async def _classify_pack_async(self, tickets: List[Dict], client: openai.AsyncOpenAI) -> Dict[int, TicketClassification]:
+        """
+        Classify several tickets in one chat completion.
+        
+        Returns classifications by position in tickets; tickets the reply does
+        not cover (malformed or truncated JSON, unknown ids) are left out.
+        """
+        ticket_ids = [str(ticket.get('ticket_id') or f"ticket-{i}") for i, ticket in enumerate(tickets)]
+        if len(set(ticket_ids)) < len(ticket_ids):
+            ticket_ids = [f"ticket-{i}" for i in range(len(tickets))]
+        
+        payload = [
+            {'ticket_id': ticket_id, 'subject': ticket.get('subject', ''), 'description': ticket.get('description', '')}
+            for ticket_id, ticket in zip(ticket_ids, tickets)
+        ]
+        started = time.perf_counter()
+        try:
+            response = await self.scheduler.chat_completion_async(
+                client,
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT + PACKED_PROMPT_SUFFIX},
+                    {"role": "user", "content": "Please classify these support tickets:\n" + json.dumps(payload, indent=1)}
+                ],
+                **self._completion_options(packed=True, max_tokens=min(4096, 100 + 250 * len(tickets)))
+            )
+        except Exception as e:
+            self.accounting.record_call('classify_packed', self.model, started, error=e)
+            raise
+        self._record_usage(response)
+        
+        try:
+            items, repaired = extract_json(response.choices[0].message.content)
+        except StructuredOutputError:
+            self.parse_stats.record('failed')
+            self.accounting.record_call('classify_packed', self.model, started, response, outcome='parse_failure')
+            return {}
+        if isinstance(items, dict):
+            items = items.get('classifications', [items])
+        
+        positions = {ticket_id: i for i, ticket_id in enumerate(ticket_ids)}
+        classified = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or str(item.get('ticket_id')) not in positions:
+                continue
+            try:
+                fields = validate_classification(item)
+            except StructuredOutputError:
+                self.parse_stats.record('failed')
+                continue
+            self.parse_stats.record('repaired' if repaired else 'clean')
+            i = positions[str(item['ticket_id'])]
+            classified[i] = TicketClassification(**fields)
+            if self.cache is not None:
+                self.cache.put(tickets[i].get('subject', ''), tickets[i].get('description', ''),
+                               self.packed_backend_id, asdict(classified[i]))
+        self.accounting.record_call('classify_packed', self.model, started, response,
+                                    outcome='ok' if classified else 'parse_failure')
+        return classified
+    
+    async def _classify_packed_async(self, tickets: List[Dict], client: openai.AsyncOpenAI,
+                                     semaphore: asyncio.Semaphore, pack_size: int, classify_single) -> List[TicketClassification]:
+        """Classify cache misses pack_size at a time, retrying uncovered tickets singly"""
+        classifications: List[Optional[TicketClassification]] = [None] * len(tickets)
+        todo = []
+        for i, ticket in enumerate(tickets):
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(ticket.get('subject', ''), ticket.get('description', ''), self.packed_backend_id)
+            if cached is not None:
+                classifications[i] = TicketClassification(**cached, decided_by='cache')
             else:
-                fallback_priority = 'P2 (Low)'
+                todo.append(i)
+        
+        async def run_pack(pack: List[int]):
+            async with semaphore:
+                vectors = {}
+                if self.near_duplicates is not None:
+                    # Looked up once a slot is free, so earlier packs' results can be reused
+                    found = await asyncio.to_thread(self._find_near_duplicates, [tickets[i] for i in pack])
+                    for i, (reused, vector) in zip(pack, found):
+                        if reused is not None:
+                            classifications[i] = reused
+                        else:
+                            vectors[i] = vector
+                    pack = [i for i in pack if classifications[i] is None]
+                
+                try:
+                    classified = await self._classify_pack_async([tickets[i] for i in pack], client) if pack else {}
+                except Exception as e:
+                    # Tickets are retried singly below, in the next mode if this one was rejected
+                    self._downgrade_structured_output(e)
+                    classified = {}
             
-            return TicketClassification(
-                topic_tags=fallback_topic,
-                sentiment=fallback_sentiment,
-                priority=fallback_priority,
-                confidence=0.6,  # Moderate confidence for rule-based classification
-                reasoning=fallback_reasoning
-            )
+            missing = []
+            for position, i in enumerate(pack):
+                if position in classified:
+                    classifications[i] = classified[position]
+                    if vectors.get(i) is not None:
+                        self.near_duplicates.add(vectors[i], classified[position])
+                else:
+                    missing.append(i)
+            
+            singles = await asyncio.gather(*(classify_single(tickets[i]) for i in missing))
+            for i, classification in zip(missing, singles):
+                classifications[i] = classification
+        
+        await asyncio.gather(*(run_pack(todo[k:k + pack_size]) for k in range(0, len(todo), pack_size)))
+        return classifications
     
-    def classify_multiple_tickets(self, tickets: List[Dict]) -> List[Dict]:
+    def _make_async_client(self) -> openai.AsyncOpenAI:
+        """New async client; its connection pool belongs to the event loop it is used on"""
+        return make_client(
+            lambda: openai.AsyncOpenAI(api_key=self.api_key, max_retries=0, http_client=make_async_http_client()),
+            is_async=True
+        )
+    
+    def _fallback_classification(self, subject: str, description: str,
+                                 reasoning: str = 'API quota exceeded - using rule-based classification') -> TicketClassification:
+        """Simple keyword-based classification used when the API call fails"""
+        matches = FALLBACK_RULES.match(f"{subject} {description}")
+        
+        return TicketClassification(
+            topic_tags=[matches.first('topic', 'Product')],
+            sentiment=matches.first('sentiment', 'Neutral'),
+            priority=matches.first('priority', 'P2 (Low)'),
+            confidence=0.6,  # Moderate confidence for rule-based classification
+            reasoning=reasoning,
+            decided_by='rules'
+        )
+    
+    def classify_multiple_tickets(self, tickets: List[Dict], concurrency: int = DEFAULT_CONCURRENCY,
+                                  pack_size: int = DEFAULT_PACK_SIZE) -> List[Dict]:
         """
         Classify multiple tickets and return results.
         
+        Requests are sent concurrently over the async client, at most
+        ``concurrency`` at a time. Safe to call from code that already runs
+        an event loop; the requests then run on a helper thread.
+        
+        With ``pack_size > 1`` each request carries that many tickets, so the
+        taxonomy prompt is paid once per pack instead of once per ticket.
+        Tickets missing from a pack's reply are retried on their own.
+        
         Args:
             tickets: List of ticket dictionaries with 'subject' and 'description'
+            concurrency: Maximum requests in flight
+            pack_size: Tickets per request
             
         Returns:
-            List of dictionaries containing original ticket data plus classification
+            List of dictionaries containing original ticket data plus classification,
+            in the same order as tickets
         """
-        results = []
+        coroutine = self.classify_multiple_tickets_async(tickets, concurrency, pack_size)
         
-        for ticket in tickets:
-            classification = self.classify_ticket(
-                ticket.get('subject', ''),
-                ticket.get('description', '')
-            )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        
+        # asyncio.run cannot nest inside a running loop, so use a fresh one on a thread
+        outcome = {}
+        def run():
+            try:
+                outcome['results'] = asyncio.run(coroutine)
+            except BaseException as e:
+                outcome['error'] = e
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['results']
+    
+    async def classify_multiple_tickets_async(self, tickets: List[Dict], concurrency: int = DEFAULT_CONCURRENCY,
+                                              pack_size: int = DEFAULT_PACK_SIZE) -> List[Dict]:
+        """Classify tickets with at most concurrency requests in flight, keeping input order"""
+        self.accounting.count_items('tickets', len(tickets))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async with self._make_async_client() as client:
+            async def classify(ticket: Dict) -> TicketClassification:
+                subject, description = ticket.get('subject', ''), ticket.get('description', '')
+                async with semaphore:
+                    try:
+                        return await self.classify_ticket_async(subject, description, client)
+                    except Exception:
+                        return self._fallback_classification(subject, description)
             
+            if pack_size <= 1:
+                classifications = await asyncio.gather(*(classify(ticket) for ticket in tickets))
+            else:
+                classifications = await self._classify_packed_async(tickets, client, semaphore, pack_size, classify)
+        
+        results = []
+        for ticket, classification in zip(tickets, classifications):
             result = ticket.copy()
             result['classification'] = {
                 'topic_tags': classification.topic_tags,
                 'sentiment': classification.sentiment,
                 'priority': classification.priority,
                 'confidence': classification.confidence,
-                'reasoning': classification.reasoning
+                'reasoning': classification.reasoning,
+                'decided_by': classification.decided_by
             }
             results.append(result)
             
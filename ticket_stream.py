@@ -0,0 +1,247 @@
+import argparse
+import csv
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# Parquet output is optional: pip install pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+READ_BLOCK_SIZE = 1 << 16
+# A single JSON array element longer than this is treated as malformed input
+MAX_ELEMENT_CHARS = 16 << 20
+
+
+def iter_csv_chunks(file_path: str, chunk_size: int = 1000) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of at most chunk_size tickets from a CSV file"""
+    yield from pd.read_csv(file_path, chunksize=chunk_size)
+
+
+def iter_jsonl_chunks(file_path: str, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+    """Yield lists of at most chunk_size tickets from a JSON Lines file"""
+    chunk = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_json_array_chunks(file_path: str, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+    """
+    Yield lists of at most chunk_size tickets from a JSON array file.
+
+    The array is decoded one element at a time from fixed-size reads, so only
+    the current chunk and one read block are held in memory. Malformed JSON
+    raises as soon as it is read; an element that never ends raises once it
+    passes MAX_ELEMENT_CHARS, rather than buffering the rest of the file.
+    """
+    decoder = json.JSONDecoder()
+    chunk = []
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        def fill() -> bool:
+            nonlocal buffer, position, eof
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                eof = True
+                return False
+            buffer = buffer[position:] + block
+            position = 0
+            return True
+
+        while True:
+            # Skip whitespace and separators between elements
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position < len(buffer) or not fill():
+                    break
+
+            if position >= len(buffer):
+                raise ValueError(f"Unexpected end of JSON array in {file_path}")
+
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f"{file_path} does not contain a JSON array")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == ']':
+                break
+
+            try:
+                ticket, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # Only an element cut off by the read boundary is worth reading more for:
+                # the error is at the end of the buffer (or within a trailing \uXXXX escape),
+                # or in a string that has not ended yet
+                truncated = e.pos >= len(buffer) - 6 or e.msg.startswith('Unterminated string')
+                if not truncated or eof:
+                    raise
+                if len(buffer) - position > MAX_ELEMENT_CHARS:
+                    raise ValueError(f"JSON array element in {file_path} exceeds {MAX_ELEMENT_CHARS} characters") from e
+                if not fill():
+                    raise
+                continue
+
+            # A number or literal can end exactly at the boundary and decode short
+            if end == len(buffer) and not eof and fill():
+                continue
+
+            position = end
+            chunk.append(ticket)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def iter_ticket_chunks(file_path: str, chunk_size: int = 1000) -> Iterator[pd.DataFrame]:
+    """Yield ticket DataFrames from a CSV, JSON array or JSONL file, by extension"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        yield from iter_csv_chunks(file_path, chunk_size)
+        return
+
+    if extension in ('.jsonl', '.ndjson'):
+        chunks = iter_jsonl_chunks(file_path, chunk_size)
+    elif extension == '.json':
+        chunks = iter_json_array_chunks(file_path, chunk_size)
+    else:
+        raise ValueError(f"Unsupported ticket file type: {file_path}")
+
+    for chunk in chunks:
+        yield pd.DataFrame(chunk)
+
+
+def classify_chunks(chunks: Iterator[pd.DataFrame], classifier, **classify_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Classify ticket chunks as they arrive, yielding one result DataFrame per chunk.
+
+    Works with both classifiers: AtlanTicketClassifier takes and returns
+    DataFrames, TicketClassifier takes and returns ticket dicts with a nested
+    'classification' dict, which is flattened into columns here.
+    """
+    for chunk_df in chunks:
+        if getattr(classifier, 'input_format', 'records') == 'dataframe':
+            yield classifier.classify_multiple_tickets(chunk_df, **classify_kwargs)
+            continue
+
+        results = classifier.classify_multiple_tickets(chunk_df.to_dict('records'), **classify_kwargs)
+        yield pd.DataFrame([
+            {**{k: v for k, v in result.items() if k != 'classification'}, **result['classification']}
+            for result in results
+        ])
+
+
+class ResultWriter:
+    """Append classified chunks to a CSV or Parquet file without holding them in memory"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.format = 'parquet' if file_path.lower().endswith('.parquet') else 'csv'
+        if self.format == 'parquet' and not PARQUET_AVAILABLE:
+            raise ImportError("Parquet output requires: pip install pyarrow")
+
+        self.rows_written = 0
+        self._parquet_writer = None
+        self._schema = None
+        self._columns: Optional[List[str]] = None
+
+    def write(self, chunk_df: pd.DataFrame):
+        """Append one chunk of results"""
+        if chunk_df.empty:
+            return
+
+        if self.format == 'parquet':
+            self._write_parquet(chunk_df)
+        else:
+            self._write_csv(chunk_df)
+        self.rows_written += len(chunk_df)
+
+    def _write_csv(self, chunk_df: pd.DataFrame):
+        if self._columns is None:
+            self._columns = list(chunk_df.columns)
+            mode, header = 'w', True
+        else:
+            mode, header = 'a', False
+
+        # Lists such as topic_tags are stored as JSON so they round-trip
+        chunk_df = chunk_df.reindex(columns=self._columns).copy()
+        for column in chunk_df.columns:
+            if chunk_df[column].map(lambda value: isinstance(value, list)).any():
+                chunk_df[column] = chunk_df[column].map(json.dumps)
+
+        chunk_df.to_csv(self.file_path, mode=mode, header=header, index=False, quoting=csv.QUOTE_MINIMAL)
+
+    def _write_parquet(self, chunk_df: pd.DataFrame):
+        if self._parquet_writer is None:
+            table = pa.Table.from_pandas(chunk_df, preserve_index=False)
+            self._schema = table.schema
+            self._parquet_writer = pq.ParquetWriter(self.file_path, self._schema)
+        else:
+            # Later chunks follow the first chunk's schema, even if a column is all null
+            chunk_df = chunk_df.reindex(columns=self._schema.names)
+            table = pa.Table.from_pandas(chunk_df, schema=self._schema, preserve_index=False)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def classify_file(input_path: str, output_path: str, classifier,
+                  chunk_size: int = 1000, **classify_kwargs) -> int:
+    """Stream tickets from input_path through classifier into output_path; returns rows written"""
+    with ResultWriter(output_path) as writer:
+        for results_df in classify_chunks(iter_ticket_chunks(input_path, chunk_size), classifier, **classify_kwargs):
+            writer.write(results_df)
+            print(f"🔄 {writer.rows_written} tickets classified and written to {output_path}")
+    return writer.rows_written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify a large ticket export in constant memory")
+    parser.add_argument('input', help='Ticket file (.csv, .json array, or .jsonl)')
+    parser.add_argument('output', help='Results file (.csv or .parquet)')
+    parser.add_argument('--backend', choices=['hf', 'openai'], default='hf')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.backend == 'hf':
+        from classifier import AtlanTicketClassifier
+        ticket_classifier = AtlanTicketClassifier()
+    else:
+        from ticket_classifier import TicketClassifier
+        ticket_classifier = TicketClassifier()
+
+    rows = classify_file(args.input, args.output, ticket_classifier, args.chunk_size)
+    print(f"✅ Wrote {rows} classified tickets to {args.output}")